@@ -15,13 +15,23 @@ def usage() -> int:
     print(
         "Usage:\n"
         "  python3 python/main.py ast_to_json <args...>\n"
+        "  python3 python/main.py ast_batch <dir|glob> [out_dir] [workers] [--index] [--format=json|bin|both] [--cache[=dir]]\n"
+        "  python3 python/main.py cat08_cache [stats|prune|clear] [--cache-dir=dir] [--max-bytes=2G]\n"
+        "  python3 python/main.py astindex <ast_path> [--rebuild]\n"
+        "  python3 python/main.py ast_tail <ast_path> [out.jsonl|-] [interval_s] [--once] [--reset]\n"
+        "  python3 python/main.py cat08_scan <cat08.json|cat08.bin> [scan_no]\n"
+        "  python3 python/main.py cat08_time <cat08.json|cat08.bin> [HH:MM:SS]\n"
+        "  python3 python/main.py cat08_grid <cat08.json|cat08.bin> [out.bin] [gridSize] [maxRangeKm] [--by=scan|all|pkt:N] [--ci=1] [--ref=lat,lon|--ref-sacsic=SAC,SIC]\n"
         "  python3 python/main.py ncmeta <nc_path>\n"
-        "  python3 python/main.py ncgrid <nc_path> <field> <composite> <gridResKm> <gridExtentKm> <maskBelowDbz>\n"
-        "  python3 python/main.py ncrender_day <input_dir> <out_dir> [gridSize] [weakCutDbz] [format]\n"
+        "  python3 python/main.py ncgrid <nc_path> <field> <composite> <gridResKm> <gridExtentKm> <maskBelowDbz> [--no-cache] [--encoding=f32|u8] [--compress=none|zlib|gzip] [--bbox=xmin,ymin,xmax,ymax] [--pyramid[=1,2,4,8]]\n"
+        "  python3 python/main.py ncgrid_day <input_dir> <out_dir> [field] [composite] [gridResKm] [gridExtentKm] [maskBelowDbz] [--u8[=weakCutDbz]] [--bbox=xmin,ymin,xmax,ymax] [--no-cache]\n"
+        "  python3 python/main.py serve    (stdin/stdout 상주 워커: ncgrid / ncmeta / ast_to_json)\n"
+        "  python3 python/main.py ncrender_day <input_dir> <out_dir> [gridSize] [weakCutDbz] [format] [--lut-dir=dir] [--workers=N] [--preset=archive|balanced|fast] [--stream] [--no-frames] [--palette] [--full]\n"
         "\n"
         "Examples:\n"
         "  python3 python/main.py ncmeta download/SSP/nc/20260108/abcd1234/202601080030.nc\n"
         "  python3 python/main.py ncgrid <path> CFZH max 1.0 240.0 0.0\n"
+        "  python3 python/main.py ast_batch 'download/SSP/ast/RDM_B20251224*.ast' out/ 8\n"
     )
     return 2
 
@@ -36,6 +46,46 @@ def main() -> int:
         sys.argv = [sys.argv[0]] + sys.argv[2:]
         return int(ast_to_json_main() or 0)
 
+    if cmd == "ast_batch":
+        if len(sys.argv) < 3:
+            return usage()
+        from maked_package.ast_batch import ast_batch_main
+        return int(ast_batch_main(sys.argv[2:]) or 0)
+
+    if cmd == "cat08_cache":
+        from maked_package.cat08_cache import cat08_cache_main
+        return int(cat08_cache_main(sys.argv[2:]) or 0)
+
+    if cmd == "astindex":
+        if len(sys.argv) < 3:
+            return usage()
+        from maked_package.ast_index import ast_index_main
+        return int(ast_index_main(sys.argv[2:]) or 0)
+
+    if cmd == "ast_tail":
+        if len(sys.argv) < 3:
+            return usage()
+        from maked_package.ast_tail import ast_tail_main
+        return int(ast_tail_main(sys.argv[2:]) or 0)
+
+    if cmd == "cat08_scan":
+        if len(sys.argv) < 3:
+            return usage()
+        from maked_package.cat08_scans import cat08_scan_main
+        return int(cat08_scan_main(sys.argv[2:]) or 0)
+
+    if cmd == "cat08_time":
+        if len(sys.argv) < 3:
+            return usage()
+        from maked_package.cat08_time import cat08_time_main
+        return int(cat08_time_main(sys.argv[2:]) or 0)
+
+    if cmd == "cat08_grid":
+        if len(sys.argv) < 3:
+            return usage()
+        from maked_package.cat08_grid import cat08_grid_main
+        return int(cat08_grid_main(sys.argv[2:]) or 0)
+
     if cmd == "ncmeta":
         if len(sys.argv) < 3:
             return usage()
@@ -44,24 +94,37 @@ def main() -> int:
         return int(nc_meta_main([nc_path]) or 0)
 
     if cmd == "ncgrid":
-        if len(sys.argv) < 8:
-            return usage()
-        # ncgrid <path> <field> <composite> <gridResKm> <gridExtentKm> <maskBelowDbz>
+        # ncgrid <path> <field> <composite> <gridResKm> <gridExtentKm> <maskBelowDbz> [--no-cache]
         args = sys.argv[2:]
+        if len([a for a in args if not a.startswith("--")]) < 6:
+            return usage()
         from maked_package.nc_tools.nc_grid import nc_grid_main
         return int(nc_grid_main(args) or 0)
 
-    if cmd == "ncrender_day":
+    if cmd == "ncgrid_day":
         if len(sys.argv) < 4:
             return usage()
-        input_dir = sys.argv[2]
-        out_dir = sys.argv[3]
-        grid_size = int(sys.argv[4]) if len(sys.argv) >= 5 else 768
-        weak_cut_dbz = float(sys.argv[5]) if len(sys.argv) >= 6 else 5.0
-        out_format = sys.argv[6] if len(sys.argv) >= 7 else "webp"
+        from maked_package.nc_tools.nc_grid_day import nc_grid_day_main
+        return int(nc_grid_day_main(sys.argv[2:]) or 0)
+
+    if cmd == "serve":
+        from maked_package.serve import serve_main
+        return int(serve_main(sys.argv[2:]) or 0)
+
+    if cmd == "ncrender_day":
+        # --옵션 은 위치 인자와 분리해서 그대로 넘긴다
+        args = [a for a in sys.argv[2:] if not a.startswith("--")]
+        flags = [a for a in sys.argv[2:] if a.startswith("--")]
+        if len(args) < 2:
+            return usage()
+        input_dir = args[0]
+        out_dir = args[1]
+        grid_size = int(args[2]) if len(args) >= 3 else 768
+        weak_cut_dbz = float(args[3]) if len(args) >= 4 else 5.0
+        out_format = args[4] if len(args) >= 5 else "webp"
 
         from maked_package.nc_tools.nc_render_day import nc_render_day_main
-        return int(nc_render_day_main([input_dir, out_dir, str(grid_size), str(weak_cut_dbz), out_format]) or 0)
+        return int(nc_render_day_main([input_dir, out_dir, str(grid_size), str(weak_cut_dbz), out_format, *flags]) or 0)
 
     return usage()
 
@@ -0,0 +1,154 @@
+# python/maked_package/ast_batch.py
+from __future__ import annotations
+
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+
+from .config import CAT08_CACHE_DIR
+from .ast_to_json import convert_ast_file, default_json_path
+from .cli_flags import parse_cli_flags
+from .cat08_cache import cached_convert_ast_file, parse_size
+
+
+# -------------------------------------------------------------
+#  여러 AST 파일(예: RDM_B2025122400..23 시간별 분할)을 한 번에 변환
+#
+#  - 입력: 디렉토리(안의 *.ast 전부) 또는 glob 패턴
+#  - 파일마다 프로세스 풀 워커 하나 → 파이썬 기동 비용은 워커 수만큼만
+#  - 출력은 convert_ast_file() 이 tmp → os.replace 로 원자적으로 씀
+# -------------------------------------------------------------
+def list_ast_inputs(src: str) -> list[str]:
+    """디렉토리면 그 안의 .ast 파일, 아니면 glob 패턴으로 해석. 이름순 정렬."""
+    if os.path.isdir(src):
+        paths = [
+            os.path.join(src, name)
+            for name in os.listdir(src)
+            if name.lower().endswith(".ast")
+        ]
+    else:
+        paths = [p for p in glob.glob(src) if os.path.isfile(p)]
+    return sorted(os.path.abspath(p) for p in paths)
+
+
+def _convert_one(ast_path: str, json_path: str, options: dict) -> dict:
+    # 워커 프로세스에서 실행. 예외는 결과 dict 로 돌려서 한 파일 실패가 전체를 멈추지 않게 함.
+    t0 = time.perf_counter()
+    try:
+        if options.get("cache_dir"):
+            info = cached_convert_ast_file(ast_path, json_path, **options)
+        else:
+            info = convert_ast_file(ast_path, json_path, **options)
+        info["ok"] = True
+        return info
+    except Exception as e:
+        return {
+            "ast": ast_path,
+            "json": json_path,
+            "ok": False,
+            "error": str(e),
+            "seconds": round(time.perf_counter() - t0, 3),
+        }
+
+
+def ast_to_json_batch(
+    ast_paths: list[str],
+    out_dir: Optional[str] = None,
+    workers: Optional[int] = None,
+    use_index: bool = False,
+    fmt: str = "json",
+    compression: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+    cache_max_bytes: Optional[int] = None,
+) -> list[dict]:
+    """
+    ast_paths 를 프로세스 풀로 나눠 변환. 입력 순서대로 결과 dict 리스트 반환.
+    진행 상황은 끝나는 순서대로 한 줄씩 출력한다.
+    fmt / compression 은 convert_ast_file() 과 같다.
+    cache_dir 를 주면 cat08_cache 를 거친다 (같은 내용의 파일은 변환 생략).
+    """
+    options = {"use_index": use_index, "fmt": fmt, "compression": compression}
+    if cache_dir:
+        options.update(cache_dir=cache_dir, max_bytes=cache_max_bytes)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    n = len(ast_paths)
+    if n == 0:
+        return []
+    workers = max(1, min(workers or os.cpu_count() or 1, n))
+
+    results: list[Optional[dict]] = [None] * n
+    done = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futs = {
+            pool.submit(_convert_one, p, default_json_path(p, out_dir), options): i
+            for i, p in enumerate(ast_paths)
+        }
+        for fut in as_completed(futs):
+            i = futs[fut]
+            info = fut.result()
+            results[i] = info
+            done += 1
+
+            name = os.path.basename(info["ast"])
+            if info["ok"]:
+                print(
+                    f"[{done}/{n}] ok {name} "
+                    f"segments={info['segments']} scans={info['scans']} packets={info['max_packet']} "
+                    f"{info['seconds']:.2f}s"
+                    + (f" cache={info['cache']}" if "cache" in info else "")
+                )
+            else:
+                print(f"[{done}/{n}] FAIL {name}: {info['error']} ({info['seconds']:.2f}s)")
+            sys.stdout.flush()
+
+    return [r for r in results if r is not None]
+
+
+def ast_batch_main(argv: list[str]) -> int:
+    """
+    argv: [src(dir|glob), out_dir?, workers?, --index?, --format=?, --compress=?,
+           --cache[=dir]?, --cache-max=?]
+    마지막에 전체 요약을 JSON 한 줄로 출력. 실패 파일이 있으면 1 반환.
+    """
+    argv, flags = parse_cli_flags(argv)
+    if not argv:
+        print("ast_batch_main: need <dir|glob> [out_dir] [workers]", file=sys.stderr)
+        return 2
+
+    src = argv[0]
+    out_dir = argv[1] if len(argv) >= 2 and argv[1] else None
+    workers = int(argv[2]) if len(argv) >= 3 else None
+
+    paths = list_ast_inputs(src)
+    if not paths:
+        print(f"[오류] AST 파일이 없습니다: {src}", file=sys.stderr)
+        return 1
+
+    t0 = time.perf_counter()
+    results = ast_to_json_batch(
+        paths,
+        out_dir=out_dir,
+        workers=workers,
+        use_index="index" in flags,
+        fmt=flags.get("format") or "json",
+        compression=flags.get("compress") or None,
+        cache_dir=(flags["cache"] or CAT08_CACHE_DIR) if "cache" in flags else None,
+        cache_max_bytes=parse_size(flags["cache-max"]) if flags.get("cache-max") else None,
+    )
+    failed = [r for r in results if not r["ok"]]
+
+    print(json.dumps({
+        "files": len(results),
+        "failed": len(failed),
+        "segments": sum(r.get("segments", 0) for r in results),
+        "seconds": round(time.perf_counter() - t0, 3),
+        "results": results,
+    }, ensure_ascii=False))
+    return 1 if failed else 0
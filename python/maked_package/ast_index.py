@@ -0,0 +1,251 @@
+# python/maked_package/ast_index.py
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+from .asterix_cat08 import (
+    DEFAULT_BATCH_BYTES,
+    CAT08_SEGMENT_DTYPE,
+    decode_cat08_batch,
+    decode_packet_sources,
+    iter_packet_windows,
+    open_ast_view,
+    weather_packet_mask,
+)
+
+# -------------------------------------------------------------
+#  AST 패킷 오프셋 인덱스 (sidecar)
+#
+#  <파일>.ast.idx.npy  : 패킷 1개 = 1행 (INDEX_DTYPE), np.load(mmap_mode="r") 로 바로 열림
+#  <파일>.ast.idx.json : 원본 size / mtime_ns / 버전. 다르면 인덱스 무효 → 재생성
+#
+#  json 을 마지막에 쓰므로 중간에 죽어도 반쯤 쓴 인덱스를 믿지 않는다.
+# -------------------------------------------------------------
+INDEX_VERSION = 1
+
+INDEX_DTYPE = np.dtype(
+    [
+        ("offset", np.uint64),    # 파일 내 바이트 위치
+        ("length", np.uint16),    # 패킷 길이 (헤더 포함)
+        ("category", np.uint8),
+        ("weather", np.bool_),    # CAT-08 weather 패킷(유효 벡터 ≥ 1) 여부
+        ("sac", np.int16),        # 없으면 -1
+        ("sic", np.int16),
+        ("wx_ord", np.uint32),    # 이 패킷까지의 weather 패킷 누적 수
+                                  # (weather 패킷이면 곧 자신의 pkt_idx)
+    ]
+)
+
+
+def index_paths(ast_path: str, index_dir: Optional[str] = None) -> tuple[str, str]:
+    """인덱스 파일 경로 (npy, json). index_dir 가 없으면 AST 파일 옆."""
+    ast_path = os.path.abspath(ast_path)
+    base = os.path.basename(ast_path) + ".idx"
+    d = index_dir or os.path.dirname(ast_path)
+    return os.path.join(d, base + ".npy"), os.path.join(d, base + ".json")
+
+
+def _file_signature(ast_path: str) -> dict:
+    st = os.stat(ast_path)
+    return {"size": int(st.st_size), "mtime_ns": int(st.st_mtime_ns)}
+
+
+def build_ast_index(ast_path: str, batch_bytes: int = DEFAULT_BATCH_BYTES) -> np.ndarray:
+    """
+    AST 파일을 한 번 훑어 INDEX_DTYPE 배열을 만든다 (파일에 쓰지는 않음).
+    mmap 창 단위로 처리하므로 메모리는 인덱스 크기 + 창 하나 분량.
+    """
+    parts: list[np.ndarray] = []
+    wx_total = 0
+
+    with open_ast_view(ast_path) as data:
+        for o, n, cats, start, end in iter_packet_windows(data, batch_bytes):
+            buf = np.frombuffer(data, dtype=np.uint8, count=end - start, offset=start)
+            rel = o - start
+
+            part = np.zeros(o.size, dtype=INDEX_DTYPE)
+            part["offset"] = o
+            part["length"] = n
+            part["category"] = cats
+            part["sac"], part["sic"] = decode_packet_sources(buf, rel, n)
+
+            sel = cats == 8
+            wx = np.zeros(o.size, dtype=bool)
+            wx[sel] = weather_packet_mask(buf, rel[sel], n[sel])
+            del buf
+
+            part["weather"] = wx
+            part["wx_ord"] = np.cumsum(wx) + wx_total
+            wx_total += int(wx.sum())
+            parts.append(part)
+
+    if not parts:
+        return np.empty(0, dtype=INDEX_DTYPE)
+    return np.concatenate(parts)
+
+
+def _read_meta(meta_path: str) -> Optional[dict]:
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_ast_index(
+    ast_path: str,
+    index: np.ndarray,
+    index_dir: Optional[str] = None,
+    signature: Optional[dict] = None,
+) -> str:
+    """
+    인덱스를 sidecar 로 저장 (tmp → os.replace 로 원자적). npy 경로 반환.
+
+    - signature: build 시작 **전에** 잰 _file_signature(). 녹화 중인 파일은 build 도중에도
+      커지므로, 끝난 뒤에 재면 짧은 인덱스에 새 size/mtime 이 붙어 다음 load 가 믿어 버린다.
+      없으면 지금 잰다 (파일이 안 바뀐다고 확신할 때만).
+    """
+    npy_path, meta_path = index_paths(ast_path, index_dir)
+    os.makedirs(os.path.dirname(npy_path), exist_ok=True)
+
+    meta = {
+        "version": INDEX_VERSION,
+        **(signature or _file_signature(ast_path)),
+        "packets": int(index.size),
+        "weather_packets": int(index["wx_ord"][-1]) if index.size else 0,
+        "built_at": datetime.now().isoformat(),
+    }
+
+    tmp_npy = npy_path + ".tmp"
+    with open(tmp_npy, "wb") as f:
+        np.save(f, index, allow_pickle=False)
+    os.replace(tmp_npy, npy_path)
+
+    tmp_meta = meta_path + ".tmp"
+    with open(tmp_meta, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_meta, meta_path)
+    return npy_path
+
+
+def load_ast_index(
+    ast_path: str,
+    index_dir: Optional[str] = None,
+    rebuild: bool = False,
+) -> np.ndarray:
+    """
+    sidecar 인덱스를 mmap 으로 열어 반환. 없거나 원본 size/mtime 이 바뀌었으면 새로 만든다.
+
+    - 저장 위치에 쓸 수 없으면 (읽기 전용 디렉토리 등) 메모리 인덱스만 반환.
+    """
+    npy_path, meta_path = index_paths(ast_path, index_dir)
+
+    if not rebuild:
+        meta = _read_meta(meta_path)
+        if (
+            meta is not None
+            and meta.get("version") == INDEX_VERSION
+            and {k: meta.get(k) for k in ("size", "mtime_ns")} == _file_signature(ast_path)
+            and os.path.isfile(npy_path)
+        ):
+            try:
+                index = np.load(npy_path, mmap_mode="r", allow_pickle=False)
+                if index.dtype == INDEX_DTYPE and index.shape[0] == meta.get("packets"):
+                    return index
+            except (OSError, ValueError):
+                pass
+
+    sig = _file_signature(ast_path)      # build 전에 잼 → 도중에 커졌으면 다음 load 에서 무효
+    index = build_ast_index(ast_path)
+    try:
+        save_ast_index(ast_path, index, index_dir, signature=sig)
+    except OSError:
+        pass
+    return index
+
+
+# -------------------------------------------------------------
+#  인덱스 기반 랜덤 액세스
+# -------------------------------------------------------------
+def read_packet(ast_path: str, packet_no: int, index: Optional[np.ndarray] = None) -> bytes:
+    """파일 내 packet_no 번째(0부터, 모든 카테고리) 패킷 바이트를 O(1) 로 읽는다."""
+    if index is None:
+        index = load_ast_index(ast_path)
+    row = index[int(packet_no)]
+    with open(ast_path, "rb") as f:
+        f.seek(int(row["offset"]))
+        return f.read(int(row["length"]))
+
+
+def weather_packet_rows(index: np.ndarray, first_pkt: int, last_pkt: int) -> slice:
+    """
+    pkt_idx(weather 패킷 순번, 1부터) 구간 [first_pkt, last_pkt] 을 덮는 인덱스 행 slice.
+    wx_ord 가 단조 증가이므로 이진 탐색 두 번.
+    """
+    wx = index["wx_ord"]
+    i0 = int(np.searchsorted(wx, first_pkt, side="left"))
+    i1 = int(np.searchsorted(wx, last_pkt, side="right"))
+    return slice(i0, i1)
+
+
+def read_cat08_segments(
+    ast_path: str,
+    first_pkt: int,
+    last_pkt: Optional[int] = None,
+    index: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    weather 패킷 first_pkt..last_pkt (pkt_idx 기준, 양끝 포함) 의 세그먼트만 디코드.
+
+    파일 전체를 훑지 않고 인덱스로 해당 바이트 구간만 mmap 에서 읽는다.
+    반환 배열의 pkt_idx 는 파일 전체 기준 번호 그대로.
+    """
+    if index is None:
+        index = load_ast_index(ast_path)
+    if last_pkt is None:
+        last_pkt = first_pkt
+
+    rows = index[weather_packet_rows(index, first_pkt, last_pkt)]
+    rows = rows[rows["weather"]]
+    if rows.size == 0:
+        return np.empty(0, dtype=CAT08_SEGMENT_DTYPE)
+
+    offs = rows["offset"].astype(np.int64)
+    lens = rows["length"].astype(np.int64)
+    start = int(offs[0])
+    end = int(offs[-1] + lens[-1])
+
+    with open_ast_view(ast_path) as data:
+        buf = np.frombuffer(data, dtype=np.uint8, count=end - start, offset=start)
+        segs = decode_cat08_batch(buf, offs - start, lens, first_pkt_idx=int(rows["wx_ord"][0]))
+        del buf
+    return segs
+
+
+def ast_index_main(argv: list[str]) -> int:
+    """
+    argv: [ast_path, --rebuild?]
+    인덱스를 만들거나(필요할 때만) 불러와서 요약을 JSON 한 줄로 출력.
+    """
+    if not argv:
+        print("ast_index_main: need ast_path")
+        return 2
+
+    ast_path = argv[0]
+    rebuild = "--rebuild" in argv[1:]
+    index = load_ast_index(ast_path, rebuild=rebuild)
+
+    npy_path, _ = index_paths(ast_path)
+    print(json.dumps({
+        "ast": ast_path,
+        "index": npy_path if os.path.isfile(npy_path) else None,
+        "packets": int(index.size),
+        "cat08_packets": int(np.count_nonzero(index["category"] == 8)),
+        "weather_packets": int(index["wx_ord"][-1]) if index.size else 0,
+    }, ensure_ascii=False))
+    return 0
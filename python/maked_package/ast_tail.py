@@ -0,0 +1,218 @@
+# python/maked_package/ast_tail.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Optional, TextIO
+
+from .asterix_cat08 import (
+    DEFAULT_BATCH_BYTES,
+    decode_cat08_window,
+    iter_packet_windows,
+    open_ast_view,
+)
+from .ast_to_json import segments_to_rows
+from .cat08_time import TimeIndexBuilder
+from .cli_flags import parse_cli_flags
+
+# -------------------------------------------------------------
+#  녹화 중인 AST 파일 따라 읽기 (tail -f)
+#
+#  - 체크포인트(<파일>.ast.tail.json)에 "마지막으로 디코드한 완전한 패킷의 끝" 바이트 위치와
+#    다음 pkt_idx / 누적 세그먼트 수를 저장한다.
+#  - 폴링마다 그 위치부터 새로 붙은 완전한 패킷만 디코드 → 비용은 새 데이터 양에 비례.
+#    파일 끝에 반쯤 쓰인 패킷은 다음 폴링까지 남겨 둔다.
+#  - 결과는 JSON Lines 로 한 줄씩 (stdout 또는 .jsonl 파일에 append):
+#      {"offset": 끝 바이트, "segments": [[pkt_idx, intensity, angle_deg, start_nm, end_nm], ...],
+#       "times": [[tod_s, pkt_idx, seg_offset, message_type], ...]}
+#    times 의 tod_s 는 ast_to_json 과 같게 자정 이후 86400 을 더해 펼친 값.
+#    (TimeIndexBuilder 의 day/prev 를 체크포인트 "clock" 에 저장해 폴링 사이에도 이어 감)
+#  - 파일 교체 감지: 체크포인트에 (st_dev, st_ino) 와 파일 앞부분(HEAD_BYTES) sha1 을 같이 저장.
+#    재개할 때 크기가 줄었거나, 다른 파일(inode)이거나, 앞부분이 달라졌으면 처음부터.
+#    (로테이션으로 같은 이름에 새 파일이 생겨 이전 offset 보다 커진 경우도 잡힌다)
+#    이때 출력에 {"reset": true, "reason": ..., "offset": 0} 줄을 먼저 쓴다
+#    → 소비자는 그 뒤의 pkt_idx / seg_offset / 시각이 1·0 부터 다시 시작함을 안다.
+#  - 출력을 먼저 쓰고 체크포인트를 나중에 쓰므로, 그 사이에 죽으면 마지막 줄이
+#    한 번 더 나올 수 있다 (at-least-once).
+# -------------------------------------------------------------
+CHECKPOINT_VERSION = 1
+HEAD_BYTES = 4096
+
+
+def checkpoint_path_for(ast_path: str) -> str:
+    return os.path.abspath(ast_path) + ".tail.json"
+
+
+def _new_state() -> dict:
+    return {"version": CHECKPOINT_VERSION, "offset": 0, "next_pkt": 1, "seg_total": 0}
+
+
+def load_checkpoint(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") == CHECKPOINT_VERSION:
+            return state
+    except (OSError, ValueError):
+        pass
+    return _new_state()
+
+
+def file_identity(ast_path: str, head_len: Optional[int] = None) -> dict:
+    """{"dev", "ino", "head_len", "head_sha1"}. head_len 을 주면 앞부분을 그 길이만큼만 해시."""
+    st = os.stat(ast_path)
+    n = min(int(st.st_size), HEAD_BYTES if head_len is None else int(head_len))
+    with open(ast_path, "rb") as f:
+        head = f.read(n)
+    return {
+        "dev": int(st.st_dev),
+        "ino": int(st.st_ino),
+        "head_len": len(head),
+        "head_sha1": hashlib.sha1(head).hexdigest(),
+    }
+
+
+def _replaced_reason(ast_path: str, state: dict, size: int) -> Optional[str]:
+    """체크포인트가 가리키던 파일이 아니면 이유 문자열, 같으면 None."""
+    if size < int(state.get("offset", 0)):
+        return f"파일 크기가 줄었습니다 ({size} < {state['offset']})"
+    ident = state.get("ident")
+    if not ident:
+        return None     # 식별 정보가 없는 예전 체크포인트 → 크기만 보고 이어 감
+    now = file_identity(ast_path, ident.get("head_len"))
+    if (now["dev"], now["ino"]) != (ident.get("dev"), ident.get("ino")):
+        return "다른 파일입니다 (inode 변경)"
+    if now["head_len"] != ident.get("head_len") or now["head_sha1"] != ident.get("head_sha1"):
+        return "파일 앞부분이 바뀌었습니다"
+    return None
+
+
+def save_checkpoint(path: str, state: dict) -> None:
+    state = {**state, "updated_at": datetime.now().isoformat()}
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def tail_once(
+    ast_path: str,
+    state: dict,
+    out: TextIO,
+    batch_bytes: int = DEFAULT_BATCH_BYTES,
+) -> tuple[dict, int]:
+    """
+    state["offset"] 이후 새로 붙은 완전한 패킷을 디코드해 out 에 JSON Lines 로 쓴다.
+    반환: (갱신된 state, 이번에 쓴 세그먼트 수)
+    """
+    size = os.path.getsize(ast_path)
+    reason = _replaced_reason(ast_path, state, size)
+    if reason:
+        # 파일이 잘렸거나 교체됨 → 처음부터 다시
+        print(f"[tail] {reason} → 처음부터", file=sys.stderr)
+        state = _new_state()
+        out.write(json.dumps({"reset": True, "reason": reason, "offset": 0}, ensure_ascii=False) + "\n")
+        out.flush()
+
+    offset = int(state["offset"])
+    next_pkt = int(state["next_pkt"])
+    seg_total = int(state["seg_total"])
+    written = 0
+    clock = TimeIndexBuilder(state.get("clock"))
+
+    if size - offset < 3:
+        return state, 0
+
+    with open_ast_view(ast_path) as data:
+        for o, n, cats, start, end in iter_packet_windows(data, batch_bytes, start=offset):
+            segs, ctrl = decode_cat08_window(
+                data, o, n, cats, start, end, next_pkt, seg_total, controls=True
+            )
+
+            clock.feed(ctrl)
+            times = clock.take_rows()
+            if segs.size or times:
+                out.write(json.dumps({
+                    "offset": end,
+                    "segments": segments_to_rows(segs),
+                    "times": times,
+                }, ensure_ascii=False) + "\n")
+
+            if segs.size:
+                next_pkt = int(segs["pkt_idx"][-1]) + 1
+                seg_total += int(segs.size)
+                written += int(segs.size)
+            offset = end
+
+    out.flush()
+    # 앞부분 해시는 HEAD_BYTES 가 찰 때까지 매번 다시 (작은 파일이 자라는 동안)
+    ident = state.get("ident")
+    if not ident or int(ident.get("head_len", 0)) < HEAD_BYTES:
+        ident = file_identity(ast_path)
+    state = {**state, "offset": offset, "next_pkt": next_pkt, "seg_total": seg_total, "size": size,
+             "ident": ident, "clock": clock.clock_state()}
+    return state, written
+
+
+def follow(
+    ast_path: str,
+    out: TextIO,
+    interval_s: float = 1.0,
+    checkpoint: Optional[str] = None,
+    once: bool = False,
+) -> int:
+    """
+    interval_s 마다 tail_once() 를 반복. 체크포인트는 새 데이터가 있을 때마다 저장.
+    Ctrl+C 로 종료. once=True 면 한 번만 처리하고 끝낸다.
+    """
+    checkpoint = checkpoint or checkpoint_path_for(ast_path)
+    state = load_checkpoint(checkpoint)
+
+    try:
+        while True:
+            if os.path.isfile(ast_path):
+                prev_offset = state.get("offset")
+                state, n = tail_once(ast_path, state, out)
+                if state.get("offset") != prev_offset or n:
+                    save_checkpoint(checkpoint, state)
+                    print(
+                        f"[tail] offset={state['offset']} segments+={n} next_pkt={state['next_pkt']}",
+                        file=sys.stderr,
+                    )
+            if once:
+                return 0
+            time.sleep(interval_s)
+    except KeyboardInterrupt:
+        return 0
+
+
+def ast_tail_main(argv: list[str]) -> int:
+    """
+    argv: [ast_path, out?(.jsonl | -), interval_s?, --once?, --reset?]
+      - out 이 없거나 "-" 면 stdout
+      - --reset: 체크포인트를 지우고 처음부터
+    """
+    argv, flags = parse_cli_flags(argv)
+    once = "once" in flags
+    reset = "reset" in flags
+    if not argv:
+        print("ast_tail_main: need ast_path [out.jsonl|-] [interval_s]", file=sys.stderr)
+        return 2
+
+    ast_path = argv[0]
+    out_path = argv[1] if len(argv) >= 2 else "-"
+    interval_s = float(argv[2]) if len(argv) >= 3 else 1.0
+
+    checkpoint = checkpoint_path_for(ast_path)
+    if reset and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    if out_path == "-":
+        return follow(ast_path, sys.stdout, interval_s, checkpoint, once)
+
+    with open(out_path, "a", encoding="utf-8") as out:
+        return follow(ast_path, out, interval_s, checkpoint, once)
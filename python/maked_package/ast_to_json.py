@@ -4,14 +4,22 @@ from __future__ import annotations
 import os
 import sys
 import json
+import time
 from datetime import datetime
 
+import numpy as np
+
 from .config import (
     SACSIC_TO_CENTER_DMS,
     DEFAULT_CENTER_LAT_DMS,
     DEFAULT_CENTER_LON_DMS,
 )
-from .asterix_cat08 import parse_asterix_file_cat08  # CAT-08 전용 파서
+from .asterix_cat08 import iter_cat08_batches, iter_cat08_windows  # CAT-08 전용 파서 (mmap 배치)
+from .ast_index import load_ast_index
+from .cat08_bin import write_cat08_bin
+from .cat08_scans import ScanTableBuilder, scan_table_from_segments, scan_table_to_rows
+from .cat08_time import TimeIndexBuilder, time_index_to_rows
+from .cli_flags import parse_cli_flags  # noqa: F401  (예전 import 경로 from .ast_to_json 유지)
 
 
 
@@ -37,102 +45,351 @@ def dms_to_decimal(dms_str: str) -> float:
     return dec
 
 
-def parse_cat08_from_ast(ast_path: str):
+def segments_to_rows(segments) -> list[list[float]]:
+    """
+    CAT08_SEGMENT_DTYPE 배열 → JSON 용 [pkt_idx, intensity, angle_deg, start_nm, end_nm] 리스트.
+    (tolist() 로 파이썬 int/float 로 바꿔서 기존 JSON 출력과 값이 동일)
+    """
+    return [
+        list(row)
+        for row in zip(
+            segments["pkt_idx"].tolist(),
+            segments["intensity"].tolist(),
+            segments["angle_deg"].tolist(),
+            segments["start_nm"].tolist(),
+            segments["end_nm"].tolist(),
+        )
+    ]
+
+
+def first_sacsic(segments) -> tuple[int | None, int | None]:
+    """세그먼트 배열 첫 행의 SAC/SIC (-1 → None)."""
+    sac = int(segments["sac"][0])
+    sic = int(segments["sic"][0])
+    return (sac if sac >= 0 else None), (sic if sic >= 0 else None)
+
+
+def radar_center_for(sac, sic) -> tuple[float, float]:
+    """SAC/SIC → 레이더 중심 (lat, lon). 매핑에 없으면 기본값(제주)."""
+    lat_dms, lon_dms = SACSIC_TO_CENTER_DMS.get(
+        (sac, sic),
+        (DEFAULT_CENTER_LAT_DMS, DEFAULT_CENTER_LON_DMS),
+    )
+    return dms_to_decimal(lat_dms), dms_to_decimal(lon_dms)
+
+
+def parse_cat08_from_ast(ast_path: str, use_index: bool = False):
     """
     AST 파일에서 CAT-08 Polar Vector를 읽어
     "각도 + 시작거리(NM) + 끝거리(NM)" 정보만 JSON용으로 뽑아낸다.
 
-    asterix_cat08.parse_asterix_file_cat08() 이 반환하는 패킷 구조(설명용):
-
-      {
-        "category": 8,
-        "length": ...,
-        "sac": ...,
-        "sic": ...,
-        "intensity": 0~15,
-        "vectors": [
-          {
-            "angle_deg": float,
-            "start_nm": float,
-            "end_nm": float,
-            # (옵션) "range16_nm": float,
-          },
-          ...
-        ],
-      }
+    asterix_cat08.iter_cat08_batches() 가 mmap 창 단위로 내보내는 구조화 배열
+    (CAT08_SEGMENT_DTYPE: pkt_idx, sac, sic, intensity, angle_deg, start_nm, end_nm)
+    을 그대로 사용하므로 패킷/벡터 dict 도, 파일 전체 버퍼도 만들지 않는다.
 
     여기서 만든 세그먼트 포맷(위·경도 없이):
 
       [pkt_idx, intensity, angle_deg, start_nm, end_nm]
+
+    use_index=True 면 ast_index sidecar 를 사용(없으면 생성)해서 헤더 스캔을 생략한다.
     """
+    index = load_ast_index(ast_path) if use_index else None
 
-    packets = parse_asterix_file_cat08(
-        ast_path,
-        max_packets=None,  # 전부 사용
-    )
-    if not packets:
+    segments: list[list[float]] = []
+    max_range_nm = 0.0
+    max_pkt = 0
+    sac = sic = None
+    found = False
+
+    # mmap 창 단위 배치를 바로 행으로 바꿔 쌓는다 (패킷 리스트를 들고 있지 않음)
+    for segs in iter_cat08_batches(ast_path, index=index):
+        if not found:
+            # -------------------------------
+            # 1) 첫 weather 패킷의 SAC/SIC
+            # -------------------------------
+            sac, sic = first_sacsic(segs)
+            found = True
+
+        # -------------------------------
+        # 2) 세그먼트 배열 (필터/swap 은 디코더에서 이미 적용됨)
+        # -------------------------------
+        segments.extend(segments_to_rows(segs))
+        max_range_nm = max(max_range_nm, float(segs["end_nm"].max()))
+        max_pkt = int(segs["pkt_idx"][-1])  # weather 패킷 개수
+
+    if not found:
         raise RuntimeError("AST 파일에서 CAT-08 패킷을 찾지 못했습니다.")
 
-    # -------------------------------
-    # 1) 레이더 중심 좌표(SAC/SIC → DMS → decimal)
-    # -------------------------------
-    sac = packets[0].get("sac")
-    sic = packets[0].get("sic")
+    # 레이더 중심 좌표(SAC/SIC → DMS → decimal)
+    radar_lat, radar_lon = radar_center_for(sac, sic)
+    parsed_at = datetime.now().isoformat()
 
-    lat_dms, lon_dms = SACSIC_TO_CENTER_DMS.get(
-        (sac, sic),
-        (DEFAULT_CENTER_LAT_DMS, DEFAULT_CENTER_LON_DMS),
+    return radar_lat, radar_lon, segments, max_pkt, max_range_nm, parsed_at, sac, sic
+
+
+def default_json_path(ast_path: str, out_dir: str | None = None) -> str:
+    """<파일명>_cat08.json 경로. out_dir 가 없으면 AST 파일과 같은 폴더."""
+    ast_path = os.path.abspath(ast_path)
+    base_name = os.path.splitext(os.path.basename(ast_path))[0]
+    return os.path.join(out_dir or os.path.dirname(ast_path), base_name + "_cat08.json")
+
+
+def write_json_atomic(path: str, data: dict, indent: int | None = 2) -> None:
+    """같은 폴더의 임시 파일에 쓴 뒤 os.replace → 읽는 쪽이 반쯤 쓴 JSON 을 보지 않음."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+# -------------------------------------------------------------
+#  스트리밍 JSON 쓰기
+#
+#  세그먼트 전체 리스트를 만들지 않고 배치가 디코드되는 대로 바로 파일에 쓴다.
+#  출력은 json.dump(..., indent=2) 와 같은 모양이며,
+#  끝나야 알 수 있는 max_packet / max_range_nm 은 고정 폭 자리를 먼저 써 두고
+#  마지막에 seek 해서 덮어쓴다 (남는 자리는 공백 → 유효한 JSON).
+# -------------------------------------------------------------
+_PATCH_WIDTH = 24
+_ROW_CHUNK = 65536
+
+
+def _patch_slot(key: str) -> str:
+    return f'  "{key}": ' + " " * _PATCH_WIDTH + "\n"
+
+
+# json.dump(indent=2) 에서 segments 안의 한 행이 찍히는 모양 그대로
+# (float 는 json 과 같은 repr 사용)
+_ROW_FMT = "    [\n      %d,\n      %d,\n      %r,\n      %r,\n      %r\n    ]"
+
+
+def _rows_to_json_chunk(segs) -> str:
+    return ",\n".join(
+        _ROW_FMT % row
+        for row in zip(
+            segs["pkt_idx"].tolist(),
+            segs["intensity"].tolist(),
+            segs["angle_deg"].tolist(),
+            segs["start_nm"].tolist(),
+            segs["end_nm"].tolist(),
+        )
     )
-    radar_lat = dms_to_decimal(lat_dms)
-    radar_lon = dms_to_decimal(lon_dms)
 
-    # -------------------------------
-    # 2) Polar vector → 세그먼트 배열로 축적
-    # -------------------------------
-    segments: list[list[float]] = []
+
+def stream_cat08_json(
+    json_path: str,
+    batches,
+    parsed_at: str | None = None,
+    tail_fields=None,
+    controls: list | None = None,
+) -> dict:
+    """
+    CAT08_SEGMENT_DTYPE 배치 iterable → <파일명>_cat08.json 스트리밍 저장.
+
+    메모리는 배치 하나(최대 _ROW_CHUNK 행)의 행 리스트 + 인코더 버퍼만 쓴다.
+    tmp 파일에 쓰고 os.replace 하므로 실패해도 기존 출력은 그대로.
+    segments 뒤에 scan 테이블("scans", cat08_scans 참고)을 붙인다.
+    tail_fields: 배치를 다 읽은 뒤 호출되는 함수. 돌려준 dict 를 맨 끝 필드로 쓴다
+    (예: 같은 패스에서 모은 시간 인덱스 "times").
+    controls: 제어 패킷 리스트 (scan 경계 = SOP). 배치를 다 읽은 뒤에 보므로
+    batches 가 읽으면서 채워 넣는 리스트를 줘도 된다.
+    반환: JSON 헤더 필드 + "count" (세그먼트 수) + "scans" (SCAN_DTYPE 배열).
+    """
+    tmp = f"{json_path}.{os.getpid()}.tmp"
+    meta: dict | None = None
+    scans = ScanTableBuilder()
+    count = 0
+    max_pkt = 0
     max_range_nm = 0.0
 
-    for pkt_index, pkt in enumerate(packets, start=1):
-        intensity = int(pkt.get("intensity", 0))
-        vectors = pkt.get("vectors") or []
-        if not vectors:
-            continue
-
-        for v in vectors:
-            ang = float(v.get("angle_deg", 0.0))
-
-            # 새 파서: start_nm / end_nm 를 직접 제공
-            if "start_nm" in v and "end_nm" in v:
-                s_nm = float(v["start_nm"])
-                e_nm = float(v["end_nm"])
-            else:
-                # 혹시 구버전 파서 사용 시 fallback: range_nm 하나만 있는 경우
-                r_nm = float(v.get("range_nm", 0.0))
-                if r_nm <= 0:
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            slots: dict[str, int] = {}
+
+            for segs in batches:
+                if segs.size == 0:
                     continue
-                s_nm = 0.0
-                e_nm = r_nm
 
-            # 이상값 필터링 (안전망 한 번 더)
-            if e_nm <= 0:
-                continue
-            if e_nm <= s_nm:
-                continue
+                if meta is None:
+                    # 첫 배치에서 SAC/SIC → 헤더 작성
+                    sac, sic = first_sacsic(segs)
+                    lat, lon = radar_center_for(sac, sic)
+                    meta = {
+                        "sac": sac,
+                        "sic": sic,
+                        "radar_center": [lat, lon],
+                        "parsed_at": parsed_at or datetime.now().isoformat(),
+                    }
+
+                    head = json.dumps(
+                        {"sac": sac, "sic": sic, "radar_center": [lat, lon]},
+                        ensure_ascii=False,
+                        indent=2,
+                    )
+                    f.write(head[:-2] + ",\n")
+                    for key in ("max_packet", "max_range_nm"):
+                        slots[key] = f.tell()
+                        f.write(_patch_slot(key))
+                    f.write(f'  "parsed_at": {json.dumps(meta["parsed_at"])},\n')
+                    f.write('  "segments": [\n')
+
+                for i in range(0, segs.size, _ROW_CHUNK):
+                    chunk = segs[i: i + _ROW_CHUNK]
+                    if count:
+                        f.write(",\n")
+                    f.write(_rows_to_json_chunk(chunk))
+                    count += chunk.size
+
+                scans.feed(segs)
+                max_pkt = int(segs["pkt_idx"][-1])
+                max_range_nm = max(max_range_nm, float(segs["end_nm"].max()))
+
+            if meta is None:
+                raise RuntimeError("AST 파일에서 CAT-08 패킷을 찾지 못했습니다.")
+
+            scans.feed_controls(controls or [])
+            scan_table = scans.finish()
+            scan_text = json.dumps(scan_table_to_rows(scan_table), indent=2).replace("\n", "\n  ")
+            f.write(f'\n  ],\n  "scans": {scan_text}')
+            for key, value in (tail_fields() if tail_fields else {}).items():
+                text = json.dumps(value, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+                f.write(f',\n  {json.dumps(key)}: {text}')
+            f.write("\n}")
+
+            # 자리 잡아둔 필드 채우기
+            for key, value in (("max_packet", max_pkt), ("max_range_nm", max_range_nm)):
+                text = f'  "{key}": {json.dumps(value)},'
+                f.seek(slots[key])
+                f.write(text.ljust(len(_patch_slot(key)) - 1))
+
+        os.replace(tmp, json_path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    meta["max_packet"] = max_pkt
+    meta["max_range_nm"] = max_range_nm
+    meta["count"] = count
+    meta["scans"] = scan_table
+    return meta
+
+
+OUTPUT_FORMATS = ("json", "bin", "both")
+
+
+def resolve_output_paths(
+    ast_path: str,
+    json_path: str | None,
+    fmt: str,
+) -> tuple[str, str | None, str | None]:
+    """fmt 에 따른 (ast, json, bin) 절대 경로. 만들지 않는 쪽은 None."""
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"지원하지 않는 출력 형식: {fmt}")
 
-            segments.append(
-                [int(pkt_index), intensity, ang, s_nm, e_nm]
-            )
+    ast_path = os.path.abspath(ast_path)
+    if json_path is None:
+        json_path = default_json_path(ast_path)
+    else:
+        json_path = os.path.abspath(json_path)
 
-            if e_nm > max_range_nm:
-                max_range_nm = e_nm
+    bin_path = None
+    if fmt == "bin":
+        bin_path = json_path if json_path.lower().endswith(".bin") else os.path.splitext(json_path)[0] + ".bin"
+        json_path = None
+    elif fmt == "both":
+        bin_path = os.path.splitext(json_path)[0] + ".bin"
+    return ast_path, json_path, bin_path
+
+
+def convert_ast_file(
+    ast_path: str,
+    json_path: str | None = None,
+    use_index: bool = False,
+    fmt: str = "json",
+    compression: str | None = None,
+) -> dict:
+    """
+    ast_to_json() 본체. 변환 후 요약 정보를 dict 로 돌려준다.
 
-    max_pkt = len(packets)  # weather 패킷 개수
-    parsed_at = datetime.now().isoformat()
+      {"ast", "json", "bin", "segments", "scans", "times", "max_packet", "max_range_nm", "seconds"}
 
-    return radar_lat, radar_lon, segments, max_pkt, max_range_nm, parsed_at, sac, sic
+    fmt:
+      - "json": 기존 <파일명>_cat08.json (배치 단위 스트리밍 쓰기, 메모리 일정)
+      - "bin" : cat08_bin 컬럼 바이너리 <파일명>_cat08.bin (compression: none|zlib|gzip)
+      - "both": 둘 다 (json_path 를 주면 .bin 은 같은 이름에 확장자만 바꿈)
+    """
+    t0 = time.perf_counter()
+    ast_path, json_path, bin_path = resolve_output_paths(ast_path, json_path, fmt)
+
+    index = load_ast_index(ast_path) if use_index else None
+    times = TimeIndexBuilder()
+    controls: list = []
+
+    def _batches():
+        # 같은 패스에서 제어 패킷(SOP/EOP, Time of Day) → 시간 인덱스 / scan 경계
+        for segs, ctrl in iter_cat08_windows(ast_path, index=index, controls=True):
+            times.feed(ctrl)
+            controls.extend(ctrl)
+            yield segs
+
+    def _times_field() -> dict:
+        return {"times": time_index_to_rows(times.finish())}
+
+    if fmt == "json":
+        meta = stream_cat08_json(json_path, _batches(), tail_fields=_times_field, controls=controls)
+        count = meta.pop("count")
+        scan_count = len(meta.pop("scans"))
+    else:
+        arrays = [segs for segs in _batches() if segs.size]
+        if not arrays:
+            raise RuntimeError("AST 파일에서 CAT-08 패킷을 찾지 못했습니다.")
+        segments = np.concatenate(arrays)
+        del arrays
+
+        sac, sic = first_sacsic(segments)
+        lat, lon = radar_center_for(sac, sic)
+        meta = {
+            "sac": sac,
+            "sic": sic,
+            "radar_center": [lat, lon],
+            "max_packet": int(segments["pkt_idx"][-1]),
+            "max_range_nm": float(segments["end_nm"].max()),
+            "parsed_at": datetime.now().isoformat(),
+        }
+        count = len(segments)
+        scan_table = scan_table_from_segments(segments, controls=controls)
+        scan_count = len(scan_table)
+
+        write_cat08_bin(
+            bin_path,
+            segments,
+            {**meta, "scans": scan_table_to_rows(scan_table), **_times_field()},
+            compression,
+        )
+        if json_path is not None:
+            stream_cat08_json(json_path, [segments], parsed_at=meta["parsed_at"], tail_fields=_times_field,
+                              controls=controls)
+
+    return {
+        "ast": ast_path,
+        "json": json_path,
+        "bin": bin_path,
+        "segments": count,
+        "scans": scan_count,
+        "times": int(times.finish().size),
+        "max_packet": meta["max_packet"],
+        "max_range_nm": meta["max_range_nm"],
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
 
 
-def ast_to_json(ast_path: str, json_path: str | None = None) -> str:
+def ast_to_json(ast_path: str, json_path: str | None = None, use_index: bool = False) -> str:
     """
     단일 AST 파일에서 CAT-08 weather vector를 읽어
     <파일명>_cat08.json 형식으로 저장.
@@ -149,45 +406,18 @@ def ast_to_json(ast_path: str, json_path: str | None = None) -> str:
         "segments": [
           [pkt_idx, intensity, angle_deg, start_nm, end_nm],
           ...
+        ],
+        "scans": [                          # 안테나 회전(SOP) 단위 구간 (cat08_scans)
+          [seg_start, seg_end, pkt_start, pkt_end],
+          ...
+        ],
+        "times": [                          # Time of Day 제어 패킷 → 위치 (cat08_time)
+          [tod_s, pkt_idx, seg_offset, message_type],
+          ...
         ]
       }
     """
-
-    ast_path = os.path.abspath(ast_path)
-    base_name = os.path.splitext(os.path.basename(ast_path))[0]
-
-    if json_path is None:
-        json_path = os.path.join(
-            os.path.dirname(ast_path), base_name + "_cat08.json"
-        )
-    else:
-        json_path = os.path.abspath(json_path)
-
-    (
-        lat,
-        lon,
-        segments,
-        max_pkt,
-        max_range_nm,
-        parsed_at,
-        sac,
-        sic,
-    ) = parse_cat08_from_ast(ast_path)
-
-    data = {
-        "sac": sac,
-        "sic": sic,
-        "radar_center": [lat, lon],
-        "max_packet": max_pkt,
-        "max_range_nm": max_range_nm,
-        "parsed_at": parsed_at,
-        "segments": segments,
-    }
-
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-    return json_path
+    return convert_ast_file(ast_path, json_path, use_index=use_index)["json"]
 
 
 def main(argv=None):
@@ -199,9 +429,21 @@ def main(argv=None):
             "사용법:\n"
             "  python ast_to_json.py input.ast\n"
             "  python ast_to_json.py input.ast output.json\n"
+            "\n"
+            "옵션:\n"
+            "  --index                    AST 옆에 패킷 인덱스(.idx.npy)를 만들어/재사용\n"
+            "  --format=json|bin|both     출력 형식 (기본 json, bin = 컬럼 바이너리)\n"
+            "  --compress=none|zlib|gzip  bin payload 압축\n"
+            "  --cache[=dir]              내용 해시 기반 결과 캐시 사용 (cat08_cache)\n"
+            "  --cache-max=2G             캐시 최대 크기 (LRU 정리)\n"
         )
         return 0
 
+    argv, flags = parse_cli_flags(argv)
+    if not argv:
+        print("[오류] AST 파일 경로가 필요합니다.")
+        return 1
+
     ast_path = argv[0]
     if not os.path.isfile(ast_path):
         print(f"[오류] AST 파일을 찾을 수 없습니다: {ast_path}")
@@ -210,8 +452,28 @@ def main(argv=None):
     json_path = argv[1] if len(argv) >= 2 else None
 
     try:
-        out = ast_to_json(ast_path, json_path)
-        print(f"[완료] JSON 저장: {out}")
+        options = {
+            "use_index": "index" in flags,
+            "fmt": flags.get("format") or "json",
+            "compression": flags.get("compress") or None,
+        }
+        if "cache" in flags:
+            from .cat08_cache import cached_convert_ast_file, parse_size
+
+            info = cached_convert_ast_file(
+                ast_path,
+                json_path,
+                cache_dir=flags["cache"] or None,
+                max_bytes=parse_size(flags["cache-max"]) if flags.get("cache-max") else None,
+                **options,
+            )
+            print(f"[캐시] {info['cache']} {info['key'][:12]}")
+        else:
+            info = convert_ast_file(ast_path, json_path, **options)
+        if info["json"]:
+            print(f"[완료] JSON 저장: {info['json']}")
+        if info["bin"]:
+            print(f"[완료] BIN 저장: {info['bin']}")
         return 0
     except Exception as e:
         print(f"[오류] 변환 실패: {e}")
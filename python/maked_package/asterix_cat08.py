@@ -2,8 +2,13 @@
 
 from __future__ import annotations
 
+import mmap
+import os
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+import numpy as np
 
 
 def _now_utc_iso() -> str:
@@ -241,9 +246,252 @@ def parse_cat08_packet(pkt: bytes) -> Optional[Dict[str, Any]]:
     }
 
 
+# -------------------------------------------------------------
+#  CAT-08 제어 패킷 (SOP/EOP, 시간 등)
+#
+#  parse_cat08_packet() 이 버리는 FSPEC 2바이트 이상 패킷을 표준 UAP 대로 읽는다.
+#    FRN1  I008/010 SAC/SIC               2
+#    FRN2  I008/000 Message Type          1   (254 = SOP, 255 = EOP)
+#    FRN3  I008/020 Vector Qualifier      1+  (FX 확장)
+#    FRN4  I008/036 Cartesian Vectors     1 + 3n
+#    FRN5  I008/034 Polar Vectors         1 + 4n
+#    FRN6  I008/040 Contour Identifier    2
+#    FRN7  I008/050 Contour Points        1 + 2n
+#    FRN8  I008/090 Time of Day           3   (LSB 1/128 s)
+#    FRN9  I008/100 Processing Status     3+  (FX 확장)
+#    FRN10 I008/110 Station Config        1+  (FX 확장)
+#    FRN11 I008/120 Total Items           2
+#    FRN12 I008/038 Weather Vectors       1 + 4n
+#    FRN13 SP                             1 + len
+# -------------------------------------------------------------
+MSG_TYPE_SOP = 254
+MSG_TYPE_EOP = 255
+TOD_LSB_S = 1.0 / 128.0
+
+
+def _read_fspec_frns(pkt, offset: int, length: int) -> Tuple[List[int], int]:
+    """FSPEC 을 읽어 (켜진 FRN 번호 리스트, FSPEC 다음 offset) 반환. 끝을 넘으면 ([], -1)."""
+    frns: List[int] = []
+    octet = 0
+    while True:
+        if offset >= length:
+            return [], -1
+        b = pkt[offset]
+        offset += 1
+        for k in range(7):
+            if b & (0x80 >> k):
+                frns.append(octet * 7 + k + 1)
+        octet += 1
+        if (b & 0x01) == 0:
+            return frns, offset
+
+
+def parse_cat08_control_packet(pkt: bytes) -> Optional[Dict[str, Any]]:
+    """
+    CAT-08 패킷에서 SAC/SIC, Message Type, Time of Day(I008/090), Total Items(I008/120)
+    를 꺼낸다. 벡터 내용은 건너뛴다 (벡터는 parse_cat08_packet / decode_cat08_batch 담당).
+
+    - 카테고리/길이가 맞지 않거나 항목이 패킷 끝을 넘으면 None.
+    - SP 뒤의 RFS 등 해석할 수 없는 항목을 만나면 그때까지 읽은 값만 반환.
+    """
+    if len(pkt) < 4 or pkt[0] != 8:
+        return None
+
+    length = (pkt[1] << 8) | pkt[2]
+    if length != len(pkt):
+        return None
+
+    frns, offset = _read_fspec_frns(pkt, 3, length)
+    if offset < 0:
+        return None
+
+    out: Dict[str, Any] = {
+        "sac": None,
+        "sic": None,
+        "message_type": None,
+        "tod_s": None,
+        "total_items": None,
+    }
+
+    def _need(n: int) -> bool:
+        return offset + n <= length
+
+    for frn in frns:
+        if frn == 1:
+            if not _need(2):
+                return None
+            out["sac"], out["sic"] = pkt[offset], pkt[offset + 1]
+            offset += 2
+        elif frn == 2:
+            if not _need(1):
+                return None
+            out["message_type"] = pkt[offset]
+            offset += 1
+        elif frn in (3, 10):
+            # 1옥텟 + FX 확장
+            while True:
+                if not _need(1):
+                    return None
+                b = pkt[offset]
+                offset += 1
+                if (b & 0x01) == 0:
+                    break
+        elif frn in (4, 5, 7, 12):
+            if not _need(1):
+                return None
+            size = {4: 3, 5: 4, 7: 2, 12: 4}[frn]
+            offset += 1 + pkt[offset] * size
+            if offset > length:
+                return None
+        elif frn == 6:
+            offset += 2
+        elif frn == 8:
+            if not _need(3):
+                return None
+            raw = (pkt[offset] << 16) | (pkt[offset + 1] << 8) | pkt[offset + 2]
+            out["tod_s"] = raw * TOD_LSB_S
+            offset += 3
+        elif frn == 9:
+            # 3옥텟 + (마지막 옥텟 FX 면) 1옥텟씩 확장
+            if not _need(3):
+                return None
+            offset += 3
+            while pkt[offset - 1] & 0x01:
+                if not _need(1):
+                    return None
+                offset += 1
+        elif frn == 11:
+            if not _need(2):
+                return None
+            out["total_items"] = (pkt[offset] << 8) | pkt[offset + 1]
+            offset += 2
+        elif frn == 13:
+            if not _need(1):
+                return None
+            offset += max(1, pkt[offset])
+        else:
+            break
+
+        if offset > length:
+            return None
+
+    return out
+
+
+# -------------------------------------------------------------
+#  mmap 기반 스트리밍 리더
+#
+#  파일을 통째로 read() 하지 않고 mmap + memoryview 로 열어서
+#  패킷 슬라이스를 복사 없이 넘겨준다. 메모리 사용량은 파일 크기와 무관.
+# -------------------------------------------------------------
+@contextmanager
+def open_ast_view(file_path: str) -> Iterator[memoryview]:
+    """
+    AST 파일을 읽기 전용 mmap 으로 열고 memoryview 를 돌려준다.
+
+    - 빈 파일은 mmap 이 불가하므로 빈 memoryview.
+    - with 블록이 끝날 때 mmap 을 닫는다. 호출 쪽이 슬라이스/배열 뷰를
+      아직 잡고 있으면 닫기를 건너뛰고 GC 에 맡긴다.
+    """
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield memoryview(b"")
+            return
+
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mv = memoryview(mm)
+        try:
+            yield mv
+        finally:
+            try:
+                mv.release()
+                mm.close()
+            except BufferError:
+                pass
+
+
+def _scan_window(
+    data,
+    start: int,
+    max_bytes: Optional[int] = None,
+) -> Tuple[List[int], List[int], List[int], int]:
+    """
+    data[start:] 에서 패킷 헤더만 읽어 (offsets, lengths, cats, next_offset) 반환.
+
+    - length < 3 이거나 파일 끝을 넘는 패킷을 만나면 거기서 멈춘다
+      (next_offset 이 그 위치를 가리키므로 호출 쪽은 진행이 멈춘 것으로 판단).
+    - max_bytes 가 주어지면 누적 길이가 그 이상이 되는 패킷까지만 읽는다.
+    """
+    total_len = len(data)
+    offsets: List[int] = []
+    lengths: List[int] = []
+    cats: List[int] = []
+
+    offset = start
+    stop = total_len if max_bytes is None else min(total_len, start + max_bytes)
+    while offset + 3 <= total_len and offset < stop:
+        length = (data[offset + 1] << 8) | data[offset + 2]
+
+        # length가 이상하면 더 이상 진행 불가 → 중단
+        if length < 3 or offset + length > total_len:
+            break
+
+        offsets.append(offset)
+        lengths.append(length)
+        cats.append(data[offset])
+        offset += length
+
+    return offsets, lengths, cats, offset
+
+
+def iter_ast_packets(
+    file_path: str,
+    category: Optional[int] = None,
+) -> Iterator[Tuple[int, int, memoryview]]:
+    """
+    AST 파일의 패킷을 (offset, category, pkt_view) 로 하나씩 내보내는 제너레이터.
+
+    - pkt_view 는 mmap 위의 memoryview 슬라이스(복사 없음).
+      제너레이터가 끝나면 mmap 이 닫히므로 오래 보관하려면 bytes(pkt_view) 로 복사.
+    - category 를 주면 해당 카테고리 패킷만 내보낸다.
+    """
+    with open_ast_view(file_path) as data:
+        total_len = len(data)
+        offset = 0
+        while offset + 3 <= total_len:
+            cat = data[offset]
+            length = (data[offset + 1] << 8) | data[offset + 2]
+
+            if length < 3 or offset + length > total_len:
+                break
+
+            if category is None or cat == category:
+                yield offset, cat, data[offset: offset + length]
+
+            offset += length
+
+
 # -------------------------------------------------------------
 #  파일 전체에서 CAT-08 weather 패킷만 추출
 # -------------------------------------------------------------
+def iter_asterix_file_cat08(
+    file_path: str,
+    max_packets: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    parse_asterix_file_cat08() 의 제너레이터 버전.
+    weather 패킷 dict 를 하나씩 내보내며 전체 리스트를 들고 있지 않는다.
+    """
+    count = 0
+    for _offset, _cat, pkt in iter_ast_packets(file_path, category=8):
+        parsed = parse_cat08_packet(pkt)
+        if parsed:
+            yield parsed
+            count += 1
+            if max_packets is not None and count >= max_packets:
+                break
+
+
 def parse_asterix_file_cat08(
     file_path: str,
     max_packets: Optional[int] = None,
@@ -254,32 +502,363 @@ def parse_asterix_file_cat08(
     - parse_cat08_packet() 이 None 을 반환하는 CAT-08 패킷은
       상태/관리/시간 또는 유효 벡터가 없는 것으로 보고 제외.
     - 결과 리스트에는 "실제 weather 벡터가 존재하는 패킷"만 들어 있다.
+    - 큰 파일은 iter_asterix_file_cat08() / iter_cat08_batches() 를 권장.
     """
-    with open(file_path, "rb") as f:
-        data = f.read()
+    return list(iter_asterix_file_cat08(file_path, max_packets=max_packets))
 
-    offset = 0
-    out: List[Dict[str, Any]] = []
-    count = 0
-    total_len = len(data)
 
-    while offset + 3 <= total_len:
-        cat = data[offset]
-        length = int.from_bytes(data[offset + 1: offset + 3], "big")
+# -------------------------------------------------------------
+#  컬럼(NumPy) 배치 디코더
+#
+#  parse_cat08_packet() 과 동일한 규칙을 파일 전체에 대해 벡터 연산으로 적용.
+#  벡터마다 dict 를 만들지 않고 구조화 배열 한 개로 돌려준다.
+# -------------------------------------------------------------
+CAT08_SEGMENT_DTYPE = np.dtype(
+    [
+        ("pkt_idx", np.uint32),     # weather 패킷 순번 (1부터)
+        ("sac", np.int16),          # 없으면 -1
+        ("sic", np.int16),          # 없으면 -1
+        ("intensity", np.uint8),
+        ("angle_deg", np.float32),  # raw * 360/65536 → float32 로 손실 없음
+        ("start_nm", np.float32),   # 0.5 NM 단위 → float32 로 손실 없음
+        ("end_nm", np.float32),
+    ]
+)
+
+# 디코드 결과(세그먼트 값/순서, scans/times 규칙)가 바뀌면 올린다.
+# cat08_cache 키에 들어가므로 올리면 이전 캐시 항목은 자동으로 무효.
+PARSER_VERSION = 2     # 2: scan 경계를 방위 wrap → SOP 제어 패킷으로
+
+
+def decode_cat08_batch(
+    buf: np.ndarray,
+    offsets: np.ndarray,
+    lengths: np.ndarray,
+    first_pkt_idx: int = 1,
+) -> np.ndarray:
+    """
+    여러 CAT-08 패킷을 한 번에 디코드해 CAT08_SEGMENT_DTYPE 배열로 반환.
 
-        # length가 이상하면 더 이상 진행 불가 → 중단
-        if length < 3 or offset + length > total_len:
-            break
+    - buf: 파일(또는 블록) 전체의 uint8 배열. offsets/lengths 는 buf 기준.
+    - offsets/lengths: 카테고리 8 패킷들의 위치 (파일 순서).
+    - first_pkt_idx: 첫 weather 패킷에 붙일 pkt_idx (배치를 이어 붙일 때 사용).
 
-        if cat == 8:
-            pkt = data[offset: offset + length]
-            parsed = parse_cat08_packet(pkt)
-            if parsed:
-                out.append(parsed)
-                count += 1
-                if max_packets is not None and count >= max_packets:
-                    break
+    FSPEC/항목 존재 여부, swap, 노이즈 필터는 parse_cat08_packet() 과 같다.
+    유효 벡터가 하나라도 남은 패킷만 weather 패킷으로 보고 순번을 매긴다.
+    """
+    return _decode_cat08(buf, offsets, lengths, first_pkt_idx)[0]
 
-        offset += length
 
-    return out
+def weather_packet_mask(
+    buf: np.ndarray,
+    offsets: np.ndarray,
+    lengths: np.ndarray,
+) -> np.ndarray:
+    """
+    offsets/lengths 의 각 패킷이 weather 패킷(유효 벡터 1개 이상)인지 bool 배열로 반환.
+    (parse_cat08_packet() 이 None 이 아닌 패킷과 동일)
+    """
+    return _decode_cat08(buf, offsets, lengths, 1)[1]
+
+
+def decode_packet_sources(
+    buf: np.ndarray,
+    offsets: np.ndarray,
+    lengths: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    카테고리와 무관하게 각 패킷의 SAC/SIC (I0xx/010, FRN1) 를 읽는다.
+
+    - FSPEC 이 여러 옥텟이어도(FX 체인) 길이를 따라가서 그 뒤 2바이트를 읽는다.
+    - FRN1 이 없거나 패킷이 짧으면 -1.
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    sac = np.full(offsets.size, -1, dtype=np.int16)
+    sic = np.full(offsets.size, -1, dtype=np.int16)
+    if offsets.size == 0:
+        return sac, sic
+
+    nbuf = buf.shape[0]
+    ends = offsets + lengths
+    first = buf[np.minimum(offsets + 3, nbuf - 1)]
+
+    # FX 체인을 옥텟 단위로 따라가며 FSPEC 길이 계산 (보통 1~2회 반복)
+    fspec_len = np.ones(offsets.size, dtype=np.int64)
+    more = (lengths >= 4) & ((first & 0x01) != 0)
+    while np.any(more):
+        nxt = offsets + 3 + fspec_len
+        more &= nxt < ends
+        b = buf[np.minimum(nxt, nbuf - 1)]
+        fspec_len += more
+        more &= (b & 0x01) != 0
+
+    pos = offsets + 3 + fspec_len
+    has = (lengths >= 4) & ((first & 0x80) != 0) & (pos + 2 <= ends)
+    sac[has] = buf[pos[has]]
+    sic[has] = buf[pos[has] + 1]
+    return sac, sic
+
+
+def _decode_cat08(
+    buf: np.ndarray,
+    offsets: np.ndarray,
+    lengths: np.ndarray,
+    first_pkt_idx: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """decode_cat08_batch() 본체. (segments, 패킷별 weather 여부) 반환."""
+    offsets = np.asarray(offsets, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    is_weather = np.zeros(offsets.size, dtype=bool)
+    if offsets.size == 0:
+        return np.empty(0, dtype=CAT08_SEGMENT_DTYPE), is_weather
+
+    nbuf = buf.shape[0]
+    ends = offsets + lengths
+
+    def _at(pos: np.ndarray) -> np.ndarray:
+        # 범위 밖 인덱스는 0 으로 읽고, 유효성은 호출 쪽 마스크로 거른다.
+        return buf[np.minimum(pos, nbuf - 1)].astype(np.int64)
+
+    # ----------------------------
+    #  FSPEC 1바이트 패킷만 (FX = 0)
+    # ----------------------------
+    ok = (buf[offsets] == 8) & (lengths >= 4)
+    fspec = np.where(ok, _at(offsets + 3), 0)
+    ok &= (fspec & 0x01) == 0
+
+    pos = offsets + 4
+
+    # I008/010 SAC/SIC (FRN1)
+    has_ss = (fspec & 0x80) != 0
+    ok &= ~has_ss | (pos + 2 <= ends)
+    sac = np.where(has_ss, _at(pos), -1)
+    sic = np.where(has_ss, _at(pos + 1), -1)
+    pos = pos + np.where(has_ss, 2, 0)
+
+    # I008/000 Message Type (FRN2)
+    has_mt = (fspec & 0x40) != 0
+    ok &= ~has_mt | (pos + 1 <= ends)
+    msg_type = _at(pos)
+    pos = pos + np.where(has_mt, 1, 0)
+
+    # I008/020 Vector Qualifier (FRN3)
+    has_q = (fspec & 0x20) != 0
+    ok &= ~has_q | (pos + 1 <= ends)
+    qualifier = _at(pos)
+    pos = pos + np.where(has_q, 1, 0)
+
+    # 우선순위: qualifier → msg_type → 0
+    intensity = np.where(
+        has_q, (qualifier >> 4) & 0x0F, np.where(has_mt, (msg_type >> 4) & 0x0F, 0)
+    )
+
+    # ----------------------------
+    #  Polar Vector 블록: [count][4 × count]
+    # ----------------------------
+    remaining = ends - pos
+    count = np.where(remaining >= 1, _at(pos), 0)
+    ok &= (count >= 1) & (count <= (remaining - 1) // 4)
+    count = np.where(ok, count, 0)
+
+    total = int(count.sum())
+    if total == 0:
+        return np.empty(0, dtype=CAT08_SEGMENT_DTYPE), is_weather
+
+    pkt_of_vec = np.repeat(np.arange(offsets.size), count)
+    first_vec = np.cumsum(count) - count
+    k = np.arange(total, dtype=np.int64) - first_vec[pkt_of_vec]
+    vpos = (pos + 1)[pkt_of_vec] + 4 * k
+
+    r_hi = buf[vpos]
+    r_lo = buf[vpos + 1]
+    raw_ang = (buf[vpos + 2].astype(np.uint32) << 8) | buf[vpos + 3]
+
+    # swap 후 end <= 0 또는 end <= start 는 버림 → hi == lo 만 제외하면 동일
+    keep = r_hi != r_lo
+    pkt_of_vec = pkt_of_vec[keep]
+    lo_idx = np.minimum(r_hi, r_lo)[keep]
+    hi_idx = np.maximum(r_hi, r_lo)[keep]
+    raw_ang = raw_ang[keep]
+
+    # 유효 벡터가 남은 패킷만 weather 패킷 → 파일 순서대로 번호 부여
+    is_weather[pkt_of_vec] = True
+    ordinal = np.cumsum(is_weather, dtype=np.int64) - 1 + int(first_pkt_idx)
+
+    out = np.empty(pkt_of_vec.size, dtype=CAT08_SEGMENT_DTYPE)
+    out["pkt_idx"] = ordinal[pkt_of_vec]
+    out["sac"] = sac[pkt_of_vec]
+    out["sic"] = sic[pkt_of_vec]
+    out["intensity"] = intensity[pkt_of_vec]
+    out["angle_deg"] = raw_ang.astype(np.float32) * np.float32(360.0 / 65536.0)
+    out["start_nm"] = lo_idx.astype(np.float32) * np.float32(RANGE_CELL_LSB_NM)
+    out["end_nm"] = hi_idx.astype(np.float32) * np.float32(RANGE_CELL_LSB_NM)
+    return out, is_weather
+
+
+def limit_weather_packets(segments: np.ndarray, max_packets: Optional[int]) -> np.ndarray:
+    """pkt_idx 가 max_packets 이하인 세그먼트만 남긴다 (None 이면 그대로)."""
+    if max_packets is None or segments.size == 0:
+        return segments
+    n = int(np.searchsorted(segments["pkt_idx"], max_packets, side="right"))
+    return segments[:n]
+
+
+DEFAULT_BATCH_BYTES = 4 * 1024 * 1024
+
+
+def iter_packet_windows(
+    data,
+    batch_bytes: int,
+    index: Optional[np.ndarray] = None,
+    start: int = 0,
+) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray, int, int]]:
+    """
+    파일을 batch_bytes 단위 창으로 나눠 (offsets, lengths, cats, start, end) 를 내보낸다.
+    index(ast_index.INDEX_DTYPE 배열)가 있으면 헤더를 다시 훑지 않고 그걸 쪼갠다.
+    start: 스캔 시작 바이트 위치 (패킷 경계여야 함, index 를 쓸 때는 무시).
+    마지막 창의 end 는 "완전한 마지막 패킷의 끝" 이다 (뒤에 잘린 패킷이 있으면 거기서 멈춤).
+    """
+    if index is not None:
+        offs = index["offset"].astype(np.int64)
+        lens = index["length"].astype(np.int64)
+        i = 0
+        while i < offs.size:
+            j = int(np.searchsorted(offs, offs[i] + batch_bytes, side="left"))
+            j = max(j, i + 1)
+            start = int(offs[i])
+            end = int(offs[j - 1] + lens[j - 1])
+            yield offs[i:j], lens[i:j], index["category"][i:j], start, end
+            i = j
+        return
+
+    offset = start
+    while True:
+        offsets, lengths, cats, end = _scan_window(data, offset, batch_bytes)
+        if not offsets:
+            return
+        yield (
+            np.asarray(offsets, dtype=np.int64),
+            np.asarray(lengths, dtype=np.int64),
+            np.asarray(cats, dtype=np.uint8),
+            offset,
+            end,
+        )
+        offset = end
+
+
+def decode_cat08_window(
+    data,
+    offsets: np.ndarray,
+    lengths: np.ndarray,
+    cats: np.ndarray,
+    start: int,
+    end: int,
+    next_pkt: int = 1,
+    seg_total: int = 0,
+    controls: bool = False,
+) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+    """
+    iter_packet_windows() 가 내보낸 창 하나를 디코드해 (segments, control_packets) 반환.
+
+    - next_pkt : 이 창의 첫 weather 패킷에 붙일 pkt_idx
+    - seg_total: 이 창 이전까지의 세그먼트 수 (제어 패킷 seg_offset 계산용)
+
+    controls=True 면 weather 가 아닌 CAT-08 패킷 중 Time of Day 가 있거나 SOP/EOP 인 것을
+    parse_cat08_control_packet() 으로 읽어 각 dict 에 다음 위치 정보를 붙인다:
+      - "offset"    : 파일 내 바이트 위치
+      - "pkt_idx"   : 이 패킷 다음에 오는 첫 weather 패킷 번호
+      - "seg_offset": 이 패킷 이전까지의 세그먼트 수 (= 다음 세그먼트의 전역 오프셋)
+    """
+    sel = cats == 8
+    o8 = offsets[sel] - start
+    n8 = lengths[sel]
+
+    buf = np.frombuffer(data, dtype=np.uint8, count=end - start, offset=start)
+    segs, is_weather = _decode_cat08(buf, o8, n8, next_pkt)
+    del buf
+
+    ctrl: List[Dict[str, Any]] = []
+    if controls:
+        # 패킷별 세그먼트 수 → 창 안에서 각 패킷 앞까지의 누적 개수
+        per_wx = np.bincount(
+            (segs["pkt_idx"] - next_pkt).astype(np.int64),
+            minlength=int(is_weather.sum()),
+        )
+        per_pkt = np.zeros(o8.size, dtype=np.int64)
+        per_pkt[is_weather] = per_wx
+        seg_before = np.cumsum(per_pkt) - per_pkt
+        wx_before = np.cumsum(is_weather) - is_weather
+
+        for j in np.flatnonzero(~is_weather):
+            pkt = data[start + int(o8[j]): start + int(o8[j] + n8[j])]
+            info = parse_cat08_control_packet(pkt)
+            del pkt
+            # 시간 정보도 SOP/EOP 도 아닌 것(유효 벡터 없는 벡터 패킷 등)은 제외
+            if info is None or (
+                info["tod_s"] is None
+                and info["message_type"] not in (MSG_TYPE_SOP, MSG_TYPE_EOP)
+            ):
+                continue
+            info["offset"] = start + int(o8[j])
+            info["pkt_idx"] = next_pkt + int(wx_before[j])
+            info["seg_offset"] = seg_total + int(seg_before[j])
+            ctrl.append(info)
+
+    return segs, ctrl
+
+
+def iter_cat08_windows(
+    file_path: str,
+    batch_bytes: int = DEFAULT_BATCH_BYTES,
+    index: Optional[np.ndarray] = None,
+    controls: bool = False,
+) -> Iterator[Tuple[np.ndarray, List[Dict[str, Any]]]]:
+    """
+    iter_cat08_batches() 의 본체. 창마다 decode_cat08_window() 결과
+    (segments, control_packets) 를 내보낸다.
+    weather 패킷도 제어 패킷도 없는 창은 건너뛴다.
+    """
+    next_pkt = 1
+    seg_total = 0
+    with open_ast_view(file_path) as data:
+        for o, n, cats, start, end in iter_packet_windows(data, batch_bytes, index):
+            segs, ctrl = decode_cat08_window(
+                data, o, n, cats, start, end, next_pkt, seg_total, controls
+            )
+
+            if segs.size:
+                next_pkt = int(segs["pkt_idx"][-1]) + 1
+                seg_total += int(segs.size)
+            if segs.size or ctrl:
+                yield segs, ctrl
+
+
+def iter_cat08_batches(
+    file_path: str,
+    max_packets: Optional[int] = None,
+    batch_bytes: int = DEFAULT_BATCH_BYTES,
+    index: Optional[np.ndarray] = None,
+) -> Iterator[np.ndarray]:
+    """
+    AST 파일을 mmap 으로 열어 batch_bytes 단위 창(window)마다
+    decode_cat08_batch() 결과(CAT08_SEGMENT_DTYPE)를 내보낸다.
+
+    - 창은 mmap 위의 np.frombuffer 뷰라 복사가 없고,
+      동시에 메모리에 있는 것은 창 하나 분량의 세그먼트뿐이다.
+    - pkt_idx 는 창을 넘어 파일 전체 기준으로 이어진다.
+    - 빈 배치(weather 패킷이 없는 창)는 내보내지 않는다.
+    - index: ast_index.load_ast_index() 결과를 주면 헤더 스캔을 생략.
+    - max_packets <= 0 이면 아무것도 내보내지 않는다.
+    """
+    if max_packets is not None and max_packets <= 0:
+        return
+    for segs, _ctrl in iter_cat08_windows(file_path, batch_bytes, index):
+        if max_packets is not None:
+            segs = limit_weather_packets(segs, max_packets)
+        if not segs.size:
+            continue
+        yield segs
+        if max_packets is not None and int(segs["pkt_idx"][-1]) >= max_packets:
+            break
+
@@ -0,0 +1,151 @@
+# python/maked_package/cat08_bin.py
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import zlib
+from typing import Optional
+
+import numpy as np
+
+from .asterix_cat08 import CAT08_SEGMENT_DTYPE
+
+# -------------------------------------------------------------
+#  CAT-08 세그먼트 바이너리 포맷 (<파일명>_cat08.bin)
+#
+#  ncgrid 출력과 같은 "JSON 헤더 1줄 + '\n' + raw 바이트" 구조.
+#
+#    {"format": "cat08seg", "version": 2, "count": N, "compression": "none",
+#     "columns": [{"name": "pkt_idx", "dtype": "<u4", "offset": 0, "nbytes": 4N}, ...],
+#     "sac": .., "sic": .., "radar_center": [lat, lon], "max_packet": ..,
+#     "max_range_nm": .., "parsed_at": ..}\n
+#    <payload>
+#
+#  - payload 는 컬럼별 연속 배열(리틀엔디안). 각 컬럼 offset 은 8바이트 정렬이고
+#    헤더 줄도 공백으로 채워 8바이트 경계에 끝나므로, 브라우저에서
+#    new Float32Array(buf, headerLen + col.offset, count) 로 바로 뷰를 만들 수 있다.
+#  - compression 이 zlib / gzip 이면 payload 전체를 압축 (헤더 줄은 평문).
+#    브라우저에서는 DecompressionStream("deflate" | "gzip") 로 풀면 된다.
+#  - sac / sic 는 행마다 컬럼으로 저장 (version 2). 한 파일에 레이더가 섞여도 손실 없음.
+#    헤더의 sac / sic / radar_center 는 첫 행 기준 (version 1 파일은 컬럼 없이 헤더값만).
+# -------------------------------------------------------------
+BIN_FORMAT = "cat08seg"
+BIN_VERSION = 2
+COMPRESSIONS = ("none", "zlib", "gzip")
+
+# 4바이트 → 2바이트 컬럼 순, uint8 은 마지막
+BIN_COLUMNS: list[tuple[str, str]] = [
+    ("pkt_idx", "<u4"),
+    ("angle_deg", "<f4"),
+    ("start_nm", "<f4"),
+    ("end_nm", "<f4"),
+    ("sac", "<i2"),
+    ("sic", "<i2"),
+    ("intensity", "u1"),
+]
+
+_ALIGN = 8
+
+
+def _pad(n: int) -> int:
+    return (-n) % _ALIGN
+
+
+def encode_cat08_bin(
+    segments: np.ndarray,
+    meta: dict,
+    compression: Optional[str] = None,
+) -> bytes:
+    """CAT08_SEGMENT_DTYPE 배열 + 메타(sac/sic/radar_center 등) → 바이너리 바이트."""
+    compression = (compression or "none").lower()
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"지원하지 않는 compression: {compression}")
+
+    count = int(segments.shape[0])
+    columns = []
+    chunks: list[bytes] = []
+    offset = 0
+    for name, dt in BIN_COLUMNS:
+        raw = np.ascontiguousarray(segments[name], dtype=dt).tobytes()
+        columns.append({"name": name, "dtype": dt, "offset": offset, "nbytes": len(raw)})
+        chunks.append(raw)
+        pad = _pad(len(raw))
+        if pad:
+            chunks.append(b"\0" * pad)
+        offset += len(raw) + pad
+
+    payload = b"".join(chunks)
+    if compression == "zlib":
+        payload = zlib.compress(payload, 6)
+    elif compression == "gzip":
+        payload = gzip.compress(payload, 6, mtime=0)
+
+    header = {
+        "format": BIN_FORMAT,
+        "version": BIN_VERSION,
+        "count": count,
+        "compression": compression,
+        "payload_bytes": len(payload),
+        "columns": columns,
+        **meta,
+    }
+    line = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    line += b" " * _pad(len(line) + 1) + b"\n"
+    return line + payload
+
+
+def decode_cat08_bin(blob: bytes) -> tuple[dict, np.ndarray]:
+    """encode_cat08_bin() 의 역. (header, CAT08_SEGMENT_DTYPE 배열) 반환."""
+    nl = blob.index(b"\n")
+    header = json.loads(blob[:nl].decode("utf-8"))
+    if header.get("format") != BIN_FORMAT:
+        raise ValueError("cat08seg 바이너리가 아닙니다.")
+
+    payload = blob[nl + 1:]
+    compression = header.get("compression", "none")
+    if compression == "zlib":
+        payload = zlib.decompress(payload)
+    elif compression == "gzip":
+        payload = gzip.decompress(payload)
+
+    count = int(header["count"])
+    out = np.empty(count, dtype=CAT08_SEGMENT_DTYPE)
+    for col in header["columns"]:
+        out[col["name"]] = np.frombuffer(
+            payload, dtype=np.dtype(col["dtype"]), count=count, offset=int(col["offset"])
+        )
+
+    # version 1 파일에는 sac / sic 컬럼이 없다 → 헤더값으로 채움
+    stored = {col["name"] for col in header["columns"]}
+    for name in ("sac", "sic"):
+        if name not in stored:
+            value = header.get(name)
+            out[name] = -1 if value is None else value
+    return header, out
+
+
+def write_cat08_bin(
+    path: str,
+    segments: np.ndarray,
+    meta: dict,
+    compression: Optional[str] = None,
+) -> str:
+    """바이너리 파일 저장 (tmp → os.replace). 저장 경로 반환."""
+    blob = encode_cat08_bin(segments, meta, compression)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return path
+
+
+def read_cat08_bin(path: str) -> tuple[dict, np.ndarray]:
+    """<파일명>_cat08.bin 을 읽어 (header, segments) 반환."""
+    with open(path, "rb") as f:
+        return decode_cat08_bin(f.read())
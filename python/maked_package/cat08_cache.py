@@ -0,0 +1,379 @@
+# python/maked_package/cat08_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+from typing import Optional
+
+from .config import (
+    CAT08_CACHE_DIR,
+    CAT08_CACHE_MAX_BYTES,
+    SACSIC_TO_CENTER_DMS,
+    DEFAULT_CENTER_LAT_DMS,
+    DEFAULT_CENTER_LON_DMS,
+)
+from .asterix_cat08 import PARSER_VERSION
+from .ast_to_json import convert_ast_file, resolve_output_paths
+from .cli_flags import parse_cli_flags
+
+# -------------------------------------------------------------
+#  CAT-08 변환 결과 캐시 (내용 주소 기반, LRU)
+#
+#  키 = sha256( AST 내용 sha256 + PARSER_VERSION + 출력 옵션(fmt, compression)
+#               + 레이더 중심 매핑 )
+#  → 같은 파일을 다시 올리거나 다른 사람이 변환해도 해시 계산만 하고
+#    저장된 결과를 출력 경로에 링크(불가하면 복사)한다.
+#
+#  디렉토리 구조:
+#    <cache_dir>/<key[:2]>/<key>/info.json   요약 (convert_ast_file 결과에서 경로 제외)
+#                               /out.json    (fmt json|both)
+#                               /out.bin     (fmt bin|both)
+#    <cache_dir>/stats.json                  hits / misses / evictions 누적
+#
+#  - 항목 사용 시각 = info.json 의 mtime (hit 때마다 갱신) → LRU 기준
+#  - 저장은 tmp 디렉토리에 만든 뒤 rename → 동시 변환에도 반쯤 쓴 항목이 안 보임
+#  - 출력 파일은 하드링크일 수 있다. 이 패키지의 writer 는 전부 tmp → os.replace
+#    라서 캐시 원본이 바뀌지 않지만, 출력 파일을 제자리 수정하면 안 된다.
+# -------------------------------------------------------------
+CACHE_VERSION = 1
+
+_HASH_CHUNK = 8 * 1024 * 1024
+_TMP_PREFIX = "tmp-"
+_TMP_MAX_AGE_S = 3600.0
+_OUTPUTS = (("json", "out.json"), ("bin", "out.bin"))
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(_HASH_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_key(content_hash: str, fmt: str, compression: Optional[str]) -> str:
+    """내용 해시 + 파서 버전 + 출력 옵션 → 캐시 키."""
+    spec = {
+        "cache": CACHE_VERSION,
+        "parser": PARSER_VERSION,
+        "content": content_hash,
+        "fmt": fmt,
+        "compression": (compression or "none").lower() if fmt != "json" else None,
+        # radar_center 가 출력에 들어가므로 매핑이 바뀌면 다른 키
+        "centers": sorted([list(k), list(v)] for k, v in SACSIC_TO_CENTER_DMS.items()),
+        "default_center": [DEFAULT_CENTER_LAT_DMS, DEFAULT_CENTER_LON_DMS],
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def parse_size(value) -> int:
+    """'2G' / '500M' / '64k' / '1048576' → 바이트."""
+    s = str(value).strip().upper().rstrip("B")
+    mult = 1
+    if s and s[-1] in "KMGT":
+        mult = 1024 ** ("KMGT".index(s[-1]) + 1)
+        s = s[:-1]
+    return int(float(s) * mult)
+
+
+def _entry_dir(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, key[:2], key)
+
+
+def _place(src: str, dst: str) -> None:
+    # 같은 파일시스템이면 하드링크, 아니면 복사. 어느 쪽이든 tmp → os.replace
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    try:
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _bump_stats(cache_dir: str, **counts: int) -> None:
+    # 동시 갱신 시 일부 카운트가 빠질 수 있음 (통계용이라 허용)
+    path = os.path.join(cache_dir, "stats.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            stats = json.load(f)
+    except (OSError, ValueError):
+        stats = {}
+    for k, v in counts.items():
+        stats[k] = int(stats.get(k, 0)) + v
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(stats, f)
+        os.replace(tmp, path)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _load_entry(entry: str, fmt: str) -> Optional[dict]:
+    """항목이 온전하면 info dict, 아니면 None."""
+    try:
+        with open(os.path.join(entry, "info.json"), "r", encoding="utf-8") as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return None
+    for kind, name in _OUTPUTS:
+        if fmt in (kind, "both") and not os.path.isfile(os.path.join(entry, name)):
+            return None
+    return info
+
+
+def _store_entry(cache_dir: str, key: str, info: dict) -> None:
+    entry = _entry_dir(cache_dir, key)
+    if os.path.isdir(entry):
+        return
+
+    tmp = os.path.join(cache_dir, f"{_TMP_PREFIX}{uuid.uuid4().hex}")
+    os.makedirs(tmp)
+    try:
+        for kind, name in _OUTPUTS:
+            if info.get(kind):
+                _place(info[kind], os.path.join(tmp, name))
+        summary = {k: v for k, v in info.items() if k not in ("ast", "json", "bin", "seconds")}
+        with open(os.path.join(tmp, "info.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False)
+
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            pass    # 다른 프로세스가 먼저 저장
+    finally:
+        if os.path.isdir(tmp):
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def cached_convert_ast_file(
+    ast_path: str,
+    json_path: Optional[str] = None,
+    use_index: bool = False,
+    fmt: str = "json",
+    compression: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+) -> dict:
+    """
+    convert_ast_file() 과 같은 인자/반환값 + "cache": "hit"|"miss", "key".
+    hit 이면 변환 없이 저장된 결과를 출력 경로에 놓는다.
+    """
+    t0 = time.perf_counter()
+    cache_dir = os.path.abspath(cache_dir or CAT08_CACHE_DIR)
+    max_bytes = CAT08_CACHE_MAX_BYTES if max_bytes is None else int(max_bytes)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    ast_abs, out_json, out_bin = resolve_output_paths(ast_path, json_path, fmt)
+    key = cache_key(file_sha256(ast_abs), fmt, compression)
+    entry = _entry_dir(cache_dir, key)
+
+    info = _load_entry(entry, fmt)
+    if info is not None:
+        if out_json:
+            _place(os.path.join(entry, "out.json"), out_json)
+        if out_bin:
+            _place(os.path.join(entry, "out.bin"), out_bin)
+        os.utime(os.path.join(entry, "info.json"))
+        _bump_stats(cache_dir, hits=1)
+        return {
+            **info,
+            "ast": ast_abs,
+            "json": out_json,
+            "bin": out_bin,
+            "seconds": round(time.perf_counter() - t0, 3),
+            "cache": "hit",
+            "key": key,
+        }
+
+    info = convert_ast_file(ast_path, json_path, use_index=use_index, fmt=fmt, compression=compression)
+    _store_entry(cache_dir, key, info)
+    evicted = prune_cache(cache_dir, max_bytes, keep=key)
+    _bump_stats(cache_dir, misses=1, evictions=evicted)
+
+    info["seconds"] = round(time.perf_counter() - t0, 3)
+    info["cache"] = "miss"
+    info["key"] = key
+    return info
+
+
+# -------------------------------------------------------------
+#  목록 / LRU 정리 / 통계
+# -------------------------------------------------------------
+def list_cache_entries(cache_dir: str) -> list[dict]:
+    """[{"key", "path", "bytes", "last_used"}, ...] (오래 안 쓴 순)."""
+    entries = []
+    if not os.path.isdir(cache_dir):
+        return entries
+    for shard in os.listdir(cache_dir):
+        shard_dir = os.path.join(cache_dir, shard)
+        if len(shard) != 2 or not os.path.isdir(shard_dir):
+            continue
+        for key in os.listdir(shard_dir):
+            path = os.path.join(shard_dir, key)
+            try:
+                last_used = os.stat(os.path.join(path, "info.json")).st_mtime
+                size = sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+            except OSError:
+                continue
+            entries.append({"key": key, "path": path, "bytes": size, "last_used": last_used})
+    entries.sort(key=lambda e: e["last_used"])
+    return entries
+
+
+def _remove_stale_tmp(cache_dir: str) -> None:
+    now = time.time()
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.startswith(_TMP_PREFIX) and os.path.isdir(path):
+            try:
+                if now - os.stat(path).st_mtime > _TMP_MAX_AGE_S:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+
+
+def prune_cache(cache_dir: str, max_bytes: int, keep: Optional[str] = None) -> int:
+    """총 크기가 max_bytes 이하가 될 때까지 오래 안 쓴 항목부터 삭제. 삭제 수 반환."""
+    if not os.path.isdir(cache_dir):
+        return 0
+    _remove_stale_tmp(cache_dir)
+
+    entries = list_cache_entries(cache_dir)
+    total = sum(e["bytes"] for e in entries)
+    evicted = 0
+    for e in entries:
+        if total <= max_bytes:
+            break
+        if e["key"] == keep:
+            continue
+        shutil.rmtree(e["path"], ignore_errors=True)
+        total -= e["bytes"]
+        evicted += 1
+    return evicted
+
+
+def _is_hex(name: str, length: int) -> bool:
+    return len(name) == length and all(c in "0123456789abcdef" for c in name)
+
+
+def _cache_dir_items(cache_dir: str) -> Optional[list[str]]:
+    """
+    캐시가 만든 최상위 항목 (shard 디렉토리, stats.json, tmp-*) 경로 목록.
+    그 밖의 파일/디렉토리가 하나라도 있으면 cat08 캐시가 아닌 것으로 보고 None.
+    """
+    items = []
+    for e in os.scandir(cache_dir):
+        if e.is_dir(follow_symlinks=False) and _is_hex(e.name, 2):
+            # shard 안은 64자리 키 디렉토리만
+            if not all(_is_hex(k.name, 64) and k.is_dir(follow_symlinks=False) for k in os.scandir(e.path)):
+                return None
+        elif e.name.startswith(_TMP_PREFIX) and e.is_dir(follow_symlinks=False):
+            pass
+        elif e.name == "stats.json" or (e.name.startswith("stats.json.") and e.name.endswith(".tmp")):
+            pass
+        else:
+            return None
+        items.append(e.path)
+    return items
+
+
+def clear_cache(cache_dir: str) -> int:
+    """
+    캐시 항목 / stats.json / tmp-* 만 지우고 디렉토리 자체는 남긴다. 삭제한 항목 수 반환.
+    캐시가 만들지 않은 항목이 있으면 (잘못 준 --cache-dir 등) 아무것도 지우지 않고 ValueError.
+    """
+    if not os.path.isdir(cache_dir):
+        return 0
+    items = _cache_dir_items(cache_dir)
+    if items is None:
+        raise ValueError(f"cat08 캐시 디렉토리가 아닙니다 (캐시가 만들지 않은 항목이 있음): {cache_dir}")
+
+    removed = len(list_cache_entries(cache_dir))
+    for path in items:
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return removed
+
+
+def cache_stats(cache_dir: Optional[str] = None, max_bytes: Optional[int] = None) -> dict:
+    cache_dir = os.path.abspath(cache_dir or CAT08_CACHE_DIR)
+    entries = list_cache_entries(cache_dir)
+    try:
+        with open(os.path.join(cache_dir, "stats.json"), "r", encoding="utf-8") as f:
+            counters = json.load(f)
+    except (OSError, ValueError):
+        counters = {}
+
+    hits = int(counters.get("hits", 0))
+    misses = int(counters.get("misses", 0))
+    return {
+        "dir": cache_dir,
+        "entries": len(entries),
+        "bytes": sum(e["bytes"] for e in entries),
+        "max_bytes": CAT08_CACHE_MAX_BYTES if max_bytes is None else int(max_bytes),
+        "hits": hits,
+        "misses": misses,
+        "evictions": int(counters.get("evictions", 0)),
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+        "parser_version": PARSER_VERSION,
+    }
+
+
+def cat08_cache_main(argv: list[str]) -> int:
+    """
+    argv: [stats|prune|clear, --cache-dir=?, --max-bytes=?(예: 2G)]
+      stats : 항목 수 / 크기 / hit·miss 누적 출력
+      prune : max-bytes 까지 LRU 정리
+      clear : 캐시 항목 전체 삭제 (캐시가 아닌 파일이 섞인 디렉토리면 거부)
+    """
+    args, flags = parse_cli_flags(argv)
+    action = args[0] if args else "stats"
+    cache_dir = os.path.abspath(flags.get("cache-dir") or CAT08_CACHE_DIR)
+    max_bytes = parse_size(flags["max-bytes"]) if flags.get("max-bytes") else None
+
+    if action == "stats":
+        print(json.dumps(cache_stats(cache_dir, max_bytes), ensure_ascii=False))
+        return 0
+
+    if action == "prune":
+        limit = CAT08_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        evicted = prune_cache(cache_dir, limit)
+        if evicted:
+            _bump_stats(cache_dir, evictions=evicted)
+        print(json.dumps({"evicted": evicted, **cache_stats(cache_dir, limit)}, ensure_ascii=False))
+        return 0
+
+    if action == "clear":
+        try:
+            removed = clear_cache(cache_dir)
+        except ValueError as e:
+            print(f"[오류] {e}", file=sys.stderr)
+            return 1
+        print(json.dumps({"removed": removed, "dir": cache_dir}, ensure_ascii=False))
+        return 0
+
+    print(f"cat08_cache_main: unknown action: {action} (stats | prune | clear)", file=sys.stderr)
+    return 2
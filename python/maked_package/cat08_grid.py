@@ -0,0 +1,407 @@
+# python/maked_package/cat08_grid.py
+from __future__ import annotations
+
+import json
+import math
+import os
+import sys
+from typing import Optional
+
+import numpy as np
+
+from .config import NM_TO_M, SACSIC_TO_CENTER_DMS
+from .asterix_cat08 import CAT08_SEGMENT_DTYPE
+from .ast_to_json import dms_to_decimal
+from .cli_flags import parse_cli_flags
+from .cat08_bin import read_cat08_bin
+from .cat08_scans import (SCAN_DTYPE, rows_to_scan_table, scan_table_from_segments, scan_table_to_rows,
+                          sop_controls_from_times)
+
+# -------------------------------------------------------------
+#  CAT-08 세그먼트 → 이진 비교 그리드 (서버측 래스터화)
+#
+#  src/utils/analysis/radarGrid.js::buildRadarBinaryGrid 와 같은 결과를
+#  NumPy 로 scan / 패킷 묶음 / 하루 전체 단위로 한 번에 만든다.
+#
+#    1) ci >= ci_threshold, start/end(NM→km) 정렬, maxRange / 60NM 으로 자르기
+#    2) step_km = max(0.5, (maxRange / 127.5) * 0.8) 간격으로 range 샘플링
+#    3) ref 중심 기준 정규화 좌표 (레이더-ref 오프셋 포함) → 256×256 raster,
+#       [-1, 1] 밖은 버림 (클램프 없음), Math.round 와 같은 반올림
+#    4) 3×3 브러시 → gridSize×gridSize 로 max 다운샘플
+#
+#  출력 (<파일명>_grid.bin): JSON 헤더 1줄 + '\n' + packbits payload
+#    - 그리드 1장 = gridSize*gridSize 비트 (행 우선, MSB first) → bytes_per_grid 바이트
+#    - 헤더 "groups": 그리드마다 [seg_start, seg_end, pkt_start, pkt_end]
+# -------------------------------------------------------------
+GRID_FORMAT = "cat08grid"
+GRID_VERSION = 1
+
+NM_TO_KM = NM_TO_M / 1000.0
+DETECT_RANGE_NM = 60.0
+DETECT_RANGE_KM = DETECT_RANGE_NM * NM_TO_KM
+KM_PER_DEG_LAT = 111.32
+
+RASTER_SIZE = 256
+
+# 샘플 전개 시 한 번에 다루는 세그먼트 수 / 동시에 래스터화하는 그룹 수
+_SEG_CHUNK = 1 << 17
+_GROUP_BLOCK = 64
+
+_ALIGN = 8
+
+
+def ref_offset_norm(
+    radar_lat: float,
+    radar_lon: float,
+    ref_lat: Optional[float],
+    ref_lon: Optional[float],
+    max_range_km: float,
+) -> tuple[float, float]:
+    """
+    ref 중심 대비 레이더 위치 (동, 북) 를 max_range_km 로 정규화한 값.
+    ref 가 없으면 (0, 0) — 레이더 중심 기준 그리드.
+    """
+    if ref_lat is None or ref_lon is None:
+        return 0.0, 0.0
+    north_km = (radar_lat - ref_lat) * KM_PER_DEG_LAT
+    east_km = (radar_lon - ref_lon) * KM_PER_DEG_LAT * math.cos(math.radians(ref_lat))
+    return east_km / max_range_km, north_km / max_range_km
+
+
+def _downsample_starts(raster_size: int, grid_size: int) -> np.ndarray:
+    # raster 행/열 → 그리드 행/열 매핑이 바뀌는 위치 (reduceat 용)
+    g = np.minimum(grid_size - 1, np.floor(np.arange(raster_size) / raster_size * grid_size))
+    return np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+
+
+def _stamp_samples(
+    hit: np.ndarray,
+    segs: np.ndarray,
+    group: np.ndarray,
+    max_range_km: float,
+    ci_threshold: float,
+    offset: tuple[float, float],
+) -> None:
+    """segs(그룹 번호 group) 의 range 샘플 위치를 hit[(group, ry, rx)] 에 표시."""
+    raster = hit.shape[1]
+    center = (raster - 1) / 2.0
+
+    ang = segs["angle_deg"].astype(np.float64)
+    rs = segs["start_nm"].astype(np.float64) * NM_TO_KM
+    re = segs["end_nm"].astype(np.float64) * NM_TO_KM
+    rs, re = np.minimum(rs, re), np.maximum(rs, re)
+
+    keep = (segs["intensity"] >= ci_threshold) & np.isfinite(ang) & np.isfinite(rs) & np.isfinite(re)
+    keep &= rs < max_range_km
+    re = np.minimum(re, max_range_km)
+    keep &= re > rs
+    keep &= rs <= DETECT_RANGE_KM
+    re = np.minimum(re, DETECT_RANGE_KM)
+    if not keep.any():
+        return
+
+    ang, rs, re, group = ang[keep], rs[keep], re[keep], group[keep]
+
+    step = max(0.5, (max_range_km / center) * 0.8)
+    counts = np.floor((re - rs) / step + 1e-9).astype(np.int64) + 1
+
+    # 세그먼트별 샘플 전개: r = rs + k*step (k = 0..counts-1)
+    owner = np.repeat(np.arange(counts.size), counts)
+    k = np.arange(owner.size) - np.repeat(np.cumsum(counts) - counts, counts)
+    norm = (rs[owner] + k * step) / max_range_km
+
+    rad = np.deg2rad(ang)[owner]
+    nx = norm * np.sin(rad) + offset[0]
+    ny = norm * np.cos(rad) + offset[1]
+    inside = (nx >= -1) & (nx <= 1) & (ny >= -1) & (ny <= 1)
+
+    # JS Math.round(x) == floor(x + 0.5)
+    rx = np.floor(center + nx[inside] * center + 0.5).astype(np.int64)
+    ry = np.floor(center - ny[inside] * center + 0.5).astype(np.int64)
+    g = group[owner[inside]]
+    hit.reshape(-1)[(g * raster + ry) * raster + rx] = True
+
+
+def _dilate3(hit: np.ndarray) -> np.ndarray:
+    """3×3 브러시 (raster 밖은 버림)."""
+    pad = np.pad(hit, ((0, 0), (1, 1), (1, 1)))
+    r = hit.shape[1]
+    out = np.zeros_like(hit)
+    for dy in range(3):
+        for dx in range(3):
+            out |= pad[:, dy: dy + r, dx: dx + r]
+    return out
+
+
+def rasterize_groups(
+    segments: np.ndarray,
+    groups: np.ndarray,
+    max_range_km: float = 350.0,
+    grid_size: int = 32,
+    ci_threshold: float = 0,
+    offset: tuple[float, float] = (0.0, 0.0),
+    raster_size: int = RASTER_SIZE,
+) -> np.ndarray:
+    """
+    segments(CAT08_SEGMENT_DTYPE) 를 groups(SCAN_DTYPE: segments[seg_start:seg_end]) 단위로
+    래스터화 → (len(groups), grid_size, grid_size) bool 스택.
+    기본값은 buildRadarBinaryGrid 의 기본값과 같다.
+    """
+    grid_size = int(grid_size)
+    max_range_km = float(max_range_km)
+    if not 0 < grid_size <= raster_size:
+        raise ValueError(f"grid_size 는 1..{raster_size} 범위여야 합니다: {grid_size}")
+    if max_range_km <= 0:
+        raise ValueError(f"max_range_km 는 양수여야 합니다: {max_range_km}")
+
+    n = int(groups.size)
+    out = np.zeros((n, grid_size, grid_size), dtype=bool)
+    starts = _downsample_starts(raster_size, grid_size)
+
+    for b0 in range(0, n, _GROUP_BLOCK):
+        block = groups[b0: b0 + _GROUP_BLOCK]
+        hit = np.zeros((block.size, raster_size, raster_size), dtype=bool)
+
+        # 블록 안 그룹들의 세그먼트 위치 / 그룹 번호를 한 줄로 펼친다
+        s0 = block["seg_start"].astype(np.int64)
+        lens = np.maximum(block["seg_end"].astype(np.int64) - s0, 0)
+        gid = np.repeat(np.arange(block.size), lens)
+        pos = np.arange(gid.size) - np.repeat(np.cumsum(lens) - lens, lens) + s0[gid]
+        for c0 in range(0, gid.size, _SEG_CHUNK):
+            sl = slice(c0, c0 + _SEG_CHUNK)
+            _stamp_samples(hit, segments[pos[sl]], gid[sl], max_range_km, ci_threshold, offset)
+
+        hit = _dilate3(hit)
+        hit = np.maximum.reduceat(hit, starts, axis=1)
+        out[b0: b0 + block.size] = np.maximum.reduceat(hit, starts, axis=2)
+
+    return out
+
+
+def packet_window_groups(segments: np.ndarray, n_packets: int) -> np.ndarray:
+    """pkt_idx 1..N, N+1..2N, ... 묶음 → SCAN_DTYPE 테이블 (세그먼트 없는 묶음은 생략)."""
+    n_packets = max(1, int(n_packets))
+    if segments.size == 0:
+        return np.empty(0, dtype=SCAN_DTYPE)
+    pkt = segments["pkt_idx"]
+    block = (pkt.astype(np.int64) - 1) // n_packets
+    first = np.flatnonzero(np.r_[True, block[1:] != block[:-1]])
+
+    table = np.empty(first.size, dtype=SCAN_DTYPE)
+    table["seg_start"] = first
+    table["seg_end"] = np.r_[first[1:], segments.size]
+    table["pkt_start"] = block[first] * n_packets + 1
+    table["pkt_end"] = (block[first] + 1) * n_packets
+    return table
+
+
+def whole_groups(segments: np.ndarray) -> np.ndarray:
+    """전체를 그룹 1개로."""
+    table = np.zeros(1, dtype=SCAN_DTYPE)
+    table["seg_end"] = segments.size
+    if segments.size:
+        table["pkt_start"] = segments["pkt_idx"][0]
+        table["pkt_end"] = segments["pkt_idx"][-1]
+    return table
+
+
+# -------------------------------------------------------------
+#  입력 (<파일명>_cat08.json / .bin) 로드
+# -------------------------------------------------------------
+def load_cat08_output(path: str) -> tuple[dict, np.ndarray, np.ndarray]:
+    """cat08 출력 파일 → (메타, CAT08_SEGMENT_DTYPE 배열, scan 테이블)."""
+    if path.lower().endswith(".bin"):
+        meta, segs = read_cat08_bin(path)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        rows = meta.pop("segments", None) or []
+        segs = np.zeros(len(rows), dtype=CAT08_SEGMENT_DTYPE)
+        if rows:
+            cols = list(zip(*rows))
+            for i, name in enumerate(("pkt_idx", "intensity", "angle_deg", "start_nm", "end_nm")):
+                segs[name] = cols[i]
+        segs["sac"] = -1 if meta.get("sac") is None else meta["sac"]
+        segs["sic"] = -1 if meta.get("sic") is None else meta["sic"]
+
+    scans = meta.get("scans")
+    if scans:
+        table = rows_to_scan_table(scans)
+    else:
+        table = scan_table_from_segments(segs, controls=sop_controls_from_times(meta.get("times")))
+    return meta, segs, table
+
+
+def parse_ref_center(value: str) -> tuple[float, float]:
+    """'lat,lon' (십진수 또는 DMS 문자열) → (lat, lon)."""
+    lat_s, lon_s = [p.strip() for p in value.split(",", 1)]
+
+    def _one(s: str) -> float:
+        try:
+            return float(s)
+        except ValueError:
+            return dms_to_decimal(s)
+
+    return _one(lat_s), _one(lon_s)
+
+
+def ref_center_for_sacsic(value: str) -> tuple[float, float]:
+    """'SAC,SIC' → SACSIC_TO_CENTER_DMS 의 중심 (lat, lon). 매핑에 없으면 KeyError."""
+    sac, sic = [int(p) for p in value.split(",", 1)]
+    lat_dms, lon_dms = SACSIC_TO_CENTER_DMS[(sac, sic)]
+    return dms_to_decimal(lat_dms), dms_to_decimal(lon_dms)
+
+
+# -------------------------------------------------------------
+#  그리드 스택 바이너리
+# -------------------------------------------------------------
+def encode_grid_stack(grids: np.ndarray, meta: dict) -> bytes:
+    n, gy, gx = grids.shape
+    payload = np.packbits(grids.reshape(n, gy * gx), axis=1).tobytes()
+    header = {
+        "format": GRID_FORMAT,
+        "version": GRID_VERSION,
+        "count": int(n),
+        "grid_size": int(gx),
+        "bitorder": "big",
+        "bytes_per_grid": (gy * gx + 7) // 8,
+        **meta,
+    }
+    line = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    line += b" " * ((-(len(line) + 1)) % _ALIGN) + b"\n"
+    return line + payload
+
+
+def decode_grid_stack(blob: bytes) -> tuple[dict, np.ndarray]:
+    """encode_grid_stack() 의 역. (header, (count, size, size) bool) 반환."""
+    nl = blob.index(b"\n")
+    header = json.loads(blob[:nl].decode("utf-8"))
+    if header.get("format") != GRID_FORMAT:
+        raise ValueError("cat08grid 바이너리가 아닙니다.")
+
+    n = int(header["count"])
+    size = int(header["grid_size"])
+    packed = np.frombuffer(blob, dtype=np.uint8, offset=nl + 1).reshape(n, int(header["bytes_per_grid"]))
+    bits = np.unpackbits(packed, axis=1, count=size * size)
+    return header, bits.reshape(n, size, size).astype(bool)
+
+
+def write_grid_stack(path: str, grids: np.ndarray, meta: dict) -> str:
+    """그리드 스택 저장 (tmp → os.replace). 저장 경로 반환."""
+    blob = encode_grid_stack(grids, meta)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return path
+
+
+def read_grid_stack(path: str) -> tuple[dict, np.ndarray]:
+    with open(path, "rb") as f:
+        return decode_grid_stack(f.read())
+
+
+def default_grid_path(cat08_path: str) -> str:
+    base, _ext = os.path.splitext(cat08_path)
+    if base.endswith("_cat08"):
+        base = base[: -len("_cat08")]
+    return base + "_grid.bin"
+
+
+def cat08_grid_file(
+    cat08_path: str,
+    out_path: Optional[str] = None,
+    grid_size: int = 32,
+    max_range_km: float = 250.0,
+    ci_threshold: float = 1,
+    by: str = "scan",
+    ref_center: Optional[tuple[float, float]] = None,
+) -> dict:
+    """
+    cat08 출력 파일 하나를 그리드 스택으로 변환.
+    기본값은 분석 화면(useRadarReplaySync) 호출값: 250km / 32 / ci>=1.
+    by: "scan" | "all" | "pkt:N"
+    """
+    meta, segs, scans = load_cat08_output(cat08_path)
+
+    mode, _, arg = by.partition(":")
+    if mode == "scan":
+        groups = scans
+    elif mode == "all":
+        groups = whole_groups(segs)
+    elif mode == "pkt":
+        groups = packet_window_groups(segs, int(arg or 1))
+    else:
+        raise ValueError(f"지원하지 않는 by: {by} (scan | all | pkt:N)")
+
+    radar_lat, radar_lon = meta.get("radar_center") or (None, None)
+    ref_lat, ref_lon = ref_center or (None, None)
+    if radar_lat is None:
+        ref_lat = ref_lon = None
+    offset = ref_offset_norm(radar_lat, radar_lon, ref_lat, ref_lon, float(max_range_km))
+
+    grids = rasterize_groups(segs, groups, max_range_km, grid_size, ci_threshold, offset)
+
+    out_path = out_path or default_grid_path(cat08_path)
+    write_grid_stack(out_path, grids, {
+        "by": by,
+        "max_range_km": float(max_range_km),
+        "ci_threshold": ci_threshold,
+        "raster_size": RASTER_SIZE,
+        "radar_center": [radar_lat, radar_lon],
+        "ref_center": [ref_lat, ref_lon] if ref_center else None,
+        "sac": meta.get("sac"),
+        "sic": meta.get("sic"),
+        "groups": scan_table_to_rows(groups),
+    })
+    return {"grid": out_path, "count": int(groups.size), "filled": int(grids.sum())}
+
+
+def cat08_grid_main(argv: list[str]) -> int:
+    """
+    argv: [cat08_path(.json|.bin), out_path?, gridSize?, maxRangeKm?]
+      --by=scan|all|pkt:N   그룹 단위 (기본 scan)
+      --ci=1                최소 intensity
+      --ref=lat,lon         비교 기준 중심 (십진수 또는 DMS)
+      --ref-sacsic=SAC,SIC  비교 기준 중심을 SACSIC_TO_CENTER_DMS 에서
+    """
+    args, flags = parse_cli_flags(argv)
+    if not args:
+        print("cat08_grid_main: need cat08_path [out_path] [gridSize] [maxRangeKm]", file=sys.stderr)
+        return 2
+
+    path = args[0]
+    if not os.path.isfile(path):
+        print(f"[오류] 파일을 찾을 수 없습니다: {path}", file=sys.stderr)
+        return 1
+
+    try:
+        ref = None
+        if flags.get("ref"):
+            ref = parse_ref_center(flags["ref"])
+        elif flags.get("ref-sacsic"):
+            ref = ref_center_for_sacsic(flags["ref-sacsic"])
+
+        result = cat08_grid_file(
+            path,
+            out_path=args[1] if len(args) > 1 and args[1] else None,
+            grid_size=int(args[2]) if len(args) > 2 else 32,
+            max_range_km=float(args[3]) if len(args) > 3 else 250.0,
+            ci_threshold=float(flags.get("ci", 1)),
+            by=flags.get("by", "scan"),
+            ref_center=ref,
+        )
+    except KeyError as e:
+        print(f"[오류] SACSIC_TO_CENTER_DMS 에 없는 SAC/SIC: {e}", file=sys.stderr)
+        return 1
+    except ValueError as e:
+        print(f"[오류] {e}", file=sys.stderr)
+        return 1
+
+    print(json.dumps(result, ensure_ascii=False))
+    return 0
@@ -0,0 +1,290 @@
+# python/maked_package/cat08_scans.py
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import sys
+import zlib
+from typing import Optional
+
+import numpy as np
+
+from .asterix_cat08 import CAT08_SEGMENT_DTYPE, MSG_TYPE_SOP
+
+# -------------------------------------------------------------
+#  안테나 1회전(scan) 단위 구간 테이블
+#
+#  - 기본: SOP(Start of Picture, I008/000 = 254) 제어 패킷 위치가 scan 시작.
+#    SOP 의 seg_offset / pkt_idx (iter_cat08_windows(controls=True) 가 붙여 줌) 를
+#    그대로 경계로 쓴다. 첫 SOP 앞에 벡터가 있으면 그 구간이 0번 scan.
+#  - SOP 가 하나도 없는 녹화에서만 방위 wrap 으로 대신한다:
+#    패킷마다 첫 벡터의 angle_deg 를 대표 방위로 보고,
+#    직전 패킷보다 SCAN_WRAP_DEG 이상 줄어들면 (예: 358° → 2°) 새 scan 시작.
+#    벡터가 방위 순서가 아니라 기상 셀 단위로 오면 wrap 이 한 회전보다 훨씬 자주 잡힌다
+#    (RDM_B2025122500: 1644 패킷에 wrap 133번, SOP 기준 33 scan).
+#  - scan 경계는 항상 패킷 경계 → 한 패킷이 두 scan 에 걸치지 않는다.
+#  - 테이블 1행: [seg_start, seg_end, pkt_start, pkt_end]
+#      seg_*: segments 배열 오프셋 (end 미포함) → segments[seg_start:seg_end]
+#      pkt_*: pkt_idx 범위 (양끝 포함)
+#    .bin 출력에서는 seg_start / seg_end 가 곧 각 컬럼의 (행 offset, 길이) →
+#    scan 하나만 읽을 때 컬럼마다 그 구간만 seek (_read_bin_scan)
+# -------------------------------------------------------------
+SCAN_WRAP_DEG = 180.0
+
+SCAN_DTYPE = np.dtype(
+    [
+        ("seg_start", np.int64),
+        ("seg_end", np.int64),
+        ("pkt_start", np.uint32),
+        ("pkt_end", np.uint32),
+    ]
+)
+
+
+def packet_starts(segments: np.ndarray) -> np.ndarray:
+    """segments 안에서 pkt_idx 가 바뀌는(=패킷 첫 벡터) 위치."""
+    if segments.size == 0:
+        return np.empty(0, dtype=np.int64)
+    pkt = segments["pkt_idx"]
+    return np.flatnonzero(np.r_[True, pkt[1:] != pkt[:-1]])
+
+
+def build_scan_table(
+    pkt_seg_start: np.ndarray,
+    pkt_idx: np.ndarray,
+    pkt_angle: np.ndarray,
+    total_segments: int,
+    wrap_deg: float = SCAN_WRAP_DEG,
+) -> np.ndarray:
+    """
+    패킷 단위 (세그먼트 시작 오프셋, pkt_idx, 대표 방위) → SCAN_DTYPE 테이블.
+    """
+    n = int(pkt_seg_start.size)
+    if n == 0:
+        return np.empty(0, dtype=SCAN_DTYPE)
+
+    ang = np.asarray(pkt_angle, dtype=np.float32)
+    wrap = np.r_[True, np.diff(ang) < -float(wrap_deg)]
+    first = np.flatnonzero(wrap)           # 각 scan 의 첫 패킷 (패킷 번호 기준 위치)
+    last = np.r_[first[1:] - 1, n - 1]     # 각 scan 의 마지막 패킷
+
+    table = np.empty(first.size, dtype=SCAN_DTYPE)
+    table["seg_start"] = pkt_seg_start[first]
+    table["seg_end"] = np.r_[pkt_seg_start[first[1:]], total_segments]
+    table["pkt_start"] = pkt_idx[first]
+    table["pkt_end"] = pkt_idx[last]
+    return table
+
+
+def build_sop_scan_table(
+    sop_seg: np.ndarray,
+    sop_pkt: np.ndarray,
+    total_segments: int,
+    last_pkt: int,
+) -> np.ndarray:
+    """
+    SOP 위치 (seg_offset, 다음 weather pkt_idx) → SCAN_DTYPE 테이블.
+    세그먼트가 없는 scan (SOP 가 연달아 오거나 파일 끝의 SOP) 은 뺀다.
+    """
+    if total_segments == 0:
+        return np.empty(0, dtype=SCAN_DTYPE)
+
+    order = np.argsort(sop_seg, kind="stable")
+    seg = np.asarray(sop_seg, dtype=np.int64)[order]
+    pkt = np.asarray(sop_pkt, dtype=np.int64)[order]
+    # 첫 SOP 앞의 벡터 → 0번 scan (pkt 1 부터)
+    seg = np.r_[0, seg, total_segments]
+    pkt = np.r_[1, pkt, last_pkt + 1]
+
+    keep = seg[1:] > seg[:-1]
+    table = np.empty(int(keep.sum()), dtype=SCAN_DTYPE)
+    table["seg_start"] = seg[:-1][keep]
+    table["seg_end"] = seg[1:][keep]
+    table["pkt_start"] = pkt[:-1][keep]
+    table["pkt_end"] = pkt[1:][keep] - 1
+    return table
+
+
+class ScanTableBuilder:
+    """
+    배치 단위로 디코드되는 세그먼트(+ 제어 패킷)를 받아 마지막에 scan 테이블을 만든다.
+    패킷당 3개 값, SOP 당 2개 값만 보관하므로 세그먼트 전체를 들고 있지 않아도 된다.
+    """
+
+    def __init__(self, wrap_deg: float = SCAN_WRAP_DEG):
+        self.wrap_deg = wrap_deg
+        self.total = 0
+        self._starts: list[np.ndarray] = []
+        self._pkts: list[np.ndarray] = []
+        self._angles: list[np.ndarray] = []
+        self._sop_seg: list[int] = []
+        self._sop_pkt: list[int] = []
+
+    def feed(self, segments: np.ndarray) -> None:
+        ps = packet_starts(segments)
+        # 이전 배치와 같은 패킷으로 시작하면 그 첫 행은 패킷 시작이 아님
+        if ps.size and self._pkts and self._pkts[-1].size:
+            if segments["pkt_idx"][0] == self._pkts[-1][-1]:
+                ps = ps[1:]
+        self._starts.append(ps + self.total)
+        self._pkts.append(segments["pkt_idx"][ps])
+        self._angles.append(segments["angle_deg"][ps])
+        self.total += int(segments.size)
+
+    def feed_controls(self, controls) -> None:
+        """iter_cat08_windows(controls=True) 의 제어 패킷 리스트. SOP 위치만 남긴다."""
+        for c in controls:
+            if c.get("message_type") == MSG_TYPE_SOP:
+                self._sop_seg.append(int(c["seg_offset"]))
+                self._sop_pkt.append(int(c["pkt_idx"]))
+
+    def finish(self) -> np.ndarray:
+        if not self._starts:
+            return np.empty(0, dtype=SCAN_DTYPE)
+        pkts = np.concatenate(self._pkts)
+        if self._sop_seg:
+            return build_sop_scan_table(
+                np.asarray(self._sop_seg, dtype=np.int64),
+                np.asarray(self._sop_pkt, dtype=np.int64),
+                self.total,
+                int(pkts[-1]) if pkts.size else 0,
+            )
+        return build_scan_table(
+            np.concatenate(self._starts),
+            pkts,
+            np.concatenate(self._angles),
+            self.total,
+            self.wrap_deg,
+        )
+
+
+def scan_table_from_segments(
+    segments: np.ndarray,
+    wrap_deg: float = SCAN_WRAP_DEG,
+    controls=None,
+) -> np.ndarray:
+    """세그먼트 배열 전체에서 한 번에 scan 테이블 생성. controls = 제어 패킷 리스트 (SOP 경계)."""
+    b = ScanTableBuilder(wrap_deg)
+    b.feed_controls(controls or [])
+    b.feed(segments)
+    return b.finish()
+
+
+def sop_controls_from_times(times_rows) -> list[dict]:
+    """출력 파일의 "times" 행 [tod_s, pkt_idx, seg_offset, message_type] → feed_controls 용 SOP 리스트."""
+    return [
+        {"message_type": int(r[3]), "pkt_idx": int(r[1]), "seg_offset": int(r[2])}
+        for r in (times_rows or [])
+        if int(r[3]) == MSG_TYPE_SOP
+    ]
+
+
+def scan_table_to_rows(table: np.ndarray) -> list[list[int]]:
+    """JSON 용 [[seg_start, seg_end, pkt_start, pkt_end], ...]"""
+    return [
+        list(r)
+        for r in zip(
+            table["seg_start"].tolist(),
+            table["seg_end"].tolist(),
+            table["pkt_start"].tolist(),
+            table["pkt_end"].tolist(),
+        )
+    ]
+
+
+def rows_to_scan_table(rows) -> np.ndarray:
+    table = np.zeros(len(rows or []), dtype=SCAN_DTYPE)
+    for i, name in enumerate(SCAN_DTYPE.names):
+        table[name] = [r[i] for r in rows]
+    return table
+
+
+# -------------------------------------------------------------
+#  출력 파일(.json / .bin)에서 scan 하나만 꺼내기
+# -------------------------------------------------------------
+def _read_bin_scan(path: str, scan_no: int) -> tuple[dict, np.ndarray, list]:
+    # 압축이 없으면 헤더만 읽고 각 컬럼에서 필요한 구간만 seek 해서 읽는다
+    with open(path, "rb") as f:
+        line = f.readline()
+        header = json.loads(line.decode("utf-8"))
+        scans = header.get("scans") or []
+        s0, s1, _p0, _p1 = scans[scan_no]
+        n = int(s1 - s0)
+
+        out = np.empty(n, dtype=CAT08_SEGMENT_DTYPE)
+        compression = header.get("compression", "none")
+        if compression == "none":
+            base = len(line)
+            for col in header["columns"]:
+                dt = np.dtype(col["dtype"])
+                f.seek(base + int(col["offset"]) + int(s0) * dt.itemsize)
+                out[col["name"]] = np.frombuffer(f.read(n * dt.itemsize), dtype=dt, count=n)
+        else:
+            payload = f.read()
+            payload = zlib.decompress(payload) if compression == "zlib" else gzip.decompress(payload)
+            for col in header["columns"]:
+                dt = np.dtype(col["dtype"])
+                out[col["name"]] = np.frombuffer(
+                    payload, dtype=dt, count=n, offset=int(col["offset"]) + int(s0) * dt.itemsize
+                )
+
+    # version 1 .bin 은 sac / sic 컬럼이 없다 → 헤더값
+    stored = {col["name"] for col in header["columns"]}
+    for name in ("sac", "sic"):
+        if name not in stored:
+            value = header.get(name)
+            out[name] = -1 if value is None else value
+    return header, out, scans[scan_no]
+
+
+def read_scan_segments(path: str, scan_no: int) -> tuple[list, list[list[float]]]:
+    """
+    <파일명>_cat08.json / .bin 에서 scan_no 번째 scan 의 세그먼트만 반환.
+    반환: (scan 행 [seg_start, seg_end, pkt_start, pkt_end], 세그먼트 행 리스트)
+    """
+    if path.lower().endswith(".bin"):
+        from .ast_to_json import segments_to_rows
+
+        _header, segs, row = _read_bin_scan(path, scan_no)
+        return row, segments_to_rows(segs)
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    row = (data.get("scans") or [])[scan_no]
+    return row, data["segments"][row[0]: row[1]]
+
+
+def cat08_scan_main(argv: list[str]) -> int:
+    """
+    argv: [cat08_path(.json|.bin), scan_no?]
+      - scan_no 없으면 scan 테이블만 출력
+      - 있으면 {"scan": [...], "segments": [...]} 출력
+    """
+    if not argv:
+        print("cat08_scan_main: need cat08_path [scan_no]", file=sys.stderr)
+        return 2
+
+    path = argv[0]
+    if not os.path.isfile(path):
+        print(f"[오류] 파일을 찾을 수 없습니다: {path}", file=sys.stderr)
+        return 1
+
+    if len(argv) < 2:
+        if path.lower().endswith(".bin"):
+            with open(path, "rb") as f:
+                scans = json.loads(f.readline().decode("utf-8")).get("scans") or []
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                scans = json.load(f).get("scans") or []
+        print(json.dumps({"scans": scans}, ensure_ascii=False))
+        return 0
+
+    try:
+        row, segments = read_scan_segments(path, int(argv[1]))
+    except IndexError:
+        print(f"[오류] scan 번호 범위 밖: {argv[1]}", file=sys.stderr)
+        return 1
+
+    print(json.dumps({"scan": row, "segments": segments}, ensure_ascii=False))
+    return 0
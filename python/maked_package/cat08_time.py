@@ -0,0 +1,179 @@
+# python/maked_package/cat08_time.py
+from __future__ import annotations
+
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# -------------------------------------------------------------
+#  CAT-08 시간 인덱스
+#
+#  SOP 등 제어 패킷의 I008/090 Time of Day 를
+#  "그 시각 이후 첫 weather 패킷 번호 / 세그먼트 오프셋" 에 대응시킨 표.
+#    1행: [tod_s, pkt_idx, seg_offset, message_type]
+#
+#  - tod_s 는 UTC 자정 기준 초. 파일이 자정을 넘으면 이후 값에 86400 을 더해
+#    항상 증가하도록 펼쳐 둔다 → 시간 검색은 이진 탐색 한 번.
+# -------------------------------------------------------------
+DAY_S = 86400.0
+
+TIME_DTYPE = np.dtype(
+    [
+        ("tod_s", np.float64),
+        ("pkt_idx", np.uint32),
+        ("seg_offset", np.int64),
+        ("message_type", np.int16),   # 없으면 -1
+    ]
+)
+
+
+class TimeIndexBuilder:
+    """iter_cat08_windows(controls=True) 의 제어 패킷 리스트를 받아 시간 인덱스를 쌓는다."""
+
+    def __init__(self, clock: Optional[Dict[str, Any]] = None):
+        self._rows: List[tuple] = []
+        self._taken = 0
+        # clock: 이전 clock_state() — 이어 읽기(tail)에서 자정 넘김 판단을 이어 간다
+        self._day = float((clock or {}).get("day", 0.0))
+        self._prev: Optional[float] = (clock or {}).get("prev")
+
+    def feed(self, controls: List[Dict[str, Any]]) -> None:
+        for c in controls:
+            tod = c.get("tod_s")
+            if tod is None:
+                continue
+            # 자정 넘김: 반나절 이상 줄어들면 하루 더함
+            if self._prev is not None and tod + self._day < self._prev - DAY_S / 2:
+                self._day += DAY_S
+            t = tod + self._day
+            self._prev = t
+            mt = c.get("message_type")
+            self._rows.append((t, c["pkt_idx"], c["seg_offset"], -1 if mt is None else mt))
+
+    def finish(self) -> np.ndarray:
+        return np.array(self._rows, dtype=TIME_DTYPE)
+
+    def take_rows(self) -> list[list]:
+        """지난 take_rows() 이후 쌓인 행만 JSON 용 리스트로 (tail 의 줄 단위 출력용)."""
+        rows = [list(r) for r in self._rows[self._taken:]]
+        self._taken = len(self._rows)
+        return rows
+
+    def clock_state(self) -> Dict[str, Any]:
+        """체크포인트에 저장할 자정 넘김 상태 {"day", "prev"}."""
+        return {"day": self._day, "prev": self._prev}
+
+
+def time_index_to_rows(times: np.ndarray) -> list[list]:
+    """JSON 용 [[tod_s, pkt_idx, seg_offset, message_type], ...]"""
+    return [
+        list(r)
+        for r in zip(
+            times["tod_s"].tolist(),
+            times["pkt_idx"].tolist(),
+            times["seg_offset"].tolist(),
+            times["message_type"].tolist(),
+        )
+    ]
+
+
+def rows_to_time_index(rows) -> np.ndarray:
+    return np.array([tuple(r) for r in (rows or [])], dtype=TIME_DTYPE)
+
+
+def _align_tod(times: np.ndarray, tod_s: float) -> float:
+    # 자정을 넘긴 인덱스에서 "00:01:00" 같은 질의는 다음 날 값으로 맞춘다
+    if times.size and tod_s < float(times["tod_s"][0]) - DAY_S / 2:
+        return tod_s + DAY_S
+    return tod_s
+
+
+def seek_time(times: np.ndarray, tod_s: float) -> tuple[int, int]:
+    """
+    tod_s 시점의 (pkt_idx, seg_offset).
+    tod_s 이하인 마지막 시간표 행을 이진 탐색으로 찾는다 (첫 행 이전이면 첫 행).
+    """
+    if times.size == 0:
+        raise ValueError("시간 인덱스가 비어 있습니다.")
+    t = _align_tod(times, tod_s)
+    i = int(np.searchsorted(times["tod_s"], t, side="right")) - 1
+    row = times[max(i, 0)]
+    return int(row["pkt_idx"]), int(row["seg_offset"])
+
+
+def time_of_packet(times: np.ndarray, pkt_idx: int) -> Optional[float]:
+    """weather 패킷 pkt_idx 직전의 시각(tod_s). 첫 시각 이전 패킷이면 None."""
+    if times.size == 0:
+        return None
+    i = int(np.searchsorted(times["pkt_idx"], pkt_idx, side="right")) - 1
+    return float(times["tod_s"][i]) if i >= 0 else None
+
+
+def parse_tod(text: str) -> float:
+    """ "HH:MM:SS(.fff)" 또는 초 → 초."""
+    if ":" not in text:
+        return float(text)
+    parts = [float(p) for p in text.split(":")]
+    while len(parts) < 3:
+        parts.append(0.0)
+    h, m, sec = parts[:3]
+    return h * 3600.0 + m * 60.0 + sec
+
+
+def format_tod(tod_s: float) -> str:
+    t = tod_s % DAY_S
+    h = int(t // 3600)
+    m = int((t % 3600) // 60)
+    return f"{h:02d}:{m:02d}:{t - h * 3600 - m * 60:06.3f}"
+
+
+def _load_times(path: str) -> np.ndarray:
+    if path.lower().endswith(".bin"):
+        with open(path, "rb") as f:
+            header = json.loads(f.readline().decode("utf-8"))
+        return rows_to_time_index(header.get("times"))
+    with open(path, "r", encoding="utf-8") as f:
+        return rows_to_time_index(json.load(f).get("times"))
+
+
+def cat08_time_main(argv: list[str]) -> int:
+    """
+    argv: [cat08_path(.json|.bin), time?]
+      - time 없으면 시간 인덱스 요약 출력
+      - 있으면 ("HH:MM:SS" 또는 초) 그 시점의 pkt_idx / seg_offset 출력
+    """
+    if not argv:
+        print("cat08_time_main: need cat08_path [HH:MM:SS]", file=sys.stderr)
+        return 2
+
+    path = argv[0]
+    if not os.path.isfile(path):
+        print(f"[오류] 파일을 찾을 수 없습니다: {path}", file=sys.stderr)
+        return 1
+
+    times = _load_times(path)
+    if times.size == 0:
+        print("[오류] 시간 인덱스가 없습니다 (Time of Day 제어 패킷 없음).", file=sys.stderr)
+        return 1
+
+    if len(argv) < 2:
+        print(json.dumps({
+            "entries": int(times.size),
+            "first": format_tod(float(times["tod_s"][0])),
+            "last": format_tod(float(times["tod_s"][-1])),
+            "first_pkt": int(times["pkt_idx"][0]),
+            "last_pkt": int(times["pkt_idx"][-1]),
+        }, ensure_ascii=False))
+        return 0
+
+    tod = parse_tod(argv[1])
+    pkt_idx, seg_offset = seek_time(times, tod)
+    print(json.dumps({
+        "time": format_tod(tod),
+        "pkt_idx": pkt_idx,
+        "seg_offset": seg_offset,
+    }, ensure_ascii=False))
+    return 0
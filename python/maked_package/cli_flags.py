@@ -0,0 +1,23 @@
+# python/maked_package/cli_flags.py
+from __future__ import annotations
+
+# -------------------------------------------------------------
+#  명령행 "--key[=value]" 플래그 분리
+#
+#  의존성 없는 작은 모듈 → nc_tools / serve 가 써도 CAT-08 디코더(ast_to_json) 를 끌어오지 않는다.
+# -------------------------------------------------------------
+
+
+def parse_cli_flags(argv: list[str]) -> tuple[list[str], dict[str, str]]:
+    """
+    ["a.ast", "--index", "--format=bin"] → (["a.ast"], {"index": "", "format": "bin"})
+    """
+    args: list[str] = []
+    flags: dict[str, str] = {}
+    for a in argv:
+        if a.startswith("--"):
+            k, _, v = a[2:].partition("=")
+            flags[k] = v
+        else:
+            args.append(a)
+    return args, flags
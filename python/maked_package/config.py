@@ -1,6 +1,8 @@
 # python/maked_package/config.py
 from __future__ import annotations
 
+import os
+
 NM_TO_M = 1852.0
 
 # (필요하면 여기 매핑 채워 넣기)
@@ -10,3 +12,20 @@ SACSIC_TO_CENTER_DMS: dict[tuple[int, int], tuple[str, str]] = {}
 # 매핑에 없을 때 사용하는 기본값 (제주 레이더 기준)
 DEFAULT_CENTER_LAT_DMS = '33°30\'03.84"N'
 DEFAULT_CENTER_LON_DMS = '126°28\'59.37"E'
+
+# CAT-08 변환 결과 캐시 (cat08_cache)
+# 환경변수 CAT08_CACHE_DIR / CAT08_CACHE_MAX_BYTES 로 덮어쓸 수 있음
+CAT08_CACHE_DIR = os.environ.get(
+    "CAT08_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "maked_package", "cat08"),
+)
+CAT08_CACHE_MAX_BYTES = int(os.environ.get("CAT08_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+# ncgrid 합성 격자 캐시 (nc_tools/grid_cache) — nc 파일이 있는 디렉토리 아래에 둔다
+# 환경변수 NCGRID_CACHE_MAX_BYTES 로 디렉토리당 최대 크기, NCGRID_CACHE=0 으로 끔
+NCGRID_CACHE_DIRNAME = ".ncgrid_cache"
+NCGRID_CACHE_MAX_BYTES = int(os.environ.get("NCGRID_CACHE_MAX_BYTES", 512 * 1024 ** 2))
+NCGRID_CACHE_ENABLED = os.environ.get("NCGRID_CACHE", "1") != "0"
+# ncgrid 비닝 기하의 방위 반올림 단위 (도). 0 = 원래 방위 그대로 (기본, 결과 정확)
+# 키우면 방위가 조금씩 흔들리는 파일끼리 binner 를 같이 쓰지만 일부 칸 값이 달라질 수 있다
+NCGRID_AZ_QUANTUM_DEG = float(os.environ.get("NCGRID_AZ_QUANTUM_DEG", 0))
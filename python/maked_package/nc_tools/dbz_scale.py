@@ -0,0 +1,38 @@
+# python/maked_package/nc_tools/dbz_scale.py
+from __future__ import annotations
+
+import numpy as np
+
+# -------------------------------------------------------------
+#  dBZ ↔ uint8 양자화 규칙 (nc_render_day / ncgrid u8 출력 / ncgrid_day 큐브 공용)
+#
+#    u8 = round((clip(dBZ, V_MIN, V_MAX) - V_MIN) / (V_MAX - V_MIN) * 254)   0..254
+#    255 = NODATA (NaN 또는 weak cut 미만)
+#    dBZ = V_MIN + u8 / 254 * (V_MAX - V_MIN)
+#
+#  numpy 만 import — ncgrid 캐시 hit 경로에서도 xarray 없이 쓸 수 있게 따로 둔다.
+# -------------------------------------------------------------
+V_MIN_DBZ = -10.0
+V_MAX_DBZ = 70.0
+NODATA = 255
+
+
+def quantize_dbz_to_u8(dbz: np.ndarray, weak_cut_dbz: float) -> np.ndarray:
+    out = np.empty(dbz.shape, dtype=np.uint8)
+    m = np.isfinite(dbz)
+    out[~m] = np.uint8(NODATA)
+
+    mm = m & (dbz >= weak_cut_dbz)
+    out[m & ~mm] = np.uint8(NODATA)
+
+    clipped = np.clip(dbz[mm], V_MIN_DBZ, V_MAX_DBZ)
+    scaled = (clipped - V_MIN_DBZ) / (V_MAX_DBZ - V_MIN_DBZ) * 254.0
+    out[mm] = np.round(scaled).astype(np.uint8)
+    return out
+
+
+def u8_to_dbz(u8: np.ndarray) -> np.ndarray:
+    dbz = np.full(u8.shape, np.nan, dtype=np.float32)
+    m = (u8 != NODATA)
+    dbz[m] = V_MIN_DBZ + (u8[m].astype(np.float32) / 254.0) * (V_MAX_DBZ - V_MIN_DBZ)
+    return dbz
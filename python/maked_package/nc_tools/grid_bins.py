@@ -0,0 +1,266 @@
+# python/maked_package/nc_tools/grid_bins.py
+from __future__ import annotations
+
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from .npy_io import save_npy_atomic
+
+# -------------------------------------------------------------
+#  polar (ray, gate) → 직교 격자 max 비닝 엔진 (nc_grid / render_nc_frame 용)
+#
+#  기존 경로: sweep 마다 meshgrid + sin/cos + searchsorted 2번 + np.maximum.at(2차원 인덱스)
+#  → (ray, gate) 가 어느 격자 칸에 들어가는지는 azimuth / range / 격자만으로 정해지므로
+#    한 번 계산해서 "칸 번호 순으로 정렬된 (ray, gate) 순열 + 칸별 시작 위치" 로 보관하고,
+#    sweep 마다 값 gather 한 번 + np.maximum.reduceat 한 번으로 max 를 구한다.
+#
+#  - 칸 계산식(edges / searchsorted)은 기존 _gridify_max 와 동일 → 결과 비트 단위 동일
+#  - 비유효 값(NaN)은 -inf 로 바꿔 reduce → 전부 비유효인 칸은 NaN (기존과 같음)
+#  - 기하 키 = (방위 정렬한 azimuth, range, 격자 배열) 바이트 → ray 시작 위치가 달라도 같은 키.
+#    binner 도 정렬된 방위로 만들고, sweep 값은 같은 순서로 행을 모아서 넣는다 (max 는 순서 무관).
+#    최근 BINNER_SLOTS 개를 재사용
+#  - az_quantum > 0 (config NCGRID_AZ_QUANTUM_DEG) 이면 azimuth 를 그 단위로 반올림하고
+#    균일 간격 range 는 (r0, dr) 를 mm 로 맞춘 값으로 바꾼 뒤 키 / 계산 → 파일마다 조금 흔들리는
+#    기하도 같은 binner. 결과가 원래 기하와 일부 칸에서 달라질 수 있어 기본은 0 (정확).
+#    (polar_lut 의 AZ_QUANTUM_DEG 와 같은 규칙)
+#  - 처음 보는 기하도 바로 순열을 만들어 reduceat 으로 처리하고, bin_dir 가 있으면
+#    <bin_dir>/grid_bins_<key>.npy 로 저장 (polar_lut 의 lut_dir 와 같은 방식)
+#    → 단발 ncgrid 프로세스 / route 의 캐시 miss 도 두 번째 파일부터는 정렬 없이 디스크에서 읽는다.
+#    파일 = (2, 유효 gate 수) [순열; 칸 번호], starts / bins 는 읽을 때 한 번 훑어 복원
+# -------------------------------------------------------------
+BINNER_SLOTS = 32
+BINNER_FILE_PREFIX = "grid_bins_"
+RANGE_TOLERANCE_M = 1e-3    # az_quantum > 0 에서 range 를 균일 간격으로 볼 허용 오차
+
+_binners: "OrderedDict[str, PolarGridBinner]" = OrderedDict()
+
+
+def polar_bin_index(az_deg: np.ndarray, r_m: np.ndarray, xk: np.ndarray, yk: np.ndarray) -> np.ndarray:
+    """(nrays*ngates,) int64 격자 칸 번호 (iy*nx + ix). 격자 밖 = -1."""
+    # meshgrid 후 R*sin(TH) 와 원소값이 같음 (sin/cos 은 ray 수만큼만 계산)
+    th = np.deg2rad(az_deg)
+    X_m = r_m[None, :] * np.sin(th)[:, None]
+    Y_m = r_m[None, :] * np.cos(th)[:, None]
+
+    dx = float(xk[1] - xk[0])
+    dy = float(yk[1] - yk[0])
+
+    x_edges = np.concatenate(([xk[0] - dx / 2], xk + dx / 2))
+    y_edges = np.concatenate(([yk[0] - dy / 2], yk + dy / 2))
+
+    x = (X_m / 1000.0).ravel()
+    y = (Y_m / 1000.0).ravel()
+
+    ix = np.searchsorted(x_edges, x, side="right") - 1
+    iy = np.searchsorted(y_edges, y, side="right") - 1
+
+    nx = xk.shape[0]
+    ny = yk.shape[0]
+    inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+    return np.where(inside, iy * nx + ix, -1)
+
+
+class PolarGridBinner:
+    """한 기하(azimuth, range, xk, yk)에 대한 max 비닝. 전체 (ray, gate) 정렬 순열을 보관."""
+
+    def __init__(self, az_deg: np.ndarray, r_m: np.ndarray, xk: np.ndarray, yk: np.ndarray):
+        shape = (int(yk.shape[0]), int(xk.shape[0]))
+        n_cells = int(len(az_deg)) * int(len(r_m))
+
+        idx = polar_bin_index(az_deg, r_m, xk, yk)
+        valid = np.flatnonzero(idx >= 0)
+        order = np.argsort(idx[valid], kind="stable")
+        self._set(shape, n_cells, valid[order], idx[valid][order])
+
+    @classmethod
+    def from_array(cls, shape: tuple[int, int], n_cells: int, arr: np.ndarray) -> "PolarGridBinner":
+        """to_array() 결과로 복원 (정렬 없음)."""
+        b = cls.__new__(cls)
+        b._set(shape, n_cells, arr[0], arr[1])
+        return b
+
+    def to_array(self) -> np.ndarray:
+        """(2, n) [순열; 칸 번호] — 디스크 저장용."""
+        sorted_bins = np.repeat(self.bins, np.diff(np.r_[self.starts, self.perm.size]))
+        dtype = np.int32 if max(self.n_cells, self.shape[0] * self.shape[1]) < 2 ** 31 else np.int64
+        return np.stack([self.perm.astype(dtype), sorted_bins.astype(dtype)])
+
+    def _set(self, shape: tuple[int, int], n_cells: int, perm: np.ndarray, sorted_bins: np.ndarray) -> None:
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.n_cells = int(n_cells)
+
+        # perm: 칸 번호 순으로 정렬된 (ray, gate) 평탄 위치
+        self.perm = np.asarray(perm).astype(np.int32 if self.n_cells < 2 ** 31 else np.int64)
+        if sorted_bins.size:
+            self.starts = np.flatnonzero(np.r_[True, sorted_bins[1:] != sorted_bins[:-1]])
+        else:
+            self.starts = np.empty(0, dtype=np.int64)
+        self.bins = sorted_bins[self.starts]
+
+    def max(self, Z: np.ndarray, mask_below: float | None = None) -> np.ndarray:
+        """
+        Z (nrays, ngates) → (ny, nx) float32 칸별 max. 값 없는 칸 = NaN.
+        mask_below 를 주면 그보다 작은 값은 없는 값으로 본다 (Z 는 수정하지 않음).
+        """
+        out = np.full(self.shape, np.nan, dtype=np.float32)
+        if self.perm.size == 0:
+            return out
+
+        z = np.asarray(Z, dtype=np.float32).reshape(-1)[self.perm]
+        bad = ~np.isfinite(z)
+        if mask_below is not None:
+            bad |= z < mask_below
+        z[bad] = -np.inf
+        red = np.maximum.reduceat(z, self.starts)
+        red[red == -np.inf] = np.nan
+        out.reshape(-1)[self.bins] = red
+        return out
+
+
+def direct_gridify_max(
+    az_deg: np.ndarray,
+    r_m: np.ndarray,
+    Z: np.ndarray,
+    xk: np.ndarray,
+    yk: np.ndarray,
+    mask_below: float | None = None,
+) -> np.ndarray:
+    """
+    기하를 저장하지 않는 비교용 경로 (scripts/bench_grid_bins.py): 유효한 (ray, gate) 만
+    칸 번호를 계산해서 1차원 평탄 인덱스로 np.maximum.at. PolarGridBinner 와 결과 동일.
+    """
+    z = np.asarray(Z, dtype=np.float32).reshape(-1)
+    ok = np.isfinite(z)
+    if mask_below is not None:
+        ok &= z >= mask_below
+    cells = np.flatnonzero(ok)
+
+    n_gates = int(len(r_m))
+    rays = cells // n_gates
+    gates = cells - rays * n_gates
+    # 유효 gate 만 (ray, gate) 쌍으로 계산 — polar_bin_index 와 같은 식
+    th = np.deg2rad(az_deg)
+    x = (r_m[gates] * np.sin(th)[rays]) / 1000.0
+    y = (r_m[gates] * np.cos(th)[rays]) / 1000.0
+
+    dx = float(xk[1] - xk[0])
+    dy = float(yk[1] - yk[0])
+    x_edges = np.concatenate(([xk[0] - dx / 2], xk + dx / 2))
+    y_edges = np.concatenate(([yk[0] - dy / 2], yk + dy / 2))
+    ix = np.searchsorted(x_edges, x, side="right") - 1
+    iy = np.searchsorted(y_edges, y, side="right") - 1
+
+    nx = xk.shape[0]
+    ny = yk.shape[0]
+    inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+
+    out = np.full(ny * nx, -np.inf, dtype=np.float32)
+    np.maximum.at(out, iy[inside] * nx + ix[inside], z[cells[inside]])
+    out[out == -np.inf] = np.nan
+    return out.reshape(ny, nx)
+
+
+def _geometry_key(*arrays: np.ndarray) -> str:
+    h = hashlib.sha1()
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(str((a.dtype.str, a.shape)).encode("ascii"))
+        h.update(a.tobytes())
+    return h.hexdigest()
+
+
+def sweep_geometry(
+    az_deg: np.ndarray,
+    r_m: np.ndarray,
+    az_quantum: float = 0.0,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+    """
+    sweep 기하 → (방위 순으로 정렬한 azimuth, range, ray 순서).
+    이미 정렬돼 있으면 ray 순서는 None (값 행을 다시 모을 필요 없음).
+    """
+    az = np.asarray(az_deg)
+    r = np.asarray(r_m)
+    if az_quantum > 0:
+        az = (np.round(az / az_quantum) * az_quantum).astype(az.dtype)
+        if r.size > 1:
+            r0 = round(float(r[0]), 3)
+            dr = round(float(r[1] - r[0]), 3)
+            canon = r0 + dr * np.arange(r.size)
+            if float(np.max(np.abs(r - canon))) <= RANGE_TOLERANCE_M:
+                r = canon.astype(r.dtype)
+
+    order = None
+    if az.size > 1 and np.any(az[1:] < az[:-1]):
+        order = np.argsort(az, kind="stable")
+        az = az[order]
+    return az, r, order
+
+
+def get_binner(
+    az_deg: np.ndarray,
+    r_m: np.ndarray,
+    xk: np.ndarray,
+    yk: np.ndarray,
+    key: str | None = None,
+    bin_dir: Optional[str] = None,
+) -> PolarGridBinner:
+    """
+    메모리 → 디스크(bin_dir) → 새로 계산 순으로 PolarGridBinner 를 찾는다 (sweep / 파일 / 프로세스 간).
+    bin_dir 에 쓸 수 없으면 메모리에만 둔다.
+    """
+    key = key or _geometry_key(az_deg, r_m, xk, yk)
+    b = _binners.get(key)
+    if b is not None:
+        _binners.move_to_end(key)
+        return b
+
+    shape = (int(yk.shape[0]), int(xk.shape[0]))
+    n_cells = int(len(az_deg)) * int(len(r_m))
+    path = os.path.join(bin_dir, f"{BINNER_FILE_PREFIX}{key[:24]}.npy") if bin_dir else None
+    if path and os.path.isfile(path):
+        try:
+            arr = np.load(path)
+            if arr.ndim == 2 and arr.shape[0] == 2 and (
+                arr.shape[1] == 0 or (arr[0].max() < n_cells and arr[1].max() < shape[0] * shape[1])
+            ):
+                b = PolarGridBinner.from_array(shape, n_cells, arr)
+                os.utime(path)      # grid_cache LRU 정리의 사용 시각
+        except (OSError, ValueError):
+            b = None
+
+    if b is None:
+        b = PolarGridBinner(az_deg, r_m, xk, yk)
+        if path:
+            try:
+                os.makedirs(bin_dir, exist_ok=True)
+                save_npy_atomic(path, b.to_array())
+            except OSError:
+                pass
+    _binners[key] = b
+    while len(_binners) > BINNER_SLOTS:
+        _binners.popitem(last=False)
+    return b
+
+
+def gridify_max(
+    az_deg: np.ndarray,
+    r_m: np.ndarray,
+    Z: np.ndarray,
+    xk: np.ndarray,
+    yk: np.ndarray,
+    mask_below: float | None = None,
+    az_quantum: float = 0.0,
+    bin_dir: Optional[str] = None,
+) -> np.ndarray:
+    """
+    sweep 1개 (az, r, Z) → (ny, nx) float32 max 격자 (PolarGridBinner, 정렬 + reduceat).
+    bin_dir 를 주면 binner 를 그 디렉토리에 저장 / 재사용.
+    """
+    az, r, order = sweep_geometry(az_deg, r_m, az_quantum)
+    if order is not None:
+        Z = np.asarray(Z)[order]
+    return get_binner(az, r, xk, yk, bin_dir=bin_dir).max(Z, mask_below)
@@ -0,0 +1,180 @@
+# python/maked_package/nc_tools/grid_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Optional
+
+import numpy as np
+
+from ..config import NCGRID_AZ_QUANTUM_DEG, NCGRID_CACHE_DIRNAME, NCGRID_CACHE_MAX_BYTES
+from .npy_io import save_npy_atomic
+
+# -------------------------------------------------------------
+#  ncgrid 합성 격자(Gc) 디스크 캐시
+#
+#  <nc 디렉토리>/.ncgrid_cache/<key>.npy    (ny, nx) float32
+#                             /<key>.json   nc_grid_main header
+#
+#  키 = sha1( CACHE_VERSION + nc 파일명 + (size, mtime_ns)
+#            + field / composite / gridResKm / gridExtentKm / maskBelowDbz [+ bbox] [+ azQuantum] )
+#  → 원본이 바뀌면 (다운로드 중 덮어쓰기 등) 자연히 다른 키
+#
+#  - hit 은 .npy 를 mmap 해서 그대로 stdout 에 쓴다. 이 모듈은 numpy 만 import
+#    (xarray / h5netcdf import 없음 → 프로세스 기동 비용이 대부분 사라짐)
+#  - 항목 사용 시각 = .npy 의 mtime (hit 때마다 갱신) → 디렉토리 총 크기가
+#    NCGRID_CACHE_MAX_BYTES 를 넘으면 오래 안 쓴 것부터 삭제
+#  - 저장은 .npy → .json 순서로 각각 tmp → os.replace. .json 이 있어야 hit 으로 본다
+#  - 원본 파일 정보(시각 라벨 등)는 파라미터와 무관하게 파일당 .json 하나 (source_info_key)
+#    → 하루치 큐브(nc_grid_day)가 캐시 hit 때 NetCDF 를 열지 않아도 된다
+#  - grid_bins 의 binner 파일(grid_bins_<key>.npy, json 없음)도 같은 디렉토리에 두고
+#    같은 LRU 정리 대상 (사용 시각 = .npy mtime)
+# -------------------------------------------------------------
+CACHE_VERSION = 1
+
+
+def grid_cache_dir(nc_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(nc_path)), NCGRID_CACHE_DIRNAME)
+
+
+def grid_cache_key(nc_path: str, params: dict) -> str:
+    """nc 파일 (이름 + size + mtime_ns) + ncgrid 파라미터 → 키. params = parse_grid_args 결과 (path 제외)."""
+    st = os.stat(nc_path)
+    spec = {
+        "cache": CACHE_VERSION,
+        "name": os.path.basename(nc_path),
+        "size": int(st.st_size),
+        "mtime_ns": int(st.st_mtime_ns),
+        "field": params.get("field"),
+        "composite": params.get("composite"),
+        "gridResKm": float(params.get("grid_res_km")),
+        "gridExtentKm": float(params.get("grid_extent_km")),
+        "maskBelowDbz": float(params.get("mask_below")),
+    }
+    if params.get("bbox") is not None:     # ROI 가 없으면 키에 넣지 않음 (기존 항목 유지)
+        spec["bbox"] = [float(v) for v in params["bbox"]]
+    if NCGRID_AZ_QUANTUM_DEG > 0:          # 반올림 기하는 결과가 다르므로 따로
+        spec["azQuantum"] = NCGRID_AZ_QUANTUM_DEG
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def source_info_key(nc_path: str) -> str:
+    """nc 파일 (이름 + size + mtime_ns) → 원본 정보 항목 키."""
+    st = os.stat(nc_path)
+    spec = {
+        "cache": CACHE_VERSION,
+        "source": os.path.basename(nc_path),
+        "size": int(st.st_size),
+        "mtime_ns": int(st.st_mtime_ns),
+    }
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_source_info(nc_path: str) -> Optional[dict]:
+    """store_source_info 로 저장한 dict. 없거나 원본이 바뀌었으면 None."""
+    _npy, meta = _entry_paths(grid_cache_dir(nc_path), source_info_key(nc_path))
+    try:
+        with open(meta, "r", encoding="utf-8") as f:
+            info = json.load(f)
+        os.utime(meta)
+    except (OSError, ValueError):
+        return None
+    return info if isinstance(info, dict) else None
+
+
+def store_source_info(nc_path: str, info: dict) -> None:
+    """원본 파일 정보 (예: {"timeLabel": ...}) 저장. 격자 항목과 같이 LRU 정리 대상."""
+    cache_dir = grid_cache_dir(nc_path)
+    _npy, meta = _entry_paths(cache_dir, source_info_key(nc_path))
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{meta}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(info, f, ensure_ascii=False)
+    os.replace(tmp, meta)
+
+
+def _entry_paths(cache_dir: str, key: str) -> tuple[str, str]:
+    base = os.path.join(cache_dir, key)
+    return f"{base}.npy", f"{base}.json"
+
+
+def load_cached_grid(nc_path: str, params: dict) -> Optional[tuple[dict, np.ndarray]]:
+    """hit 이면 (header, mmap 된 (ny, nx) float32), 없거나 깨졌으면 None."""
+    npy, meta = _entry_paths(grid_cache_dir(nc_path), grid_cache_key(nc_path, params))
+    try:
+        with open(meta, "r", encoding="utf-8") as f:
+            header = json.load(f)
+        grid = np.load(npy, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if grid.dtype != np.float32 or grid.shape != (header.get("ny"), header.get("nx")):
+        return None
+    try:
+        os.utime(npy)
+    except OSError:
+        pass
+    return header, grid
+
+
+def store_cached_grid(
+    nc_path: str,
+    params: dict,
+    header: dict,
+    grid: np.ndarray,
+    max_bytes: Optional[int] = None,
+) -> str:
+    """격자 저장 후 디렉토리를 max_bytes 까지 LRU 정리. 키 반환."""
+    cache_dir = grid_cache_dir(nc_path)
+    key = grid_cache_key(nc_path, params)
+    npy, meta = _entry_paths(cache_dir, key)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    save_npy_atomic(npy, np.ascontiguousarray(grid, dtype=np.float32))
+    tmp = f"{meta}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(header, f, ensure_ascii=False)
+    os.replace(tmp, meta)
+
+    prune_grid_cache(cache_dir, NCGRID_CACHE_MAX_BYTES if max_bytes is None else int(max_bytes), keep=key)
+    return key
+
+
+def prune_grid_cache(cache_dir: str, max_bytes: int, keep: Optional[str] = None) -> int:
+    """총 크기가 max_bytes 이하가 될 때까지 오래 안 쓴 항목부터 삭제. 삭제 수 반환."""
+    entries: dict[str, dict] = {}
+    try:
+        scan = list(os.scandir(cache_dir))
+    except OSError:
+        return 0
+    for e in scan:
+        key, ext = os.path.splitext(e.name)
+        if ext not in (".npy", ".json") or ".tmp" in e.name or not e.is_file():
+            continue    # 쓰는 중인 tmp 는 건드리지 않음
+        try:
+            st = e.stat()
+        except OSError:
+            continue
+        item = entries.setdefault(key, {"bytes": 0, "last_used": 0.0, "has_npy": False})
+        item["bytes"] += int(st.st_size)
+        if ext == ".npy":
+            item["last_used"] = st.st_mtime
+            item["has_npy"] = True
+        elif not item["has_npy"]:
+            item["last_used"] = st.st_mtime     # .json 만 있는 원본 정보 항목
+
+    total = sum(v["bytes"] for v in entries.values())
+    evicted = 0
+    for key, item in sorted(entries.items(), key=lambda kv: kv[1]["last_used"]):
+        if total <= max_bytes:
+            break
+        if key == keep:
+            continue
+        for path in _entry_paths(cache_dir, key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        total -= item["bytes"]
+        evicted += 1
+    return evicted
@@ -1,113 +1,22 @@
 # python/maked_package/nc_tools/nc_grid.py
 from __future__ import annotations
 
+import gzip
 import json
 import sys
+import zlib
 import numpy as np
-import xarray as xr
 import warnings
+from typing import TYPE_CHECKING
 
-def _pick_field(ds, candidates=("CFZH", "DBZH")):
-    for f in candidates:
-        if f in ds.data_vars:
-            return f
-    raise KeyError(f"None of fields {candidates} found")
+from ..cli_flags import parse_cli_flags
+from ..config import NCGRID_AZ_QUANTUM_DEG, NCGRID_CACHE_ENABLED
+from .dbz_scale import NODATA, V_MAX_DBZ, V_MIN_DBZ, quantize_dbz_to_u8
+from .grid_bins import gridify_max
+from .grid_cache import grid_cache_dir, load_cached_grid, store_cached_grid
 
-
-def _get_sweep_bounds(ds):
-    start = ds["sweep_start_ray_index"].values.astype(int)
-    end = ds["sweep_end_ray_index"].values.astype(int) + 1
-    return start, end
-
-
-def _extract_sweep(ds, field: str, sweep_idx: int):
-    start, end = _get_sweep_bounds(ds)
-    i0, i1 = int(start[sweep_idx]), int(end[sweep_idx])
-
-    az = ds["azimuth"].isel(time=slice(i0, i1)).values.astype(np.float32)  # (nrays,)
-    r = ds["range"].values.astype(np.float32)  # (ngates_max,)
-    ng_max = int(r.shape[0])
-    nrays = int(az.shape[0])
-
-    v = ds[field]
-
-    if "n_points" in v.dims:
-        ray_start = ds["ray_start_index"].values.astype(int)[i0:i1]  # (nrays,)
-
-        # ✅ ray마다 실제 gate 수 (없으면 전부 ng_max로 fallback)
-        if "ray_n_gates" in ds:
-            ray_ng = ds["ray_n_gates"].isel(time=slice(i0, i1)).values.astype(int)
-        else:
-            ray_ng = np.full((nrays,), ng_max, dtype=int)
-
-        arr = v.values.astype(np.float32)  # (n_points,)
-
-        Z = np.full((nrays, ng_max), np.nan, dtype=np.float32)
-
-        for k, sidx in enumerate(ray_start):
-            n = int(ray_ng[k])
-            if n <= 0:
-                continue
-
-            # ✅ 안전장치: 파일 끝 넘지 않게
-            n = min(n, ng_max, int(arr.shape[0] - sidx))
-            if n <= 0:
-                continue
-
-            Z[k, :n] = arr[sidx : sidx + n]
-
-    else:
-        # (time, range) 형태면 range 길이가 고정이므로 그대로 사용
-        Z = v.isel(time=slice(i0, i1)).values.astype(np.float32)
-
-        # 혹시라도 range가 ng_max보다 짧은 케이스 방어
-        if Z.ndim == 2 and Z.shape[1] != ng_max:
-            Z2 = np.full((Z.shape[0], ng_max), np.nan, dtype=np.float32)
-            n = min(ng_max, Z.shape[1])
-            Z2[:, :n] = Z[:, :n]
-            Z = Z2
-
-    return az, r, Z
-
-
-def _polar_to_xy(az_deg, r_m):
-    th = np.deg2rad(az_deg)
-    R, TH = np.meshgrid(r_m, th)  # (nrays, ngates)
-    X = R * np.sin(TH)
-    Y = R * np.cos(TH)
-    return X, Y
-
-
-def _gridify_max(X_m, Y_m, Z, xk, yk):
-    dx = float(xk[1] - xk[0])
-    dy = float(yk[1] - yk[0])
-
-    x_edges = np.concatenate(([xk[0] - dx / 2], xk + dx / 2))
-    y_edges = np.concatenate(([yk[0] - dy / 2], yk + dy / 2))
-
-    x = (X_m / 1000.0).ravel()
-    y = (Y_m / 1000.0).ravel()
-    z = Z.ravel()
-
-    m = np.isfinite(z)
-    x = x[m]
-    y = y[m]
-    z = z[m]
-
-    ix = np.searchsorted(x_edges, x, side="right") - 1
-    iy = np.searchsorted(y_edges, y, side="right") - 1
-
-    nx = xk.shape[0]
-    ny = yk.shape[0]
-    inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
-    ix = ix[inside]
-    iy = iy[inside]
-    z = z[inside]
-
-    out = np.full((ny, nx), -np.inf, dtype=np.float32)
-    np.maximum.at(out, (iy, ix), z)
-    out = np.where(out == -np.inf, np.nan, out)
-    return out
+if TYPE_CHECKING:
+    from .radar_volume import RadarVolume
 
 
 def _low_level_priority(grids):
@@ -142,38 +51,115 @@ def _nanmax_composite(grids: list[np.ndarray]) -> np.ndarray:
     return out
 
 
-def nc_grid_main(argv: list[str]) -> int:
-    # argv: path field composite gridResKm gridExtentKm maskBelowDbz
-    path = argv[0]
-    field = argv[1] if len(argv) > 1 else None
+def parse_grid_args(argv: list[str]) -> dict:
+    """ncgrid 위치 인자 → 파라미터 dict. argv: path field composite gridResKm gridExtentKm maskBelowDbz"""
     composite = (argv[2] if len(argv) > 2 else "max").lower()
-    grid_res_km = float(argv[3]) if len(argv) > 3 else 1.0
-    grid_extent_km = float(argv[4]) if len(argv) > 4 else 240.0
-    mask_below = float(argv[5]) if len(argv) > 5 else 0.0
-
     if composite not in ("max", "low"):
         composite = "max"
+    return {
+        "path": argv[0],
+        "field": argv[1] if len(argv) > 1 else None,
+        "composite": composite,
+        "grid_res_km": float(argv[3]) if len(argv) > 3 else 1.0,
+        "grid_extent_km": float(argv[4]) if len(argv) > 4 else 240.0,
+        "mask_below": float(argv[5]) if len(argv) > 5 else 0.0,
+    }
 
-    # 파일 닫힘 보장
-    with xr.open_dataset(path) as ds:
-        if not field or field not in ds.data_vars:
-            field = _pick_field(ds, ("CFZH", "DBZH"))
-
-        xk = np.arange(-grid_extent_km, grid_extent_km + grid_res_km, grid_res_km, dtype=np.float32)
-        yk = np.arange(-grid_extent_km, grid_extent_km + grid_res_km, grid_res_km, dtype=np.float32)
-
-        start, _ = _get_sweep_bounds(ds)
-        nsweeps = len(start)
-
-        grids: list[np.ndarray] = []
-        for s in range(nsweeps):
-            az, r, Z = _extract_sweep(ds, field, s)
-            if mask_below is not None:
-                Z = Z.copy()
-                Z[Z < mask_below] = np.nan
-            X, Y = _polar_to_xy(az, r)
-            G = _gridify_max(X, Y, Z, xk, yk)
-            grids.append(G)
+
+# -------------------------------------------------------------
+#  ROI (--bbox=xmin,ymin,xmax,ymax, km, 레이더 기준 x=동 / y=북)
+#
+#  전체 격자(±gridExtentKm, gridResKm)와 같은 칸 중심을 쓰고 bbox 와 겹치는 칸만 남긴다
+#  → ROI 결과 = 전체 격자의 잘라낸 부분 (전체 격자 캐시가 있으면 잘라서 바로 응답).
+#  계산할 때는 bbox 가장자리까지의 거리 구간 밖 gate 를 미리 잘라내서 (ray, gate) 비닝 양 자체를 줄인다.
+#  header += {"bbox", "x0Km", "y0Km"}  (x0Km / y0Km = [0, 0] 칸 중심, 행 0 = 남쪽)
+# -------------------------------------------------------------
+def parse_bbox(text: str) -> tuple[float, float, float, float]:
+    """"xmin,ymin,xmax,ymax" (km) → tuple."""
+    vals = [float(v) for v in text.split(",")]
+    if len(vals) != 4 or vals[0] >= vals[2] or vals[1] >= vals[3]:
+        raise ValueError(f"bbox 는 xmin,ymin,xmax,ymax (km) 이어야 합니다: {text}")
+    return vals[0], vals[1], vals[2], vals[3]
+
+
+def _axis_window(k: np.ndarray, lo: float, hi: float, half: float) -> tuple[int, int]:
+    idx = np.flatnonzero((k + half > lo) & (k - half < hi))
+    if idx.size == 0:
+        raise ValueError("bbox 가 격자 범위 밖입니다")
+    i0, i1 = int(idx[0]), int(idx[-1]) + 1
+    if i1 - i0 < 2:     # 칸 간격을 xk[1] - xk[0] 으로 구하므로 최소 2칸
+        i0, i1 = (i0, i0 + 2) if i0 + 2 <= k.size else (i1 - 2, i1)
+    return i0, i1
+
+
+def grid_axes(
+    grid_res_km: float,
+    grid_extent_km: float,
+    bbox: tuple[float, float, float, float] | None = None,
+) -> tuple[np.ndarray, np.ndarray, int, int]:
+    """(xk, yk, ix0, iy0). bbox 가 있으면 전체 축에서 겹치는 구간만 (ix0/iy0 = 전체 격자 기준 시작 칸)."""
+    k = np.arange(-grid_extent_km, grid_extent_km + grid_res_km, grid_res_km, dtype=np.float32)
+    if bbox is None:
+        return k, k.copy(), 0, 0
+    half = grid_res_km / 2.0
+    ix0, ix1 = _axis_window(k, bbox[0], bbox[2], half)
+    iy0, iy1 = _axis_window(k, bbox[1], bbox[3], half)
+    return k[ix0:ix1], k[iy0:iy1], ix0, iy0
+
+
+def _gate_window(r_m: np.ndarray, xk: np.ndarray, yk: np.ndarray, grid_res_km: float) -> slice:
+    """xk/yk 칸 영역에 들어갈 수 있는 gate 구간 (거리 기준, 한 칸 여유)."""
+    half = grid_res_km / 2.0
+    x_lo, x_hi = float(xk[0]) - half, float(xk[-1]) + half
+    y_lo, y_hi = float(yk[0]) - half, float(yk[-1]) + half
+    r_max = max(np.hypot(x, y) for x in (x_lo, x_hi) for y in (y_lo, y_hi))
+    r_min = float(np.hypot(min(max(0.0, x_lo), x_hi), min(max(0.0, y_lo), y_hi)))
+    g0 = int(np.searchsorted(r_m, (r_min - grid_res_km) * 1000.0, side="left"))
+    g1 = int(np.searchsorted(r_m, (r_max + grid_res_km) * 1000.0, side="right"))
+    return slice(g0, g1)
+
+
+def _roi_header(header: dict, xk: np.ndarray, yk: np.ndarray, bbox) -> dict:
+    return {**header, "nx": int(xk.shape[0]), "ny": int(yk.shape[0]),
+            "bbox": [float(v) for v in bbox], "x0Km": float(xk[0]), "y0Km": float(yk[0])}
+
+
+def crop_grid(header: dict, grid: np.ndarray, bbox) -> tuple[dict, np.ndarray]:
+    """전체 격자 → bbox ROI (composite_grid(..., bbox) 와 같은 칸)."""
+    xk, yk, ix0, iy0 = grid_axes(header["gridResKm"], header["gridExtentKm"], bbox)
+    sub = np.ascontiguousarray(grid[iy0:iy0 + yk.shape[0], ix0:ix0 + xk.shape[0]])
+    return _roi_header(header, xk, yk, bbox), sub
+
+
+def composite_grid(
+    vol: RadarVolume,
+    field: str | None,
+    composite: str,
+    grid_res_km: float,
+    grid_extent_km: float,
+    mask_below: float,
+    bbox: tuple[float, float, float, float] | None = None,
+) -> tuple[dict, np.ndarray]:
+    """열린 볼륨 → (header, (ny, nx) float32 합성 격자). nc_grid_main / serve 공용."""
+    if not field or field not in vol.ds.data_vars:
+        field = vol.pick_field(("CFZH", "DBZH"))
+
+    xk, yk, _, _ = grid_axes(grid_res_km, grid_extent_km, bbox)
+    # binner 는 격자 캐시 디렉토리에 같이 둔다 → 다음 프로세스 / 같은 기하의 다른 파일이 재사용
+    bin_dir = grid_cache_dir(vol.path) if NCGRID_CACHE_ENABLED and vol.path else None
+
+    grids: list[np.ndarray] = []
+    for s in range(vol.sweep_count):
+        # 뷰 — 변수 디코드/ragged 언팩은 RadarVolume 이 파일당 1회만 한다
+        az, r, Z = vol.sweep(field, s)
+        if bbox is not None:
+            # ROI 에 닿을 수 없는 거리의 gate 는 비닝 전에 제외
+            gs = _gate_window(r, xk, yk, grid_res_km)
+            r, Z = r[gs], Z[:, gs]
+        # (ray, gate) → 격자 칸 매핑은 기하가 같으면 재사용 (메모리 / bin_dir), max 는 reduceat
+        G = gridify_max(az, r, Z, xk, yk, mask_below=mask_below, az_quantum=NCGRID_AZ_QUANTUM_DEG,
+                        bin_dir=bin_dir)
+        grids.append(G)
 
     if composite == "low":
         Gc = _low_level_priority(grids).astype(np.float32, copy=False)
@@ -191,10 +177,161 @@ def nc_grid_main(argv: list[str]) -> int:
         "gridExtentKm": float(grid_extent_km),
         "maskBelowDbz": float(mask_below),
     }
+    if NCGRID_AZ_QUANTUM_DEG > 0:
+        header["azQuantumDeg"] = NCGRID_AZ_QUANTUM_DEG
+    if bbox is not None:
+        header = _roi_header(header, xk, yk, bbox)
+    return header, Gc.astype(np.float32, copy=False)
+
+
+def cached_grid(path: str, params: dict) -> tuple[dict, np.ndarray] | None:
+    """디스크 캐시: 같은 파라미터 → 그대로, ROI 면 전체 격자 캐시를 잘라서."""
+    hit = load_cached_grid(path, params)
+    if hit is None and params.get("bbox") is not None:
+        full = load_cached_grid(path, {**params, "bbox": None})
+        if full is not None:
+            hit = crop_grid(*full, params["bbox"])
+    return hit
+
+
+# -------------------------------------------------------------
+#  다해상도 (--pyramid=1,2,4,8)
+#
+#  한 번 계산한 격자(gate → 칸 매핑 1회)에서 k×k 블록 max 로 여러 해상도를 만든다.
+#  블록은 [0, 0] 칸(남서쪽)부터, 끝이 모자라면 NaN 으로 채워서 묶는다.
+#  header += {"levels": [{"factor", "gridResKm", "nx", "ny", "x0Km", "y0Km", "offset", "bytes"}, ...]}
+#  payload = 레벨 순서대로 이어 붙인 값 (offset / bytes 는 압축을 푼 payload 기준)
+# -------------------------------------------------------------
+def parse_pyramid(text: str) -> list[int]:
+    """"1,2,4" → [1, 2, 4]. 빈 값 = 1,2,4,8."""
+    factors = sorted({int(v) for v in (text or "1,2,4,8").split(",")})
+    if factors[0] < 1:
+        raise ValueError(f"pyramid 배율은 1 이상: {text}")
+    return factors
+
+
+def block_max(grid: np.ndarray, k: int) -> np.ndarray:
+    """(ny, nx) → (ceil(ny/k), ceil(nx/k)) 블록 max. 전부 NaN 인 블록 = NaN (fmax 라 경고 없음)."""
+    if k == 1:
+        return grid
+    ny, nx = grid.shape
+    py, px = -ny % k, -nx % k
+    g = np.pad(grid, ((0, py), (0, px)), constant_values=np.nan) if py or px else grid
+    g = g.reshape((ny + py) // k, k, (nx + px) // k, k)
+    return np.fmax.reduce(np.fmax.reduce(g, axis=3), axis=1)
+
+
+# -------------------------------------------------------------
+#  출력 인코딩 (opt-in, 기본은 기존 그대로 raw float32 + header 변화 없음)
+#
+#    --encoding=u8      dbz_scale 규칙으로 uint8 (255 = NODATA, maskBelowDbz 미만도 NODATA)
+#                       header += {"encoding": "u8", "scale", "offset", "nodata"}
+#                       dBZ = offset + u8 * scale   (브라우저는 색칠 / 임계값만 하므로 충분)
+#    --compress=zlib|gzip  payload 전체 압축 (cat08_bin 과 같은 선택지, header 줄은 평문)
+#                       header += {"compression", "rawBytes"}
+#                       브라우저: DecompressionStream("deflate" | "gzip")
+# -------------------------------------------------------------
+GRID_ENCODINGS = ("f32", "u8")
+GRID_COMPRESSIONS = ("none", "zlib", "gzip")
+
+
+def _level_values(header: dict, grid: np.ndarray, encoding: str) -> np.ndarray:
+    if encoding == "u8":
+        return quantize_dbz_to_u8(np.asarray(grid, dtype=np.float32), float(header["maskBelowDbz"]))
+    return np.ascontiguousarray(grid, dtype=np.float32)
+
+
+def encode_grid(
+    header: dict,
+    grid: np.ndarray,
+    encoding: str | None = None,
+    compression: str | None = None,
+    pyramid: list[int] | None = None,
+) -> tuple[dict, memoryview]:
+    """(header, (ny, nx) float32) → (출력 header, payload). 기본값이면 header 그대로 + 복사 없는 float32."""
+    encoding = (encoding or "f32").lower()
+    compression = (compression or "none").lower()
+    if encoding not in GRID_ENCODINGS:
+        raise ValueError(f"지원하지 않는 encoding: {encoding}")
+    if compression not in GRID_COMPRESSIONS:
+        raise ValueError(f"지원하지 않는 compression: {compression}")
+
+    out = dict(header)
+    if encoding == "u8":
+        out.update({"encoding": "u8", "scale": (V_MAX_DBZ - V_MIN_DBZ) / 254.0,
+                    "offset": V_MIN_DBZ, "nodata": NODATA})
+    elif compression != "none" or pyramid:
+        out["encoding"] = "f32"
+
+    if pyramid:
+        res = float(header["gridResKm"])
+        x0 = float(header.get("x0Km", -header["gridExtentKm"]))
+        y0 = float(header.get("y0Km", -header["gridExtentKm"]))
+        levels, parts, offset = [], [], 0
+        for k in pyramid:
+            data = _level_values(header, block_max(grid, k), encoding)
+            parts.append(data)
+            levels.append({"factor": k, "gridResKm": res * k, "nx": int(data.shape[1]), "ny": int(data.shape[0]),
+                           "x0Km": x0 + (k - 1) * res / 2.0, "y0Km": y0 + (k - 1) * res / 2.0,
+                           "offset": offset, "bytes": int(data.nbytes)})
+            offset += int(data.nbytes)
+        out["levels"] = levels
+        payload = memoryview(b"".join(memoryview(d).cast("B") for d in parts))
+    else:
+        payload = memoryview(_level_values(header, grid, encoding)).cast("B")
+
+    if compression != "none":
+        raw_bytes = payload.nbytes
+        packed = zlib.compress(payload, 6) if compression == "zlib" else gzip.compress(payload, 6, mtime=0)
+        payload = memoryview(packed)
+        out.update({"compression": compression, "rawBytes": raw_bytes})
+    return out, payload
 
-    # ✅ 중요: 첫 줄 header + '\n' + raw float32
+
+def _write_grid(header: dict, payload) -> None:
+    # ✅ 중요: 첫 줄 header + '\n' + payload (기본 raw float32)
     sys.stdout.write(json.dumps(header, ensure_ascii=False) + "\n")
     sys.stdout.flush()
-    sys.stdout.buffer.write(Gc.astype(np.float32, copy=False).tobytes(order="C"))
+    sys.stdout.buffer.write(payload)
     sys.stdout.buffer.flush()
+
+
+def nc_grid_main(argv: list[str]) -> int:
+    # argv: path field composite gridResKm gridExtentKm maskBelowDbz
+    #       [--no-cache] [--encoding=u8] [--compress=zlib] [--bbox=xmin,ymin,xmax,ymax] [--pyramid=1,2,4]
+    argv, flags = parse_cli_flags(argv)
+    p = parse_grid_args(argv)
+    path = p.pop("path")
+    use_cache = NCGRID_CACHE_ENABLED and "no-cache" not in flags
+    encoding = flags.get("encoding") or None
+    compression = flags.get("compress") or None
+    if (encoding or "f32").lower() not in GRID_ENCODINGS or (compression or "none").lower() not in GRID_COMPRESSIONS:
+        print(f"[ncgrid] --encoding={'|'.join(GRID_ENCODINGS)} --compress={'|'.join(GRID_COMPRESSIONS)}", file=sys.stderr)
+        return 2
+    try:
+        p["bbox"] = parse_bbox(flags["bbox"]) if flags.get("bbox") else None
+        pyramid = parse_pyramid(flags["pyramid"]) if "pyramid" in flags else None
+    except ValueError as e:
+        print(f"[ncgrid] {e}", file=sys.stderr)
+        return 2
+
+    # 캐시 hit: .npy 를 mmap 해서 그대로 출력 (xarray import 없이)
+    cached = cached_grid(path, p) if use_cache else None
+    if cached is not None:
+        _write_grid(*encode_grid(*cached, encoding, compression, pyramid))
+        return 0
+
+    from .radar_volume import RadarVolume
+
+    # 파일 닫힘 보장
+    with RadarVolume.open(path) as vol:
+        header, Gc = composite_grid(vol, **p)
+
+    # 응답을 먼저 내보내고 캐시는 그 뒤에 저장 (캐시는 항상 float32 원본)
+    _write_grid(*encode_grid(header, Gc, encoding, compression, pyramid))
+    if use_cache:
+        try:
+            store_cached_grid(path, p, header, Gc)
+        except OSError as e:
+            print(f"[ncgrid] 캐시 저장 실패: {e}", file=sys.stderr)
     return 0
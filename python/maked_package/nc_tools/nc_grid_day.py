@@ -0,0 +1,178 @@
+# python/maked_package/nc_tools/nc_grid_day.py
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from ..cli_flags import parse_cli_flags
+from ..config import NCGRID_CACHE_ENABLED
+from .grid_cache import load_source_info, store_cached_grid, store_source_info
+from .nc_grid import cached_grid, composite_grid, parse_bbox, parse_grid_args
+from .dbz_scale import NODATA, V_MAX_DBZ, V_MIN_DBZ, quantize_dbz_to_u8
+from .nc_render_day import list_nc_files_sorted, safe_time_label
+from .radar_volume import RadarVolume
+
+# -------------------------------------------------------------
+#  하루치 ncgrid 합성 격자 → (time, ny, nx) 큐브 한 개
+#
+#  <out_dir>/grid_cube.npy    (time, ny, nx) float32 (NaN = 값 없음)
+#                             또는 --u8: uint8 (quantize_dbz_to_u8 규칙, 255 = NODATA)
+#  <out_dir>/grid_cube.json   {"grid": nc_grid header, "dtype", "shape", "time": [...], "files": [...], "u8": {...}}
+#
+#  - .npy 라서 np.load(path, mmap_mode="r") 로 열면 프레임 / 픽셀 시계열 / 창을 NetCDF 없이 바로 슬라이스
+#      cube[t]            한 프레임
+#      cube[:, iy, ix]    한 점의 하루 시계열
+#  - 파일별 격자는 ncgrid 디스크 캐시(grid_cache)를 같이 쓴다 → 미리보기에서 본 프레임은 다시 계산 안 함
+#    시각 라벨도 캐시(store_source_info)에 두므로 격자·라벨이 다 있으면 NetCDF 를 열지 않는다
+#  - 큐브는 tmp 에 np.lib.format.open_memmap 으로 채운 뒤 os.replace (쓰는 중인 큐브가 안 보임)
+#  - 읽기 실패한 파일은 NaN(또는 NODATA) 프레임 + files[i].error 로 남긴다 (time 축 길이 유지)
+# -------------------------------------------------------------
+CUBE_FILE = "grid_cube.npy"
+CUBE_META_FILE = "grid_cube.json"
+
+
+def _file_grid(nc_path: str, params: dict, use_cache: bool) -> tuple[dict, np.ndarray, str | None]:
+    """nc 파일 하나 → (grid header, (ny, nx) float32, 시각 라벨)."""
+    cached = cached_grid(nc_path, params) if use_cache else None
+    info = load_source_info(nc_path) if cached is not None else None
+    if info is not None:
+        # 격자도 시각 라벨도 캐시에 있음 → NetCDF 를 열지 않음
+        return cached[0], cached[1], info.get("timeLabel")
+
+    with RadarVolume.open(nc_path) as vol:
+        label = safe_time_label(vol.ds)
+        header, Gc = cached if cached is not None else composite_grid(vol, **params)
+
+    if use_cache:
+        try:
+            if cached is None:
+                store_cached_grid(nc_path, params, header, Gc)
+            store_source_info(nc_path, {"timeLabel": label})
+        except OSError as e:
+            print(f"[ncgrid_day] 캐시 저장 실패: {e}", file=sys.stderr)
+    return header, Gc, label
+
+
+def build_grid_cube(
+    nc_files: list[str],
+    out_dir: str,
+    params: dict,
+    weak_cut_dbz: float | None = None,
+    use_cache: bool = True,
+) -> dict:
+    """
+    nc_files 를 순서대로 격자화해서 out_dir/grid_cube.npy (+ .json) 작성. 메타 dict 반환.
+    weak_cut_dbz 를 주면 uint8 큐브 (quantize_dbz_to_u8), 아니면 float32.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    cube_path = os.path.join(out_dir, CUBE_FILE)
+    tmp_path = f"{cube_path}.{os.getpid()}.tmp.npy"
+    as_u8 = weak_cut_dbz is not None
+    n = len(nc_files)
+
+    cube = None
+    grid_header = None
+    times: list[str | None] = []
+    files: list[dict] = []
+    t0 = time.perf_counter()
+    try:
+        for i, nc_path in enumerate(nc_files):
+            name = os.path.basename(nc_path)
+            try:
+                header, Gc, label = _file_grid(nc_path, params, use_cache)
+            except Exception as e:
+                print(f"[{i + 1}/{n}] 실패 {name}: {e}", file=sys.stderr)
+                times.append(None)
+                files.append({"name": name, "ok": False, "error": f"{type(e).__name__}: {e}"})
+                continue
+
+            if cube is None:
+                # 첫 성공 파일에서 격자 크기 확정. 앞쪽 실패 프레임은 채움값 그대로
+                grid_header = {k: v for k, v in header.items() if k != "field"}
+                cube = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint8 if as_u8 else np.float32,
+                                                 shape=(n, int(header["ny"]), int(header["nx"])))
+                cube[...] = NODATA if as_u8 else np.nan
+            cube[i] = quantize_dbz_to_u8(Gc, weak_cut_dbz) if as_u8 else Gc
+            times.append(label)
+            files.append({"name": name, "ok": True, "field": header["field"]})
+            print(f"[{i + 1}/{n}] {name} {label or '-'}", flush=True)
+
+        if cube is None:
+            raise RuntimeError("격자화에 성공한 nc 파일이 없습니다")
+        cube.flush()
+        shape = [int(s) for s in cube.shape]
+        dtype = str(cube.dtype)
+        del cube
+        os.replace(tmp_path, cube_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    meta = {
+        "cube": CUBE_FILE,
+        "dtype": dtype,
+        "shape": shape,             # [time, ny, nx]
+        "grid": grid_header,
+        "time": times,
+        "files": files,
+        "u8": {
+            "weakCutDbz": float(weak_cut_dbz),
+            "vMinDbz": V_MIN_DBZ,
+            "vMaxDbz": V_MAX_DBZ,
+            "nodata": NODATA,
+            # dBZ = vMinDbz + u8 / 254 * (vMaxDbz - vMinDbz)  (u8_to_dbz)
+        } if as_u8 else None,
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+    meta_path = os.path.join(out_dir, CUBE_META_FILE)
+    tmp = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, meta_path)
+    return meta
+
+
+def load_grid_cube(out_dir: str) -> tuple[dict, np.ndarray]:
+    """(메타, mmap 된 (time, ny, nx) 큐브)."""
+    with open(os.path.join(out_dir, CUBE_META_FILE), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    return meta, np.load(os.path.join(out_dir, meta.get("cube") or CUBE_FILE), mmap_mode="r")
+
+
+def nc_grid_day_main(argv: list[str]) -> int:
+    """
+    argv:
+      [input_dir, out_dir, field?, composite?, gridResKm?, gridExtentKm?, maskBelowDbz?]
+      --u8[=weakCutDbz]  uint8 큐브로 저장 (weak cut 기본 = maskBelowDbz)
+      --bbox=xmin,ymin,xmax,ymax  ROI (km) 만 큐브로 (ncgrid --bbox 와 같은 칸)
+      --no-cache         ncgrid 디스크 캐시를 쓰지 않음
+    """
+    argv, flags = parse_cli_flags(argv)
+    if len(argv) < 2:
+        print("nc_grid_day_main: need input_dir out_dir", file=sys.stderr)
+        return 2
+
+    input_dir, out_dir = argv[0], argv[1]
+    # 나머지는 ncgrid 와 같은 순서 (path 자리는 파일마다 채움)
+    params = parse_grid_args(["", *argv[2:]])
+    params.pop("path")
+    params["bbox"] = parse_bbox(flags["bbox"]) if flags.get("bbox") else None
+    weak_cut_dbz = None
+    if "u8" in flags:
+        weak_cut_dbz = float(flags["u8"]) if flags["u8"] else params["mask_below"]
+
+    nc_files = list_nc_files_sorted(input_dir)
+    if not nc_files:
+        print(f"nc 파일이 없습니다: {input_dir}", file=sys.stderr)
+        return 1
+
+    meta = build_grid_cube(nc_files, out_dir, params, weak_cut_dbz,
+                           use_cache=NCGRID_CACHE_ENABLED and "no-cache" not in flags)
+    failed = sum(1 for f in meta["files"] if not f["ok"])
+    print(f"[완료] {os.path.join(out_dir, CUBE_FILE)} shape={meta['shape']} dtype={meta['dtype']} "
+          f"failed={failed} {meta['seconds']}s")
+    return 0
@@ -18,10 +18,8 @@ def _scalar_float(ds, name: str):
     except Exception:
         return None
 
-def nc_meta_main(argv: list[str]) -> int:
-    path = argv[0]
-    ds = xr.open_dataset(path)
-
+def nc_meta(ds, path: str) -> dict:
+    """열린 Dataset → 메타 dict. nc_meta_main / serve 공용."""
     data_vars = sorted(list(ds.data_vars.keys()))
     coords = sorted(list(ds.coords.keys()))
     dims = {k: int(v) for k, v in ds.dims.items()}
@@ -53,6 +51,11 @@ def nc_meta_main(argv: list[str]) -> int:
             meta["fixed_angle"] = [float(x) for x in fa]
         except Exception:
             pass
+    return meta
 
-    print(json.dumps(meta, ensure_ascii=False))
+
+def nc_meta_main(argv: list[str]) -> int:
+    path = argv[0]
+    ds = xr.open_dataset(path)
+    print(json.dumps(nc_meta(ds, path), ensure_ascii=False))
     return 0
@@ -10,10 +10,21 @@ import numpy as np
 import xarray as xr
 from PIL import Image
 import subprocess
-
-V_MIN_DBZ = -10.0
-V_MAX_DBZ = 70.0
-NODATA = 255
+import queue
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from .radar_volume import RadarVolume
+from ..cli_flags import parse_cli_flags
+from .dbz_scale import NODATA, quantize_dbz_to_u8, u8_to_dbz
+from .polar_lut import AZ_QUANTUM_DEG, get_polar_lut, polar_range_count, remap_with_lut
+from .render_state import (entry_is_current, forget_entry, load_composite, load_render_state,
+                           save_render_state, source_signature, store_composite)
+
+STATE_SAVE_INTERVAL_S = 2.0     # 렌더 중 상태 파일 저장 주기
 
 DBZ_LEVELS = [-10, 0, 5, 10, 15, 20, 25, 30, 35, 40, 45, 50, 55, 60, 65, 70]
 PALETTE = [
@@ -107,63 +118,101 @@ def run_ffmpeg_make_mp4(out_dir: str, date_ymd: str, fps: int = 10, save_ext: st
     return out_mp4_abs
 
 
-def infer_ymd_from_path(p: str) -> str:
-    m = re.search(r"(20\d{6})", p)  # 20000101~20991231 정도
-    return m.group(1) if m else "out"
-
-
-def extract_dbzh_time_range(ds: xr.Dataset) -> np.ndarray:
-    if "DBZH" not in ds.data_vars:
-        raise KeyError("DBZH 변수가 없습니다.")
-
-    dbz = ds["DBZH"]
+def ffmpeg_rawvideo_cmd(width: int, height: int, out_mp4_name: str, fps: int = 10) -> list[str]:
+    # run_ffmpeg_make_mp4 와 같은 출력 옵션, 입력만 stdin rawvideo(rgb24)
+    return [
+        "ffmpeg",
+        "-y",
+        "-f", "rawvideo",
+        "-pix_fmt", "rgb24",
+        "-s", f"{int(width)}x{int(height)}",
+        "-framerate", str(fps),
+        "-i", "-",
 
-    if "time" in dbz.dims and "range" in dbz.dims:
-        return dbz.transpose("time", "range").values.astype(np.float32, copy=False)
+        "-c:v", "libx264",
+        "-profile:v", "high",
+        "-pix_fmt", "yuv420p",
+        "-an",
+        "-movflags", "+faststart",
 
-    if "n_points" in dbz.dims:
-        if "ray_start_index" not in ds.data_vars or "ray_n_gates" not in ds.data_vars:
-            raise KeyError("n_points인데 ray_start_index/ray_n_gates가 없어 언팩 불가")
+        out_mp4_name,
+    ]
 
-        n_time = int(ds.sizes.get("time", 0))
-        n_range = int(ds.sizes.get("range", 0))
 
-        start_idx = ds["ray_start_index"].values.astype(np.int64, copy=False)
-        n_gates = ds["ray_n_gates"].values.astype(np.int64, copy=False)
-        flat = dbz.values.astype(np.float32, copy=False)
+class FfmpegFrameSink:
+    """
+    렌더 중인 RGB 프레임을 ffmpeg stdin 으로 바로 흘려 mp4 를 만든다 (frames/ 파일 왕복 없음).
+    write() 는 프레임 순서대로 불러야 한다. ffmpeg 가 도중에 죽으면 이후 write 는 버리고
+    close() 에서 RuntimeError (반쯤 쓴 mp4 는 지움).
+    """
 
-        out = np.full((n_time, n_range), np.nan, dtype=np.float32)
-        for i in range(n_time):
-            si = int(start_idx[i])
-            ng = int(n_gates[i])
-            if ng <= 0:
-                continue
-            ng2 = min(ng, n_range)
-            out[i, :ng2] = flat[si:si + ng2]
-        return out
+    def __init__(self, out_dir: str, date_ymd: str, width: int, height: int, fps: int = 10):
+        self.out_mp4 = os.path.join(out_dir, f"{date_ymd}.mp4")
+        self.shape = (int(height), int(width), 3)
+        self.frames = 0
+        self.error: Exception | None = None
 
-    raise ValueError(f"지원하지 않는 DBZH dims: {dbz.dims}")
+        cmd = ffmpeg_rawvideo_cmd(width, height, os.path.basename(self.out_mp4), fps=fps)
+        print("[ffmpeg] " + " ".join(cmd))
+        # stderr 는 파일로 (PIPE 로 두고 안 읽으면 ffmpeg 로그가 차서 멈춤)
+        self._log = tempfile.TemporaryFile()
+        try:
+            self._proc = subprocess.Popen(cmd, cwd=out_dir, stdin=subprocess.PIPE,
+                                          stdout=subprocess.DEVNULL, stderr=self._log)
+        except BaseException:
+            self._log.close()
+            raise
+
+    def write(self, rgb: np.ndarray) -> None:
+        if self.error is not None:
+            return
+        if rgb.shape != self.shape or rgb.dtype != np.uint8:
+            raise ValueError(f"frame shape {rgb.shape}/{rgb.dtype} != {self.shape}/uint8")
+        try:
+            self._proc.stdin.write(np.ascontiguousarray(rgb).data)
+            self.frames += 1
+        except OSError as e:        # BrokenPipeError 포함
+            self.error = e
 
+    def _log_text(self) -> str:
+        self._log.seek(0)
+        return self._log.read().decode("utf-8", "replace")[-4000:]
 
-def quantize_dbz_to_u8(dbz: np.ndarray, weak_cut_dbz: float) -> np.ndarray:
-    out = np.empty(dbz.shape, dtype=np.uint8)
-    m = np.isfinite(dbz)
-    out[~m] = np.uint8(NODATA)
+    def close(self) -> str:
+        """stdin 을 닫고 ffmpeg 종료를 기다린다. 성공하면 mp4 경로."""
+        try:
+            self._proc.stdin.close()
+        except OSError as e:
+            self.error = self.error or e
+        rc = self._proc.wait()
+        log = self._log_text()
+        self._log.close()
+
+        if rc != 0 or self.error is not None:
+            if os.path.exists(self.out_mp4):
+                os.remove(self.out_mp4)
+            raise RuntimeError(f"ffmpeg failed (exit {rc}, frames {self.frames}):\n" + log)
+        if not os.path.exists(self.out_mp4):
+            raise RuntimeError(f"ffmpeg succeeded but mp4 not found: {self.out_mp4}")
+        return self.out_mp4
+
+    def abort(self) -> None:
+        self._proc.kill()
+        self._proc.wait()
+        self._log.close()
+        if os.path.exists(self.out_mp4):
+            os.remove(self.out_mp4)
 
-    mm = m & (dbz >= weak_cut_dbz)
-    out[m & ~mm] = np.uint8(NODATA)
 
-    clipped = np.clip(dbz[mm], V_MIN_DBZ, V_MAX_DBZ)
-    scaled = (clipped - V_MIN_DBZ) / (V_MAX_DBZ - V_MIN_DBZ) * 254.0
-    out[mm] = np.round(scaled).astype(np.uint8)
-    return out
+def infer_ymd_from_path(p: str) -> str:
+    m = re.search(r"(20\d{6})", p)  # 20000101~20991231 정도
+    return m.group(1) if m else "out"
 
 
-def u8_to_dbz(u8: np.ndarray) -> np.ndarray:
-    dbz = np.full(u8.shape, np.nan, dtype=np.float32)
-    m = (u8 != NODATA)
-    dbz[m] = V_MIN_DBZ + (u8[m].astype(np.float32) / 254.0) * (V_MAX_DBZ - V_MIN_DBZ)
-    return dbz
+def extract_dbzh_time_range(ds: xr.Dataset) -> np.ndarray:
+    if "DBZH" not in ds.data_vars:
+        raise KeyError("DBZH 변수가 없습니다.")
+    return RadarVolume(ds).field("DBZH")
 
 
 def dbz_to_rgba_binned(dbz: np.ndarray) -> np.ndarray:
@@ -188,48 +237,12 @@ def dbz_to_rgba_binned(dbz: np.ndarray) -> np.ndarray:
 
 
 def polar_to_grid_fill(u8_ray_range: np.ndarray, az_deg: np.ndarray, r_m: np.ndarray,
-                       grid_size: int, max_range_m: float) -> np.ndarray:
-    H = W = int(grid_size)
-    cx = (W - 1) / 2.0
-    cy = (H - 1) / 2.0
-    meters_per_px = (2 * float(max_range_m)) / (grid_size - 1)
-
-    yy, xx = np.indices((H, W), dtype=np.float32)
-    x_m = (xx - cx) * meters_per_px
-    y_m = -(yy - cy) * meters_per_px
-
-    rr = np.sqrt(x_m * x_m + y_m * y_m)
-    theta = (np.degrees(np.arctan2(x_m, y_m)) + 360.0) % 360.0
-
-    grid = np.full((H, W), np.uint8(NODATA), dtype=np.uint8)
-    in_range = rr <= float(max_range_m)
-    if not np.any(in_range):
-        return grid
-
-    az = az_deg.astype(np.float32, copy=False)
-    order = np.argsort(az)
-    azs = az[order]
-
-    th = theta[in_range].reshape(-1)
-    pos = np.searchsorted(azs, th, side="left")
-    pos = np.clip(pos, 0, len(azs) - 1)
-
-    left = np.clip(pos - 1, 0, len(azs) - 1)
-    right = pos
-    d_left = np.abs(azs[left] - th)
-    d_right = np.abs(azs[right] - th)
-    use_left = d_left <= d_right
-    ray_idx_sorted = np.where(use_left, left, right)
-    ray_idx = order[ray_idx_sorted]
-
-    r0 = float(r_m[0])
-    dr = float(r_m[1] - r_m[0]) if len(r_m) > 1 else 1.0
-    ridx = np.rint((rr[in_range].reshape(-1) - r0) / dr).astype(np.int32)
-    ridx = np.clip(ridx, 0, len(r_m) - 1)
-
-    vals = u8_ray_range[ray_idx, ridx]
-    grid[in_range] = vals.reshape(grid[in_range].shape)
-    return grid
+                       grid_size: int, max_range_m: float,
+                       lut_dir: str | None = None, az_quantum: float = AZ_QUANTUM_DEG) -> np.ndarray:
+    # 역매핑(nearest ray/gate)은 스캔 기하로만 정해지므로 캐시된 LUT 로 gather 한 번
+    # LUT 는 정렬된 방위(rank) 기준 → u8 행을 rays 순서로 모아서 gather
+    lut, rays = get_polar_lut(az_deg, r_m, grid_size, max_range_m, lut_dir=lut_dir, az_quantum=az_quantum)
+    return remap_with_lut(u8_ray_range[rays], lut, grid_size, NODATA)
 
 
 def low_elev_priority_composite(final: np.ndarray, add: np.ndarray) -> np.ndarray:
@@ -238,46 +251,82 @@ def low_elev_priority_composite(final: np.ndarray, add: np.ndarray) -> np.ndarra
     return final
 
 
-def make_composite_u8_for_file(nc_path: str, grid_size: int, weak_cut_dbz: float) -> tuple[np.ndarray, dict]:
+def load_volume(nc_path: str) -> tuple[RadarVolume, dict]:
+    """
+    읽기 단계: 파일 열기 + meta + 첫 sweep(최저 고도) DBZH 읽기.
+    나머지 sweep 은 합성 단계에서 필요할 때만 그 ray 구간만 읽는다 (composite_u8_for_volume).
+    """
+    vol = RadarVolume.open(nc_path)
     try:
-        ds = xr.open_dataset(nc_path, engine="h5netcdf")
-    except Exception:
-        ds = xr.open_dataset(nc_path)  # fallback
-
-    sweep_count = int(ds.sizes.get("sweep", 0))
-    if sweep_count <= 0:
-        raise ValueError("sweep 차원을 찾지 못했습니다.")
-
-    s_start = ds["sweep_start_ray_index"].values.astype(int)
-    s_end = ds["sweep_end_ray_index"].values.astype(int)
-
-    r_m = ds["range"].values.astype(np.float32, copy=False)
-    max_range_m = float(r_m[-1])
+        ds = vol.ds
+
+        sweep_count = int(ds.sizes.get("sweep", 0))
+        if sweep_count <= 0:
+            raise ValueError("sweep 차원을 찾지 못했습니다.")
+        if "DBZH" not in ds.data_vars:
+            raise KeyError("DBZH 변수가 없습니다.")
+
+        vol.sweep_values("DBZH", 0)
+
+        meta = {
+            "time_label": safe_time_label(ds),
+            "radar_lat": float(ds["latitude"].values) if "latitude" in ds.data_vars else float(ds.attrs.get("latitude")),
+            "radar_lon": float(ds["longitude"].values) if "longitude" in ds.data_vars else float(ds.attrs.get("longitude")),
+            "sweep_count": sweep_count,
+            "max_range_m": float(vol.range_m[-1]),
+        }
+    except BaseException:
+        vol.close()
+        raise
+    return vol, meta
+
+
+def composite_u8_for_volume(vol: RadarVolume, meta: dict, grid_size: int, weak_cut_dbz: float,
+                            lut_dir: str | None = None,
+                            az_quantum: float = AZ_QUANTUM_DEG) -> np.ndarray:
+    """
+    낮은 고도 우선 합성. sweep 은 순서대로 그 ray 구간만 읽고,
+    레이더 범위 안 픽셀이 전부 weak cut 이상 값으로 채워지면 남은 sweep 은 읽지 않는다.
+    meta["sweeps_used"] 에 실제로 쓴 sweep 수를 남긴다.
 
-    dbz_tr = extract_dbzh_time_range(ds)
+    조기 종료는 범위 전체에 에코가 있을 때만 걸린다. weak cut 미만(맑은 하늘)이나 관측 없는 칸은
+    위쪽 sweep 이 채울 수 있으므로 (빈칸만 채우는 규칙) "관측됨" 만으로는 멈출 수 없다
+    → 맑은 날은 보통 sweep 전부를 읽는다 (결과는 항상 전체 합성과 같음).
+    """
+    r_m = vol.range_m
+    max_range_m = meta["max_range_m"]
+    # 범위 밖 픽셀은 LUT 가 항상 NODATA 로 보내므로 채워진 수만 세면 남은 칸을 안다
+    remaining = polar_range_count(grid_size, max_range_m)
 
     final = np.full((grid_size, grid_size), np.uint8(NODATA), dtype=np.uint8)
 
-    for s in range(sweep_count):
-        i0 = int(s_start[s])
-        i1 = int(s_end[s]) + 1
-        sl = slice(i0, i1)
-
-        az = ds["azimuth"].values[sl].astype(np.float32, copy=False)
-        dbz = dbz_tr[sl, :].astype(np.float32, copy=False)
+    used = 0
+    for s in range(meta["sweep_count"]):
+        az = vol.azimuth[vol.sweep_slice(s)]
+        dbz = vol.sweep_values("DBZH", s)
+        used += 1
 
         u8 = quantize_dbz_to_u8(dbz, weak_cut_dbz=weak_cut_dbz)
-        grid = polar_to_grid_fill(u8, az, r_m, grid_size, max_range_m)
+        grid = polar_to_grid_fill(u8, az, r_m, grid_size, max_range_m,
+                                  lut_dir=lut_dir, az_quantum=az_quantum)
 
-        final = low_elev_priority_composite(final, grid)
+        # low_elev_priority_composite 와 같은 규칙 (빈칸만 채움) + 채운 수 집계
+        fill = (final == NODATA) & (grid != NODATA)
+        final[fill] = grid[fill]
+        remaining -= int(np.count_nonzero(fill))
+        if remaining <= 0:
+            break
 
-    meta = {
-        "time_label": safe_time_label(ds),
-        "radar_lat": float(ds["latitude"].values) if "latitude" in ds.data_vars else float(ds.attrs.get("latitude")),
-        "radar_lon": float(ds["longitude"].values) if "longitude" in ds.data_vars else float(ds.attrs.get("longitude")),
-        "sweep_count": sweep_count,
-        "max_range_m": max_range_m,
-    }
+    meta["sweeps_used"] = used
+    return final
+
+
+def make_composite_u8_for_file(nc_path: str, grid_size: int, weak_cut_dbz: float,
+                               lut_dir: str | None = None,
+                               az_quantum: float = AZ_QUANTUM_DEG) -> tuple[np.ndarray, dict]:
+    vol, meta = load_volume(nc_path)
+    with vol:
+        final = composite_u8_for_volume(vol, meta, grid_size, weak_cut_dbz, lut_dir=lut_dir, az_quantum=az_quantum)
     return final, meta
 
 
@@ -295,11 +344,399 @@ def rgba_to_rgb_black_bg(rgba: np.ndarray) -> np.ndarray:
     return np.round(out).astype(np.uint8)  # (H,W,3) uint8
 
 
+# -------------------------------------------------------------
+#  u8 → 색 LUT
+#  합성 u8 값(0..254 = dBZ 양자화, 255 = NODATA)만으로 최종 색이 정해지므로
+#  u8_to_dbz → dbz_to_rgba_binned → rgba_to_rgb_black_bg 를 256 개 값에 한 번만 돌려 표로 둔다.
+#  프레임마다 gather 한 번 (결과는 원래 경로와 비트 단위 동일).
+#  팔레트(P) 출력은 실제로 다른 색(≤ 17개)만 남긴 팔레트 + u8 → 팔레트 번호 표를 쓴다.
+# -------------------------------------------------------------
+_u8_rgb_lut: np.ndarray | None = None
+_u8_palette: tuple[np.ndarray, np.ndarray] | None = None
+
+
+def u8_rgb_lut() -> np.ndarray:
+    """(256, 3) uint8 — 합성 u8 값 → 검정 배경 RGB."""
+    global _u8_rgb_lut
+    if _u8_rgb_lut is None:
+        u8 = np.arange(256, dtype=np.uint8).reshape(1, 256)
+        # ✅ 핵심: mp4용으로 알파 제거(검정 배경 합성)
+        _u8_rgb_lut = rgba_to_rgb_black_bg(dbz_to_rgba_binned(u8_to_dbz(u8))).reshape(256, 3)
+    return _u8_rgb_lut
+
+
+def u8_palette() -> tuple[np.ndarray, np.ndarray]:
+    """(u8 → 팔레트 번호 (256,) uint8, 팔레트 (k, 3) uint8)."""
+    global _u8_palette
+    if _u8_palette is None:
+        colors, index = np.unique(u8_rgb_lut(), axis=0, return_inverse=True)
+        _u8_palette = (index.reshape(256).astype(np.uint8), colors.astype(np.uint8))
+    return _u8_palette
+
+
+def composite_to_rgb(final_u8: np.ndarray) -> np.ndarray:
+    return u8_rgb_lut()[final_u8]
+
+
+def frame_image(final_u8: np.ndarray, palette: bool = False) -> Image.Image:
+    """합성 u8 → 저장용 이미지. palette=True 면 P 모드 (색은 RGB 와 같음)."""
+    if not palette:
+        return Image.fromarray(composite_to_rgb(final_u8), mode="RGB")
+    index, colors = u8_palette()
+    im = Image.fromarray(index[final_u8], mode="P")
+    im.putpalette(colors.tobytes())
+    return im
+
+
+# -------------------------------------------------------------
+#  인코더 프리셋 (Image.save 옵션)
+#   archive : 기존 설정 (webp quality 90 / method 6 — 가장 느리고 작음)
+#   balanced: webp method 4
+#   fast    : 미리보기용 (webp method 0, png compress_level 1)
+# -------------------------------------------------------------
+ENCODE_PRESETS = {
+    "archive": {"webp": {"quality": 90, "method": 6}, "png": {}},
+    "balanced": {"webp": {"quality": 85, "method": 4}, "png": {"compress_level": 6}},
+    "fast": {"webp": {"quality": 80, "method": 0}, "png": {"compress_level": 1}},
+}
+DEFAULT_ENCODE_PRESET = "archive"
+
+
+def encode_options(save_ext: str, preset: str = DEFAULT_ENCODE_PRESET, palette: bool = False) -> dict:
+    """
+    Image.save 옵션. palette=True 일 때 PNG 는 P 모드 그대로 (색 ≤ 16 이면 Pillow 가 4bit 로 씀),
+    webp 는 팔레트 형식이 없어서 lossless 로 (libwebp 가 색 수가 적으면 스스로 팔레트 변환).
+    """
+    if preset not in ENCODE_PRESETS:
+        raise ValueError(f"unknown encode preset: {preset} (choose {'|'.join(ENCODE_PRESETS)})")
+    opts = ENCODE_PRESETS[preset]
+    if save_ext == "png":
+        return dict(opts["png"])
+    return {**opts["webp"], "lossless": True} if palette else dict(opts["webp"])
+
+
+def save_frame(final_u8: np.ndarray, out_path: str, save_ext: str, preset: str = DEFAULT_ENCODE_PRESET,
+               palette: bool = False) -> float:
+    """합성 u8 → 프레임 저장 (PNG RGB|P / webp 는 알파 없는 RGB webp). 걸린 시간(초) 반환."""
+    t0 = time.perf_counter()
+    frame_image(final_u8, palette).save(out_path, **encode_options(save_ext, preset, palette))
+    return time.perf_counter() - t0
+
+
+def render_frame_file(idx: int, nc_path: str, out_dir: str, grid_size: int, weak_cut_dbz: float,
+                      save_ext: str, lut_dir: str | None = None,
+                      az_quantum: float = AZ_QUANTUM_DEG,
+                      preset: str = DEFAULT_ENCODE_PRESET,
+                      write_frame: bool = True, return_rgb: bool = False,
+                      frame_no: int | None = None, return_u8: bool = False,
+                      palette: bool = False) -> dict:
+    """
+    nc 1개 → frames/{frame_no:04d}.{save_ext} (frame_no 기본 = idx). 읽기/합성/인코딩을 차례로 (프로세스 풀 워커용).
+    write_frame=False 면 파일은 안 쓰고, return_rgb / return_u8 이면 결과에 "rgb" / "u8" 을 실어 보낸다
+    (ffmpeg 스트림 / 증분 렌더 캐시용).
+    예외는 결과 dict 로 돌려서 한 파일 실패가 전체를 멈추지 않게 함.
+    """
+    t0 = time.perf_counter()
+    fname = f"{idx if frame_no is None else frame_no:04d}.{save_ext}" if write_frame else None
+    out_path = os.path.join(out_dir, "frames", fname) if write_frame else None
+    stages = {"read": 0.0, "compute": 0.0, "encode": 0.0, "stream": 0.0}
+    try:
+        vol, meta = load_volume(nc_path)
+        t1 = time.perf_counter()
+        stages["read"] = t1 - t0
+        with vol:
+            final_u8 = composite_u8_for_volume(vol, meta, grid_size, weak_cut_dbz,
+                                               lut_dir=lut_dir, az_quantum=az_quantum)
+        stages["compute"] = time.perf_counter() - t1
+        if write_frame:
+            stages["encode"] = save_frame(final_u8, out_path, save_ext, preset, palette)
+
+        info = {"idx": idx, "src": nc_path, "ok": True, "fname": fname, "out_path": out_path, "meta": meta,
+                "stages": stages, "seconds": round(time.perf_counter() - t0, 3)}
+        if return_rgb:
+            info["rgb"] = composite_to_rgb(final_u8)
+        if return_u8:
+            info["u8"] = final_u8
+        return info
+    except Exception as e:
+        return {"idx": idx, "src": nc_path, "ok": False, "error": str(e),
+                "stages": stages, "seconds": round(time.perf_counter() - t0, 3)}
+
+
+def _put_until_stop(q: "queue.Queue", item, stop: threading.Event) -> bool:
+    # 소비자가 멈췄으면(stop) 큐가 꽉 찬 채로 영원히 기다리지 않도록 짧게 나눠서 put
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.2)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _prefetch_volumes(nc_files: list[str], q: "queue.Queue", stop: threading.Event) -> None:
+    # 읽기 단계 스레드: (idx, path, vol, meta, err, read_s) 를 순서대로 bounded queue 에 넣고 끝에 None
+    for idx, nc_path in enumerate(nc_files):
+        t0 = time.perf_counter()
+        try:
+            vol, meta = load_volume(nc_path)
+            item = (idx, nc_path, vol, meta, None, time.perf_counter() - t0)
+        except Exception as e:
+            item = (idx, nc_path, None, None, e, time.perf_counter() - t0)
+
+        if not _put_until_stop(q, item, stop):
+            if item[2] is not None:
+                item[2].close()
+            return
+    _put_until_stop(q, None, stop)
+
+
+def render_frames_pipelined(nc_files: list[str], out_dir: str, grid_size: int, weak_cut_dbz: float,
+                            save_ext: str, lut_dir: str | None = None,
+                            az_quantum: float = AZ_QUANTUM_DEG,
+                            preset: str = DEFAULT_ENCODE_PRESET,
+                            prefetch: int = 2, encode_threads: int = 2,
+                            report=None, sink: FfmpegFrameSink | None = None,
+                            write_frames: bool = True, frame_nos: list[int] | None = None,
+                            return_u8: bool = False, palette: bool = False) -> tuple[list[dict], dict]:
+    """
+    한 프로세스 안에서 3단계 파이프라인:
+      읽기(prefetch 스레드, 큐 깊이 prefetch) → 합성(호출 스레드) → 인코딩(스레드 풀, encode_threads)
+    인코딩(libwebp / zlib)은 GIL 을 놓고 돌기 때문에 다음 파일 읽기/합성과 겹친다.
+    대기 중인 인코딩은 encode_threads*2 개까지만 (메모리 상한).
+    sink 가 있으면 합성 직후 (파일 순서대로) RGB 프레임을 ffmpeg 로 보낸다.
+    write_frames=False 면 프레임 파일 인코딩 단계는 건너뛴다.
+    frame_nos 는 파일별 프레임 번호 (기본 = 입력 순서), return_u8 이면 결과에 합성 u8 을 싣는다.
+    palette=True 면 정지 프레임을 P 모드로 (frame_image).
+    반환: (입력 순서 결과 리스트, 대기 시간 {"wait_read", "wait_encode"})
+    """
+    encode_opts = encode_options(save_ext, preset, palette)     # 잘못된 preset 은 시작 전에 실패
+    n = len(nc_files)
+    results: list[dict | None] = [None] * n
+    waits = {"wait_read": 0.0, "wait_encode": 0.0}
+
+    q: "queue.Queue" = queue.Queue(maxsize=max(1, int(prefetch)))
+    stop = threading.Event()
+    reader = threading.Thread(target=_prefetch_volumes, args=(nc_files, q, stop), name="nc-prefetch", daemon=True)
+    reader.start()
+
+    def finish(info: dict):
+        results[info["idx"]] = info
+        if report:
+            report(info)
+
+    def encode(info: dict, final_u8: np.ndarray) -> dict:
+        t0 = time.perf_counter()
+        try:
+            frame_image(final_u8, palette).save(info["out_path"], **encode_opts)
+        except Exception as e:
+            info = {"idx": info["idx"], "src": info["src"], "ok": False, "error": str(e), "stages": info["stages"]}
+        info["stages"]["encode"] = time.perf_counter() - t0
+        return info
+
+    pending: deque = deque()
+    max_pending = max(1, int(encode_threads)) * 2
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, int(encode_threads)), thread_name_prefix="nc-encode") as pool:
+            while True:
+                t_wait = time.perf_counter()
+                item = q.get()
+                waits["wait_read"] += time.perf_counter() - t_wait
+                if item is None:
+                    break
+
+                idx, nc_path, vol, meta, err, read_s = item
+                stages = {"read": read_s, "compute": 0.0, "encode": 0.0, "stream": 0.0}
+                if err is not None:
+                    finish({"idx": idx, "src": nc_path, "ok": False, "error": str(err), "stages": stages})
+                    continue
+
+                frame_no = idx if frame_nos is None else frame_nos[idx]
+                fname = f"{frame_no:04d}.{save_ext}" if write_frames else None
+                info = {"idx": idx, "src": nc_path, "ok": True, "fname": fname,
+                        "out_path": os.path.join(out_dir, "frames", fname) if write_frames else None,
+                        "meta": meta, "stages": stages}
+                t0 = time.perf_counter()
+                try:
+                    with vol:
+                        final_u8 = composite_u8_for_volume(vol, meta, grid_size, weak_cut_dbz,
+                                                           lut_dir=lut_dir, az_quantum=az_quantum)
+                except Exception as e:
+                    stages["compute"] = time.perf_counter() - t0
+                    finish({"idx": idx, "src": nc_path, "ok": False, "error": str(e), "stages": stages})
+                    continue
+                stages["compute"] = time.perf_counter() - t0
+                if return_u8:
+                    info["u8"] = final_u8
+
+                if sink is not None:
+                    t_s = time.perf_counter()
+                    sink.write(composite_to_rgb(final_u8))
+                    stages["stream"] = time.perf_counter() - t_s
+                if not write_frames:
+                    finish(info)
+                    continue
+
+                while len(pending) >= max_pending:
+                    t_wait = time.perf_counter()
+                    finish(pending.popleft().result())
+                    waits["wait_encode"] += time.perf_counter() - t_wait
+                pending.append(pool.submit(encode, info, final_u8))
+
+            while pending:
+                finish(pending.popleft().result())
+    finally:
+        stop.set()
+        reader.join()
+        # 예외로 빠져나온 경우 큐에 남은 볼륨 정리
+        while True:
+            try:
+                item = q.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None and item[2] is not None:
+                item[2].close()
+
+    return results, waits
+
+
+def render_frames(nc_files: list[str], out_dir: str, grid_size: int, weak_cut_dbz: float, save_ext: str,
+                  lut_dir: str | None = None, az_quantum: float = AZ_QUANTUM_DEG,
+                  workers: int | None = 1, preset: str = DEFAULT_ENCODE_PRESET,
+                  prefetch: int = 2, encode_threads: int = 2,
+                  sink: FfmpegFrameSink | None = None, write_frames: bool = True,
+                  frame_nos: list[int] | None = None, return_u8: bool = False,
+                  on_result=None, palette: bool = False) -> list[dict]:
+    """
+    nc_files 를 프레임으로 렌더. 결과는 입력 순서(= 프레임 번호 순) 리스트.
+    workers == 1 이면 한 프로세스 안에서 읽기/합성/인코딩 파이프라인,
+    workers > 1 이면 파일 단위로 프로세스 풀에 나눈다 (단계는 파일들 사이에서 겹침).
+    sink 가 있으면 성공한 프레임을 파일 순서대로 ffmpeg 로 흘린다
+    (프로세스 풀은 끝나는 순서가 섞이므로 앞 프레임을 기다리며 최대 workers*4 개만 띄워 둔다).
+    진행 출력은 끝나는 순서대로, 마지막에 단계별 시간 합계를 한 줄 출력.
+    프레임 번호는 파일 순서(또는 frame_nos)로 미리 정해지므로 워커 수와 상관없이 결과 파일/manifest 가 같다.
+    on_result(info) 는 파일 하나가 끝날 때마다 호출 프로세스에서 불린다 (증분 상태 저장용).
+    """
+    n = len(nc_files)
+    if n == 0:
+        return []
+    workers = max(1, min(workers or os.cpu_count() or 1, n))
+    t_start = time.perf_counter()
+    done = 0
+
+    def report(info: dict):
+        nonlocal done
+        done += 1
+        name = os.path.basename(info["src"])
+        if not info["ok"]:
+            print(f"[{done}/{n}] FAIL {name}: {info['error']}")
+        elif info["out_path"]:
+            print(f"[{done}/{n}] saved {info['out_path']}")
+        else:
+            print(f"[{done}/{n}] streamed {name}")
+        sys.stdout.flush()
+        if on_result is not None:
+            on_result(info)
+
+    waits: dict = {}
+    if workers == 1:
+        results, waits = render_frames_pipelined(
+            nc_files, out_dir, grid_size, weak_cut_dbz, save_ext, lut_dir=lut_dir, az_quantum=az_quantum,
+            preset=preset, prefetch=prefetch, encode_threads=encode_threads, report=report,
+            sink=sink, write_frames=write_frames, frame_nos=frame_nos, return_u8=return_u8, palette=palette)
+    else:
+        encode_options(save_ext, preset, palette)
+        args = (out_dir, grid_size, weak_cut_dbz, save_ext, lut_dir, az_quantum, preset,
+                write_frames, sink is not None)
+        fno = (lambda i: i) if frame_nos is None else frame_nos.__getitem__
+        results = [None] * n
+        window = workers * 4 if sink is not None else n
+        next_submit = next_out = 0
+        futs: dict = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while next_out < n:
+                while next_submit < n and next_submit - next_out < window:
+                    futs[pool.submit(render_frame_file, next_submit, nc_files[next_submit], *args,
+                                     frame_no=fno(next_submit), return_u8=return_u8,
+                                     palette=palette)] = next_submit
+                    next_submit += 1
+
+                finished, _ = wait(futs, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    info = fut.result()
+                    results[futs.pop(fut)] = info
+                    report(info)
+
+                # 파일 순서대로 앞에서부터 ffmpeg 로
+                while next_out < n and results[next_out] is not None:
+                    rgb = results[next_out].pop("rgb", None)
+                    if sink is not None and rgb is not None:
+                        t_s = time.perf_counter()
+                        sink.write(rgb)
+                        results[next_out]["stages"]["stream"] = time.perf_counter() - t_s
+                    next_out += 1
+
+    totals = {k: sum(r["stages"][k] for r in results) for k in ("read", "compute", "encode", "stream")}
+    line = " ".join(f"{k}={v:.2f}s" for k, v in totals.items())
+    line += "".join(f" {k}={v:.2f}s" for k, v in waits.items())
+    print(f"[stages] files={n} workers={workers} preset={preset} wall={time.perf_counter() - t_start:.2f}s {line}")
+    sys.stdout.flush()
+    return results
+
+
+def _renumber_frames(out_dir: str, moves: list[tuple[str, str]]) -> None:
+    """정지 프레임 이름 바꾸기 [(old, new)] (out_dir 기준 상대경로). 이름이 서로 겹쳐도 되게 두 단계로."""
+    staged = []
+    for old, new in moves:
+        tmp = os.path.join(out_dir, f"{old}.renumber")
+        os.replace(os.path.join(out_dir, old), tmp)
+        staged.append((tmp, os.path.join(out_dir, new)))
+    for tmp, new in staged:
+        os.replace(tmp, new)
+
+
+def _remove_orphan_frames(out_dir: str, save_ext: str, keep: set[str]) -> None:
+    # 상태에 없는 frames/NNNN.ext (실패했거나 사라진 원본의 옛 프레임) 정리 → %04d 입력에 섞이지 않게
+    frames_dir = os.path.join(out_dir, "frames")
+    if not os.path.isdir(frames_dir):
+        return
+    pat = re.compile(r"^\d{4}\." + re.escape(save_ext) + r"$")
+    for name in os.listdir(frames_dir):
+        if pat.match(name) and f"frames/{name}" not in keep:
+            os.remove(os.path.join(frames_dir, name))
+
+
+def stream_composites_to_mp4(out_dir: str, date_ymd: str, names: list[str], grid_size: int, fps: int = 10) -> str:
+    """저장된 합성 결과(.composites/*.npy)를 순서대로 팔레트만 다시 입혀 ffmpeg 로 (NetCDF 재처리 없음)."""
+    sink = FfmpegFrameSink(out_dir, date_ymd, grid_size, grid_size, fps=fps)
+    try:
+        for name in names:
+            sink.write(composite_to_rgb(load_composite(out_dir, name)))
+    except BaseException:
+        sink.abort()
+        raise
+    return sink.close()
+
+
 def nc_render_day_main(argv: list[str]):
     """
     argv:
       [input_dir, out_dir, grid_size?, weak_cut_dbz?, format?]
+      --lut-dir=DIR      polar→grid LUT 를 DIR/*.npy 로 저장/재사용 (없으면 메모리만)
+      --az-quantum=0.1   LUT 키/계산용 방위각 반올림 단위 (기본 0 = 원래 방위각 그대로)
+      --workers=N        파일 단위 병렬 렌더 프로세스 수 (0 = CPU 수, 기본 1)
+      --preset=archive   인코더 프리셋 archive | balanced | fast (기본 archive = webp q90 method 6)
+      --prefetch=2       (workers=1) 미리 읽어 둘 파일 수
+      --encode-threads=2 (workers=1) 인코딩 스레드 수
+      --stream           렌더하면서 RGB 프레임을 ffmpeg stdin(rawvideo)으로 바로 흘려 mp4 생성
+      --no-frames        frames/ 정지 이미지를 쓰지 않음 (mp4 전용 작업, --stream 포함)
+      --palette          정지 프레임을 팔레트(P 모드) PNG 로 (webp 는 lossless — libwebp 가 팔레트로 압축)
+      --full             증분 상태(.render_state.json)를 무시하고 전부 다시 렌더
+
+    out_dir/.render_state.json 에 원본(이름·크기·mtime)별 결과를 남겨서, 다시 실행하면
+    새로 생겼거나 바뀐 파일만 렌더하고 manifest / mp4 를 다시 만든다 (render_state.py).
     """
+    argv, flags = parse_cli_flags(argv)
     if len(argv) < 2:
         print("nc_render_day_main: need input_dir out_dir", file=sys.stderr)
         return 2
@@ -310,54 +747,151 @@ def nc_render_day_main(argv: list[str]):
     weak_cut_dbz = float(argv[3]) if len(argv) >= 4 else 7
     save_ext = argv[4] if len(argv) >= 5 else "webp"
     save_ext = save_ext.lower()
+    lut_dir = flags.get("lut-dir") or None
+    az_quantum = float(flags["az-quantum"]) if flags.get("az-quantum") else AZ_QUANTUM_DEG
+    workers = int(flags["workers"]) if flags.get("workers") else 1
+    preset = flags.get("preset") or DEFAULT_ENCODE_PRESET
+    prefetch = int(flags["prefetch"]) if flags.get("prefetch") else 2
+    encode_threads = int(flags["encode-threads"]) if flags.get("encode-threads") else 2
+    write_frames = "no-frames" not in flags
+    stream = "stream" in flags or not write_frames
+    palette = "palette" in flags
+    if preset not in ENCODE_PRESETS:
+        print(f"nc_render_day_main: unknown --preset={preset} (choose {'|'.join(ENCODE_PRESETS)})", file=sys.stderr)
+        return 2
 
-    ensure_dirs(out_dir)
+    if write_frames:
+        ensure_dirs(out_dir)
+    else:
+        os.makedirs(out_dir, exist_ok=True)
 
     nc_files = list_nc_files_sorted(input_dir)
     if not nc_files:
         raise RuntimeError(f"nc 파일이 없습니다: {input_dir}")
 
-    frames = []
-    radar_lat = radar_lon = None
-    sweep_count = None
-    max_range_m = None
-
-    for idx, nc_path in enumerate(nc_files):
+    ymd = infer_ymd_from_path(out_dir)
+    names = [os.path.basename(p) for p in nc_files]
+    sigs = {name: source_signature(p) for name, p in zip(names, nc_files)}
+
+    # ---- 증분 상태: 바뀌지 않은 원본은 렌더 생략 ----
+    params = {"grid_size": grid_size, "weak_cut_dbz": weak_cut_dbz, "format": save_ext,
+              "az_quantum": az_quantum, "preset": preset, "palette": palette}
+    state = load_render_state(out_dir, params)
+    if "full" in flags:
+        state["files"] = {}
+    for name in [n for n in state["files"] if n not in sigs]:
+        forget_entry(out_dir, state, name)
+
+    todo: list[int] = []
+    moves: list[tuple[str, str]] = []
+    for idx, name in enumerate(names):
+        entry = state["files"].get(name)
+        if not entry_is_current(out_dir, entry, sigs[name], need_img=write_frames):
+            todo.append(idx)
+            continue
+        # 앞쪽에 파일이 끼어들면 프레임 번호가 밀린다 → 다시 렌더하지 않고 이름만 바꿈
+        want = f"frames/{idx:04d}.{save_ext}"
+        if write_frames and entry["img"] != want:
+            moves.append((entry["img"], want))
+            entry["img"] = want
+    if moves:
+        _renumber_frames(out_dir, moves)
+    print(f"[state] files={len(names)} render={len(todo)} reuse={len(names) - len(todo)} renumber={len(moves)}")
+    sys.stdout.flush()
+
+    # 전부 새로 렌더할 때만 렌더하면서 바로 ffmpeg 로 (일부 재사용이면 끝나고 캐시에서 순서대로)
+    live = stream and len(todo) == len(names)
+    sink = None
+    mp4_error = None
+    if live:
         try:
-            final_u8, meta = make_composite_u8_for_file(nc_path, grid_size=grid_size, weak_cut_dbz=weak_cut_dbz)
+            sink = FfmpegFrameSink(out_dir, ymd, grid_size, grid_size, fps=10)
+        except OSError as e:
+            # ffmpeg 를 못 띄워도 렌더 / 상태 / manifest 는 끝까지 (mp4 만 실패로 보고)
+            print("ffmpeg stream FAILED:", e, file=sys.stderr)
+            mp4_error = e
+
+    last_save = time.perf_counter()
+
+    def on_result(info: dict):
+        nonlocal last_save
+        name = os.path.basename(info["src"])
+        if info["ok"]:
+            store_composite(out_dir, name, info.pop("u8"))
+            state["files"][name] = {"name": name, **sigs[name],
+                                    "img": f"frames/{info['fname']}" if info["fname"] else None,
+                                    "meta": info["meta"]}
+        else:
+            forget_entry(out_dir, state, name)
+        if time.perf_counter() - last_save >= STATE_SAVE_INTERVAL_S:
+            save_render_state(out_dir, state)
+            last_save = time.perf_counter()
 
-            dbz = u8_to_dbz(final_u8)
-            rgba = dbz_to_rgba_binned(dbz)
-
-            # ✅ 핵심: mp4용으로 알파 제거(검정 배경 합성)
-            rgb = rgba_to_rgb_black_bg(rgba)
-            im = Image.fromarray(rgb, mode="RGB")
-
-            fname = f"{idx:04d}.{save_ext}"
-            out_path = os.path.join(out_dir, "frames", fname)
-
-            if save_ext == "png":
-                im.save(out_path)  # PNG RGB
-            else:
-                # webp면 RGB webp로 저장됨(알파 없음)
-                im.save(out_path, quality=90, method=6)
-
-            frames.append({
-                "t": meta["time_label"],
-                "img": f"frames/{fname}",
-                "src": os.path.basename(nc_path),
-            })
+    try:
+        render_frames([nc_files[i] for i in todo], out_dir, grid_size, weak_cut_dbz, save_ext,
+                      lut_dir=lut_dir, az_quantum=az_quantum, workers=workers,
+                      preset=preset, prefetch=prefetch, encode_threads=encode_threads,
+                      sink=sink, write_frames=write_frames,
+                      frame_nos=todo, return_u8=True, on_result=on_result, palette=palette)
+    except BaseException:
+        if sink is not None:
+            sink.abort()
+        raise
+    finally:
+        save_render_state(out_dir, state)
+
+    done_names = [name for name in names if name in state["files"]]
+    if write_frames:
+        _remove_orphan_frames(out_dir, save_ext, {state["files"][n]["img"] for n in done_names})
+
+    # ---- mp4: 프레임 목록이 지난번과 같고 파일이 있으면 생략 ----
+    mp4_key = [[n, sigs[n]["size"], sigs[n]["mtime_ns"]] for n in done_names]
+    mp4_abs = os.path.join(out_dir, f"{ymd}.mp4")
+    mp4_path = None
+    if mp4_error is not None:
+        pass    # 시작할 때 ffmpeg 를 못 띄움 → 같은 실행에서 다시 시도하지 않음
+    elif sink is not None:
+        # 마지막 프레임까지 이미 ffmpeg 에 들어갔으므로 stdin 을 닫고 마무리만 기다림
+        try:
+            mp4_path = sink.close()
+        except RuntimeError as e:
+            mp4_error = e
+    elif state.get("mp4") == mp4_key and os.path.exists(mp4_abs):
+        mp4_path = mp4_abs
+        print("mp4 up to date:", mp4_abs)
+    elif stream:
+        try:
+            mp4_path = stream_composites_to_mp4(out_dir, ymd, done_names, grid_size)
+        except (OSError, RuntimeError) as e:
+            mp4_error = e
+    else:
+        try:
+            mp4_path = run_ffmpeg_make_mp4(out_dir, date_ymd=ymd, fps=10, save_ext=save_ext)
+        except Exception as e:
+            mp4_error = e
 
-            if radar_lat is None:
-                radar_lat = meta["radar_lat"]
-                radar_lon = meta["radar_lon"]
-                sweep_count = meta["sweep_count"]
-                max_range_m = meta["max_range_m"]
+    state["mp4"] = mp4_key if mp4_error is None else None
+    save_render_state(out_dir, state)
 
-            print(f"[{idx + 1}/{len(nc_files)}] saved {out_path}")
+    frames = []
+    radar_lat = radar_lon = None
+    sweep_count = None
+    max_range_m = None
 
-        except Exception as e:
-            print(f"[{idx + 1}/{len(nc_files)}] FAIL {os.path.basename(nc_path)}: {e}")
+    for name in done_names:
+        entry = state["files"][name]
+        meta = entry["meta"]
+        frames.append({
+            "t": meta["time_label"],
+            "img": entry["img"] if write_frames else None,
+            "src": name,
+        })
+
+        if radar_lat is None:
+            radar_lat = meta["radar_lat"]
+            radar_lon = meta["radar_lon"]
+            sweep_count = meta["sweep_count"]
+            max_range_m = meta["max_range_m"]
 
     manifest = {
         "field": "DBZH",
@@ -372,19 +906,18 @@ def nc_render_day_main(argv: list[str]):
         "grid": {"size": grid_size, "range_m": max_range_m},
         "frames": frames
     }
-    ymd = infer_ymd_from_path(out_dir)  # 이미 아래에서 쓰고 있음
     out_manifest = os.path.join(out_dir, f"{ymd}.json")  # ✅ 날짜.json
-    with open(out_manifest, "w", encoding="utf-8") as f:
+    tmp = f"{out_manifest}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
         json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, out_manifest)
 
     print("manifest saved:", out_manifest)
     print("total frames:", len(frames))
 
-    try:
-        mp4_path = run_ffmpeg_make_mp4(out_dir, date_ymd=ymd, fps=10, save_ext=save_ext)
-        print("mp4 saved:", mp4_path)
-    except Exception as e:
-        print("mp4 make FAILED:", e, file=sys.stderr)
+    if mp4_error is not None:
+        print("mp4 make FAILED:", mp4_error, file=sys.stderr)
         return 0
+    print("mp4 saved:", mp4_path)
 
     return 0
@@ -0,0 +1,26 @@
+# python/maked_package/nc_tools/npy_io.py
+from __future__ import annotations
+
+import os
+
+import numpy as np
+
+# -------------------------------------------------------------
+#  .npy 파일 공용 입출력 (polar_lut / grid_cache / render_state)
+#
+#  같은 파일을 여러 프로세스(워커 풀, serve, 단발 ncgrid)가 동시에 읽고 쓰므로
+#  항상 pid 가 붙은 tmp 에 쓴 뒤 os.replace → 읽는 쪽은 완성된 파일만 본다.
+#  tmp 이름은 ".tmp" 를 포함 (grid_cache 정리 대상에서 빠짐).
+# -------------------------------------------------------------
+
+
+def save_npy_atomic(path: str, arr: np.ndarray) -> None:
+    """arr 를 path(.npy) 에 저장 (tmp → os.replace). 실패하면 tmp 는 지운다."""
+    tmp = f"{path}.{os.getpid()}.tmp.npy"
+    try:
+        np.save(tmp, arr)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
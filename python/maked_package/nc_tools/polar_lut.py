@@ -0,0 +1,191 @@
+# python/maked_package/nc_tools/polar_lut.py
+from __future__ import annotations
+
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from .npy_io import save_npy_atomic
+
+# -------------------------------------------------------------
+#  polar → Cartesian 역매핑 LUT (nc_render_day.polar_to_grid_fill 용)
+#
+#  픽셀마다 (가장 가까운 ray, 가장 가까운 gate) 는 스캔 기하만으로 정해진다:
+#    grid_size, max_range_m, 첫 gate 거리 / gate 간격 / gate 수, sweep 의 azimuth 배열
+#  → 한 번 계산한 LUT 를 메모리(최근 LUT_MEMORY_SLOTS 개)와 선택적으로 디스크(.npy)에 두고
+#    sweep 마다 u8[ray, gate] 를 한 번의 fancy-index gather 로 격자에 옮긴다.
+#
+#  키 / LUT 는 ray 순서와 무관하게 만든다:
+#    azimuth 를 (AZ_QUANTUM_DEG 로 반올림 후) 정렬·중복 제거한 배열 = 기하
+#    LUT 값의 ray 자리 = 그 배열에서의 순위(rank). sweep 마다 rank → 실제 ray 번호
+#    (같은 방위 ray 가 여럿이면 첫 ray) 를 np.unique 로 구해 u8 행을 그 순서로 모은 뒤 gather.
+#  → 시작 ray 가 다르거나 같은 방위 ray 가 중복된 sweep 도 같은 LUT 를 쓴다.
+#
+#  AZ_QUANTUM_DEG 기본 0 = 원래 방위각 그대로 (이전 출력과 같은 픽셀).
+#  --az-quantum=0.1 등으로 키우면 조금씩 흔들리는 방위각도 같은 LUT 를 쓰지만
+#  nearest-ray 선택이 반올림한 방위 기준이 되어 출력이 최대 반 quantum 만큼 달라질 수 있다.
+#
+#  LUT 값: rank * n_gates + gate (int32), 범위 밖 픽셀 = n_unique * n_gates (NODATA 칸)
+# -------------------------------------------------------------
+AZ_QUANTUM_DEG = 0.0
+LUT_MEMORY_SLOTS = 64
+LUT_FILE_PREFIX = "polar_lut_"
+
+_memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_range_counts: dict[tuple, int] = {}
+
+
+def _quantize_az(az_deg: np.ndarray, az_quantum: float) -> np.ndarray:
+    az = np.asarray(az_deg, dtype=np.float32)
+    if az_quantum <= 0:
+        return az
+    return (np.round(az / az_quantum) * az_quantum).astype(np.float32)
+
+
+def lut_azimuths(az_deg: np.ndarray, az_quantum: float = AZ_QUANTUM_DEG) -> tuple[np.ndarray, np.ndarray]:
+    """sweep azimuth → (정렬·중복 제거한 방위 = LUT 기하, rank 마다 쓸 ray 번호)."""
+    uniq, rays = np.unique(_quantize_az(az_deg, az_quantum), return_index=True)
+    return uniq.astype(np.float32), rays
+
+
+def polar_lut_key(
+    az_deg: np.ndarray,
+    r_m: np.ndarray,
+    grid_size: int,
+    max_range_m: float,
+    az_quantum: float = AZ_QUANTUM_DEG,
+) -> str:
+    """스캔 기하 → LUT 키 (파일명으로도 쓰는 16진 문자열). ray 순서와 무관."""
+    az, _rays = lut_azimuths(az_deg, az_quantum)
+    r0 = float(r_m[0])
+    dr = float(r_m[1] - r_m[0]) if len(r_m) > 1 else 1.0
+    h = hashlib.sha1()
+    h.update(repr(("rank", int(grid_size), round(float(max_range_m), 3), round(r0, 3), round(dr, 3),
+                   int(len(r_m)), int(az.shape[0]), float(az_quantum))).encode("ascii"))
+    h.update(az.tobytes())
+    return h.hexdigest()[:24]
+
+
+def _pixel_polar(grid_size: int, max_range_m: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """픽셀 중심의 (x_m, y_m, rr) — 레이더 중심, 위쪽 = 북."""
+    H = W = int(grid_size)
+    cx = (W - 1) / 2.0
+    cy = (H - 1) / 2.0
+    meters_per_px = (2 * float(max_range_m)) / (grid_size - 1)
+
+    yy, xx = np.indices((H, W), dtype=np.float32)
+    x_m = (xx - cx) * meters_per_px
+    y_m = -(yy - cy) * meters_per_px
+
+    rr = np.sqrt(x_m * x_m + y_m * y_m)
+    return x_m, y_m, rr
+
+
+def polar_range_count(grid_size: int, max_range_m: float) -> int:
+    """LUT 가 범위 안으로 매핑하는 픽셀 수 (build_polar_lut 과 같은 식)."""
+    key = (int(grid_size), float(max_range_m))
+    n = _range_counts.get(key)
+    if n is None:
+        _x, _y, rr = _pixel_polar(grid_size, max_range_m)
+        n = int(np.count_nonzero(rr <= float(max_range_m)))
+        if len(_range_counts) >= LUT_MEMORY_SLOTS:
+            _range_counts.clear()
+        _range_counts[key] = n
+    return n
+
+
+def build_polar_lut(
+    az_deg: np.ndarray,
+    r_m: np.ndarray,
+    grid_size: int,
+    max_range_m: float,
+) -> np.ndarray:
+    """(grid_size*grid_size,) int32 LUT. 가장 가까운 ray / gate 역매핑."""
+    H = W = int(grid_size)
+    n_rays = int(len(az_deg))
+    n_gates = int(len(r_m))
+
+    x_m, y_m, rr = _pixel_polar(grid_size, max_range_m)
+    theta = (np.degrees(np.arctan2(x_m, y_m)) + 360.0) % 360.0
+
+    lut = np.full(H * W, n_rays * n_gates, dtype=np.int32)
+    in_range = (rr <= float(max_range_m)).reshape(-1)
+    if not np.any(in_range) or n_rays == 0:
+        return lut
+
+    az = np.asarray(az_deg, dtype=np.float32)
+    order = np.argsort(az, kind="stable")
+    azs = az[order]
+
+    th = theta.reshape(-1)[in_range]
+    pos = np.searchsorted(azs, th, side="left")
+    pos = np.clip(pos, 0, len(azs) - 1)
+
+    left = np.clip(pos - 1, 0, len(azs) - 1)
+    right = pos
+    d_left = np.abs(azs[left] - th)
+    d_right = np.abs(azs[right] - th)
+    use_left = d_left <= d_right
+    ray_idx = order[np.where(use_left, left, right)]
+
+    r0 = float(r_m[0])
+    dr = float(r_m[1] - r_m[0]) if len(r_m) > 1 else 1.0
+    ridx = np.rint((rr.reshape(-1)[in_range] - r0) / dr).astype(np.int32)
+    ridx = np.clip(ridx, 0, n_gates - 1)
+
+    lut[in_range] = ray_idx.astype(np.int32) * n_gates + ridx
+    return lut
+
+
+def get_polar_lut(
+    az_deg: np.ndarray,
+    r_m: np.ndarray,
+    grid_size: int,
+    max_range_m: float,
+    lut_dir: Optional[str] = None,
+    az_quantum: float = AZ_QUANTUM_DEG,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    메모리 → 디스크(lut_dir) → 새로 계산 순으로 LUT 를 찾는다.
+    반환: (LUT, rays) — remap_with_lut(u8[rays], LUT, ...) 로 쓴다.
+    """
+    uniq, rays = lut_azimuths(az_deg, az_quantum)
+    key = polar_lut_key(az_deg, r_m, grid_size, max_range_m, az_quantum)
+
+    lut = _memory.get(key)
+    if lut is not None:
+        _memory.move_to_end(key)
+        return lut, rays
+
+    path = os.path.join(lut_dir, f"{LUT_FILE_PREFIX}{key}.npy") if lut_dir else None
+    if path and os.path.isfile(path):
+        try:
+            lut = np.load(path)
+        except (OSError, ValueError):
+            lut = None
+        if lut is not None and lut.shape != (int(grid_size) * int(grid_size),):
+            lut = None
+
+    if lut is None:
+        lut = build_polar_lut(uniq, r_m, grid_size, max_range_m)
+        if path:
+            os.makedirs(lut_dir, exist_ok=True)
+            save_npy_atomic(path, lut)
+
+    _memory[key] = lut
+    while len(_memory) > LUT_MEMORY_SLOTS:
+        _memory.popitem(last=False)
+    return lut, rays
+
+
+def remap_with_lut(u8_ray_range: np.ndarray, lut: np.ndarray, grid_size: int, nodata: int) -> np.ndarray:
+    """u8[ray, gate] → (grid_size, grid_size) 격자. 범위 밖 = nodata."""
+    src = np.append(u8_ray_range.reshape(-1), np.uint8(nodata))
+    return src[lut].reshape(int(grid_size), int(grid_size))
+
+
+def polar_lut_stats() -> dict:
+    return {"memory_entries": len(_memory), "memory_bytes": int(sum(v.nbytes for v in _memory.values()))}
@@ -0,0 +1,240 @@
+# python/maked_package/nc_tools/radar_volume.py
+from __future__ import annotations
+
+import numpy as np
+import xarray as xr
+from xarray.conventions import decode_cf_variable
+
+# -------------------------------------------------------------
+#  CF/Radial 볼륨 공용 리더
+#
+#  - 변수는 처음 요청할 때 한 번만 디코드 (scale/offset/_FillValue → float32)
+#  - n_points(ragged) 변수는 ray_start_index / ray_n_gates 로
+#    (time, range) 행렬에 벡터 scatter 한 번으로 언팩
+#  - sweep 단위 azimuth / 값은 그 행렬의 슬라이스(복사 없음) → 호출 쪽에서 수정 금지
+#  - sweep_values() 는 전체 대신 그 sweep 의 ray 구간만 읽어서 디코드. 앞쪽 sweep 만 쓰는 호출용
+#    경로가 있으면 h5py 로 hyperslab 을 직접 읽고 scale/offset/_FillValue 를 디코드
+#    (decode_cf_slab) → open_dataset 결과와 같은 값. (xarray isel 은 호출당 오버헤드가 커서)
+#    h5py 로 못 여는 파일(netCDF3 등)은 xarray isel 로 fallback
+#
+#  nc_grid / nc_render_day / scripts/render_nc_frame.py 가 같이 쓴다.
+# -------------------------------------------------------------
+_CF_ENCODING_KEYS = ("_FillValue", "missing_value", "scale_factor", "add_offset", "_Unsigned")
+
+
+def decode_cf_slab(name: str, raw: np.ndarray, v: xr.DataArray) -> np.ndarray:
+    """
+    h5py 로 읽은 원시 값 → open_dataset 과 같은 디코드 값 (dtype = v.dtype).
+    정수 + _FillValue/missing_value/scale_factor/add_offset 만 있는 흔한 경우는 직접
+    (xarray 와 같은 dtype·연산 순서라 결과 동일, 2배쯤 빠름), 그 밖은 decode_cf_variable.
+    """
+    enc = {k: v.encoding[k] for k in _CF_ENCODING_KEYS if k in v.encoding}
+    if raw.dtype.kind in "iu" and "_Unsigned" not in enc and v.dtype.kind == "f":
+        data = raw.astype(v.dtype)
+        for k in ("_FillValue", "missing_value"):
+            if k in enc:
+                data[np.isin(raw, np.atleast_1d(enc[k]))] = np.nan
+        if "scale_factor" in enc:
+            data *= enc["scale_factor"]
+        if "add_offset" in enc:
+            data += enc["add_offset"]
+        return data
+    return decode_cf_variable(name, xr.Variable(v.dims, raw, attrs={**v.attrs, **enc})).values
+
+
+def open_nc_dataset(path: str) -> xr.Dataset:
+    """h5netcdf 우선, 실패하면 xarray 기본 엔진."""
+    try:
+        return xr.open_dataset(path, engine="h5netcdf")
+    except Exception:
+        return xr.open_dataset(path)
+
+
+def unpack_ragged(
+    flat: np.ndarray,
+    ray_start: np.ndarray,
+    ray_n_gates: np.ndarray,
+    n_range: int,
+) -> np.ndarray:
+    """
+    CF/Radial ragged 배열 (n_points,) → (n_time, n_range) float32. 빈 칸은 NaN.
+    ray 마다 gate 수는 n_range 와 파일 끝을 넘지 않게 자른다.
+    """
+    flat = np.asarray(flat)
+    n_range = int(n_range)
+    start = np.asarray(ray_start, dtype=np.int64)
+    n_time = int(start.shape[0])
+
+    ng_raw = np.asarray(ray_n_gates, dtype=np.int64)
+    ng = np.clip(np.minimum(ng_raw, flat.shape[0] - start), 0, n_range)
+
+    out = np.full((n_time, n_range), np.nan, dtype=np.float32)
+    total = int(ng.sum())
+    if total == 0:
+        return out
+
+    # 보통은 ray 가 빈틈 없이 이어져 있음 → 원본 구간을 그대로 한 번에 복사
+    contiguous = np.array_equal(ng, ng_raw) and np.array_equal(start[1:], start[:-1] + ng[:-1])
+    if contiguous and np.all(ng == ng[0]):
+        # sweep 하나처럼 ray 마다 gate 수가 같으면 reshape 한 번
+        g = int(ng[0])
+        out[:, :g] = flat[int(start[0]): int(start[0]) + total].reshape(n_time, g)
+    elif contiguous:
+        # 행 우선 순서로 채울 칸 = 각 ray 의 앞쪽 ng 개
+        fill = np.arange(n_range) < ng[:, None]
+        out[fill] = flat[int(start[0]): int(start[0]) + total]
+    else:
+        fill = np.arange(n_range) < ng[:, None]
+        out[fill] = flat[(start[:, None] + np.arange(n_range))[fill]]
+    return out
+
+
+class RadarVolume:
+    """
+    CF/Radial 파일 1개.
+
+        with RadarVolume.open(path) as vol:
+            for s in range(vol.sweep_count):
+                az, r, Z = vol.sweep(field, s)
+    """
+
+    def __init__(self, ds: xr.Dataset, owns: bool = False, path: str | None = None):
+        self.ds = ds
+        self._owns = owns
+        self.path = path
+        self._h5 = None             # h5py.File (열 수 없으면 False)
+        self._fields: dict[str, np.ndarray] = {}
+        self._sweeps: dict[tuple[str, int], np.ndarray] = {}
+
+        self.range_m = ds["range"].values.astype(np.float32, copy=False)
+        self.azimuth = ds["azimuth"].values.astype(np.float32, copy=False)
+        self.n_range = int(self.range_m.shape[0])
+        self.n_time = int(self.azimuth.shape[0])
+
+        self.sweep_start = ds["sweep_start_ray_index"].values.astype(np.int64)
+        self.sweep_end = ds["sweep_end_ray_index"].values.astype(np.int64) + 1   # 미포함
+
+    @classmethod
+    def open(cls, path: str) -> "RadarVolume":
+        return cls(open_nc_dataset(path), owns=True, path=path)
+
+    def close(self) -> None:
+        self._fields.clear()
+        self._sweeps.clear()
+        if self._h5:
+            self._h5.close()
+        self._h5 = None
+        if self._owns:
+            self.ds.close()
+
+    def __enter__(self) -> "RadarVolume":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def sweep_count(self) -> int:
+        return int(self.sweep_start.shape[0])
+
+    def pick_field(self, candidates=("CFZH", "DBZH")) -> str:
+        for f in candidates:
+            if f in self.ds.data_vars:
+                return f
+        raise KeyError(f"None of fields {candidates} found")
+
+    def field(self, name: str) -> np.ndarray:
+        """변수 name 의 (time, range) float32 행렬 (파일당 1회 디코드)."""
+        Z = self._fields.get(name)
+        if Z is None:
+            Z = self._decode(name)
+            self._fields[name] = Z
+        return Z
+
+    def sweep_values(self, name: str, sweep_idx: int) -> np.ndarray:
+        """
+        sweep 하나의 (nrays, ngates) float32. 변수 전체가 이미 디코드돼 있으면 그 뷰,
+        아니면 그 sweep 의 ray 구간만 읽는다 (sweep 별로 캐시).
+        """
+        Z = self._fields.get(name)
+        if Z is not None:
+            return Z[self.sweep_slice(sweep_idx)]
+        key = (name, int(sweep_idx))
+        Z = self._sweeps.get(key)
+        if Z is None:
+            Z = self._decode(name, self.sweep_slice(sweep_idx))
+            self._sweeps[key] = Z
+        return Z
+
+    def _h5_file(self):
+        if self._h5 is None:
+            self._h5 = False
+            if self.path:
+                try:
+                    import h5py
+                    self._h5 = h5py.File(self.path, "r")
+                except Exception:
+                    pass
+        return self._h5 or None
+
+    def _read_slab(self, name: str, index: tuple) -> np.ndarray:
+        """변수 name 의 위치 인덱스(index) 구간만 읽어서 CF 디코드."""
+        v = self.ds[name]
+        h5 = self._h5_file()
+        if h5 is not None and name in h5 and h5[name].shape == v.shape:
+            return decode_cf_slab(name, h5[name][index], v)
+        return v[index].values
+
+    def _decode(self, name: str, rays: slice | None = None) -> np.ndarray:
+        """변수 name 디코드. rays 를 주면 그 ray 구간만 읽는다."""
+        ds = self.ds
+        v = ds[name]
+
+        if "n_points" in v.dims:
+            if "ray_start_index" not in ds:
+                raise KeyError("n_points인데 ray_start_index가 없어 언팩 불가")
+            ray_start = ds["ray_start_index"].values.astype(np.int64)
+            # ray마다 실제 gate 수 (없으면 전부 n_range로 fallback)
+            if "ray_n_gates" in ds:
+                ray_ng = ds["ray_n_gates"].values.astype(np.int64)
+            else:
+                ray_ng = np.full((self.n_time,), self.n_range, dtype=np.int64)
+            if rays is None:
+                return unpack_ragged(v.values, ray_start, ray_ng, self.n_range)
+
+            # 이 ray 들이 쓰는 n_points 구간만 읽음
+            start = ray_start[rays]
+            ng = ray_ng[rays]
+            n_points = int(v.shape[0])
+            if start.size == 0:
+                return np.full((0, self.n_range), np.nan, dtype=np.float32)
+            p0 = int(np.clip(start.min(), 0, n_points))
+            p1 = int(np.clip((start + np.clip(ng, 0, self.n_range)).max(), p0, n_points))
+            flat = self._read_slab(name, (slice(p0, p1),))
+            return unpack_ragged(flat, start - p0, ng, self.n_range)
+
+        if "time" in v.dims and "range" in v.dims:
+            if rays is None:
+                Z = v.transpose("time", "range").values
+            elif v.dims == ("time", "range"):
+                Z = self._read_slab(name, (rays, slice(None)))
+            else:
+                Z = v.isel(time=rays).transpose("time", "range").values
+            Z = Z.astype(np.float32, copy=False)
+            # 혹시라도 range가 n_range보다 짧은 케이스 방어
+            if Z.shape[1] != self.n_range:
+                Z2 = np.full((Z.shape[0], self.n_range), np.nan, dtype=np.float32)
+                n = min(self.n_range, Z.shape[1])
+                Z2[:, :n] = Z[:, :n]
+                Z = Z2
+            return Z
+
+        raise ValueError(f"지원하지 않는 {name} dims: {v.dims}")
+
+    def sweep_slice(self, sweep_idx: int) -> slice:
+        return slice(int(self.sweep_start[sweep_idx]), int(self.sweep_end[sweep_idx]))
+
+    def sweep(self, name: str, sweep_idx: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(azimuth (nrays,), range_m (ngates,), Z (nrays, ngates)) — 전부 뷰."""
+        sl = self.sweep_slice(sweep_idx)
+        return self.azimuth[sl], self.range_m, self.field(name)[sl]
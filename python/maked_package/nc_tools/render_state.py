@@ -0,0 +1,94 @@
+# python/maked_package/nc_tools/render_state.py
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+from .npy_io import save_npy_atomic
+
+# -------------------------------------------------------------
+#  ncrender_day 증분/재개 상태
+#
+#  <out_dir>/.render_state.json
+#    {"version", "params": {렌더 파라미터}, "files": {src 이름: 항목}, "mp4": {...}}
+#    항목 = {"size", "mtime_ns", "img": "frames/0003.webp" | null, "meta": {...}}
+#  <out_dir>/.composites/<src 이름>.npy   파일별 합성 결과 (grid u8) — mp4 를 다시 만들 때 사용
+#
+#  - params 가 바뀌면 (격자 크기 / weak cut / 포맷 / 프리셋 ...) 기존 항목은 전부 무효
+#  - 원본의 크기나 mtime 이 바뀌면 그 파일만 다시 렌더
+#  - 실패한 파일은 기록하지 않음 → 다음 실행에서 다시 시도 (다운로드 중이던 파일 등)
+#  - 렌더 도중에도 주기적으로 저장 → 중간에 죽어도 끝난 파일은 다시 안 함
+# -------------------------------------------------------------
+STATE_FILE = ".render_state.json"
+COMPOSITE_DIR = ".composites"
+STATE_VERSION = 1
+
+
+def _new_state(params: dict) -> dict:
+    return {"version": STATE_VERSION, "params": params, "files": {}, "mp4": None}
+
+
+def render_state_path(out_dir: str) -> str:
+    return os.path.join(out_dir, STATE_FILE)
+
+
+def load_render_state(out_dir: str, params: dict) -> dict:
+    """상태 파일 읽기. 없거나 깨졌거나 params 가 다르면 빈 상태."""
+    try:
+        with open(render_state_path(out_dir), "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") == STATE_VERSION and state.get("params") == params:
+            state.setdefault("files", {})
+            state.setdefault("mp4", None)
+            return state
+    except (OSError, ValueError):
+        pass
+    return _new_state(params)
+
+
+def save_render_state(out_dir: str, state: dict) -> None:
+    path = render_state_path(out_dir)
+    state = {**state, "updated_at": datetime.now().isoformat()}
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def source_signature(path: str) -> dict:
+    st = os.stat(path)
+    return {"size": int(st.st_size), "mtime_ns": int(st.st_mtime_ns)}
+
+
+def composite_path(out_dir: str, name: str) -> str:
+    return os.path.join(out_dir, COMPOSITE_DIR, f"{name}.npy")
+
+
+def store_composite(out_dir: str, name: str, u8: np.ndarray) -> None:
+    os.makedirs(os.path.join(out_dir, COMPOSITE_DIR), exist_ok=True)
+    save_npy_atomic(composite_path(out_dir, name), u8)
+
+
+def load_composite(out_dir: str, name: str) -> np.ndarray:
+    return np.load(composite_path(out_dir, name))
+
+
+def entry_is_current(out_dir: str, entry: dict | None, sig: dict, need_img: bool) -> bool:
+    """상태 항목이 지금 원본(sig)과 맞고 합성 캐시(및 필요하면 정지 프레임)가 남아 있는지."""
+    if not entry or entry.get("size") != sig["size"] or entry.get("mtime_ns") != sig["mtime_ns"]:
+        return False
+    if not os.path.isfile(composite_path(out_dir, entry["name"])):
+        return False
+    if need_img and not (entry.get("img") and os.path.isfile(os.path.join(out_dir, entry["img"]))):
+        return False
+    return True
+
+
+def forget_entry(out_dir: str, state: dict, name: str) -> None:
+    state["files"].pop(name, None)
+    p = composite_path(out_dir, name)
+    if os.path.exists(p):
+        os.remove(p)
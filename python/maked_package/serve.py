@@ -0,0 +1,217 @@
+# python/maked_package/serve.py
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# -------------------------------------------------------------
+#  상주 워커 (python main.py serve)
+#
+#  ncdayRoutes.js 가 요청마다 새 프로세스를 띄우면 numpy/xarray import + NetCDF open 만으로
+#  수백 ms 가 든다 → 프로세스 하나를 살려 두고 stdin/stdout 으로 요청을 주고받는다.
+#
+#  요청 (stdin, 한 줄 JSON):
+#    {"id": 7, "cmd": "ncgrid", "args": [path, field, composite, gridResKm, gridExtentKm, maskBelowDbz]}
+#    {"id": 8, "cmd": "ncmeta", "args": [path]}
+#    {"id": 9, "cmd": "ast_to_json", "args": [ast_path, out.json, "--cache"]}
+#    {"id": 0, "cmd": "stats"} / {"cmd": "exit"}
+#  응답 (stdout): nc_grid_main 과 같은 "첫 줄 JSON header + '\n' + payload" 프레임.
+#    header 에 id / ok / bytes(payload 길이) 가 더 붙는다. 실패 = {"id", "ok": false, "error"}
+#    ncgrid  → header = nc_grid_main header, payload = float32 (ny*nx)
+#              (args 에 --encoding=u8 / --compress=zlib|gzip / --bbox= / --pyramid= 를 붙이면 nc_grid.encode_grid 형식)
+#    ncmeta  → header = {"meta": {...}}, payload 없음
+#    ast_to_json → header = {"code", "stdout"}, payload 없음 (출력은 header 에 담는다)
+#
+#  - 열린 Dataset(+RadarVolume) 은 최근 DATASET_SLOTS 개, 계산한 격자는 최근 GRID_SLOTS 개 보관
+#  - 메모리 LRU 에 없는 격자는 ncgrid 디스크 캐시(nc_tools/grid_cache) 를 먼저 보고, 계산하면 거기에도 저장
+#  - 원본의 (size, mtime_ns) 가 바뀌면 캐시 무효 (다운로드 중 덮어쓴 파일 등)
+#  - 처리 중 print 는 stderr 로 돌린다 → stdout 프레임이 깨지지 않게
+# -------------------------------------------------------------
+DATASET_SLOTS = 8
+GRID_SLOTS = 64
+
+_datasets: "OrderedDict[str, dict]" = OrderedDict()     # path → {"sig", "ds", "vol"}
+_grids: "OrderedDict[tuple, tuple[dict, np.ndarray]]" = OrderedDict()
+_stats = {"requests": 0, "errors": 0, "grid_hits": 0, "disk_hits": 0, "grid_misses": 0, "dataset_opens": 0}
+
+
+def _signature(path: str) -> tuple[int, int]:
+    st = os.stat(path)
+    return int(st.st_size), int(st.st_mtime_ns)
+
+
+def _close_entry(entry: dict) -> None:
+    if entry.get("vol") is not None:
+        entry["vol"].close()        # owns=True → ds 도 같이 닫힘
+    else:
+        entry["ds"].close()
+
+
+def _dataset_entry(path: str) -> dict:
+    """path 의 열린 Dataset 항목 (LRU). 원본이 바뀌었으면 다시 연다."""
+    from .nc_tools.radar_volume import open_nc_dataset
+
+    sig = _signature(path)
+    entry = _datasets.get(path)
+    if entry is not None:
+        if entry["sig"] == sig:
+            _datasets.move_to_end(path)
+            return entry
+        _close_entry(_datasets.pop(path))
+
+    entry = {"sig": sig, "ds": open_nc_dataset(path), "vol": None}
+    _stats["dataset_opens"] += 1
+    _datasets[path] = entry
+    while len(_datasets) > DATASET_SLOTS:
+        _close_entry(_datasets.popitem(last=False)[1])
+    return entry
+
+
+def _volume(entry: dict, path: str):
+    from .nc_tools.radar_volume import RadarVolume
+
+    if entry["vol"] is None:
+        entry["vol"] = RadarVolume(entry["ds"], owns=True, path=path)
+    return entry["vol"]
+
+
+def handle_ncgrid(args: list[str]) -> tuple[dict, memoryview]:
+    from .cli_flags import parse_cli_flags
+    from .config import NCGRID_CACHE_ENABLED
+    from .nc_tools.grid_cache import store_cached_grid
+    from .nc_tools.nc_grid import (cached_grid, composite_grid, encode_grid, parse_bbox, parse_grid_args,
+                                   parse_pyramid)
+
+    args, flags = parse_cli_flags(args)
+    p = parse_grid_args(args)
+    path = os.path.abspath(p.pop("path"))
+    p["bbox"] = parse_bbox(flags["bbox"]) if flags.get("bbox") else None
+    use_cache = NCGRID_CACHE_ENABLED and "no-cache" not in flags
+    encoding, compression = flags.get("encoding") or None, flags.get("compress") or None
+    pyramid = parse_pyramid(flags["pyramid"]) if "pyramid" in flags else None
+
+    key = (path, _signature(path), p["field"], p["composite"], p["grid_res_km"], p["grid_extent_km"],
+           p["mask_below"], p["bbox"])
+    hit = _grids.get(key)
+    if hit is not None:
+        _grids.move_to_end(key)
+        _stats["grid_hits"] += 1
+        return encode_grid(*hit, encoding, compression, pyramid)
+
+    # 메모리에 없으면 디스크 캐시 (ncgrid 단발 실행과 공유, ROI 는 전체 격자를 잘라서도) → 그래도 없으면 계산
+    cached = cached_grid(path, p) if use_cache else None
+    if cached is not None:
+        _stats["disk_hits"] += 1
+        header, Gc = cached
+    else:
+        _stats["grid_misses"] += 1
+        header, Gc = composite_grid(_volume(_dataset_entry(path), path), **p)
+        if use_cache:
+            try:
+                store_cached_grid(path, p, header, Gc)
+            except OSError as e:
+                print(f"[serve] 캐시 저장 실패: {e}", file=sys.stderr, flush=True)
+
+    # mmap 된 캐시 배열도 메모리로 복사 → 디스크 항목이 정리돼도 메모리 LRU 는 유효
+    # (LRU 는 float32 원본, 인코딩 / 피라미드는 응답마다)
+    Gc = np.array(Gc, dtype=np.float32)
+    _grids[key] = (header, Gc)
+    while len(_grids) > GRID_SLOTS:
+        _grids.popitem(last=False)
+    return encode_grid(header, Gc, encoding, compression, pyramid)
+
+
+def handle_ncmeta(args: list[str]) -> tuple[dict, bytes]:
+    from .nc_tools.nc_meta import nc_meta
+
+    path = args[0]
+    entry = _dataset_entry(os.path.abspath(path))
+    return {"meta": nc_meta(entry["ds"], path)}, b""
+
+
+def handle_ast_to_json(args: list[str]) -> tuple[dict, bytes]:
+    from .ast_to_json import main as ast_to_json_main
+
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        code = int(ast_to_json_main(list(args)) or 0)
+    return {"code": code, "stdout": buf.getvalue()}, b""
+
+
+def handle_stats(_args: list[str]) -> tuple[dict, bytes]:
+    return {
+        **_stats,
+        "datasets": len(_datasets),
+        "grids": len(_grids),
+        "grid_bytes": int(sum(g.nbytes for _, g in _grids.values())),
+    }, b""
+
+
+HANDLERS = {
+    "ncgrid": handle_ncgrid,
+    "ncmeta": handle_ncmeta,
+    "ast_to_json": handle_ast_to_json,
+    "ast": handle_ast_to_json,
+    "stats": handle_stats,
+}
+
+
+def _write_frame(out, header: dict, payload=b"") -> None:
+    header = {**header, "bytes": memoryview(payload).nbytes}
+    out.write((json.dumps(header, ensure_ascii=False) + "\n").encode("utf-8"))
+    if payload:
+        out.write(payload)
+    out.flush()
+
+
+def serve_main(argv: list[str]) -> int:
+    inp = sys.stdin.buffer
+    out = sys.stdout.buffer
+    # 핸들러 안의 print 가 프레임 사이에 끼지 않도록 stdout 을 stderr 로
+    sys.stdout = sys.stderr
+
+    # 자주 쓰는 모듈은 미리 import (첫 요청 지연 제거)
+    from .nc_tools import nc_grid, nc_meta  # noqa: F401
+
+    print(f"[serve] ready pid={os.getpid()}", file=sys.stderr, flush=True)
+    try:
+        for raw in inp:
+            line = raw.strip()
+            if not line:
+                continue
+            req_id = None
+            try:
+                req = json.loads(line)
+                req_id = req.get("id")
+                cmd = req.get("cmd")
+                if cmd == "exit":
+                    _write_frame(out, {"id": req_id, "ok": True})
+                    break
+                handler = HANDLERS.get(cmd)
+                if handler is None:
+                    raise ValueError(f"unknown cmd: {cmd}")
+
+                _stats["requests"] += 1
+                t0 = time.perf_counter()
+                header, payload = handler([str(a) for a in req.get("args") or []])
+                _write_frame(out, {"id": req_id, "ok": True, **header,
+                                   "seconds": round(time.perf_counter() - t0, 4)}, payload)
+            except (BrokenPipeError, KeyboardInterrupt):
+                raise
+            except Exception as e:
+                _stats["errors"] += 1
+                print(f"[serve] 요청 실패 id={req_id}: {e}", file=sys.stderr, flush=True)
+                _write_frame(out, {"id": req_id, "ok": False, "error": f"{type(e).__name__}: {e}"})
+    except BrokenPipeError:
+        pass
+    finally:
+        while _datasets:
+            _close_entry(_datasets.popitem()[1])
+    return 0
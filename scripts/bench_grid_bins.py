@@ -0,0 +1,117 @@
+# scripts/bench_grid_bins.py
+# usage:
+#   python scripts/bench_grid_bins.py [nc_path] [repeat]
+#
+# nc_grid 의 sweep → 격자 max 비닝 비교 (481×481, 1 km 격자 = ncgrid 기본 240 km / 1.0 km)
+#   old   : meshgrid + sin/cos + searchsorted + np.maximum.at  (기존 _gridify_max)
+#   direct: 처음 보는 기하 (유효 gate 만 칸 번호 계산 → 1차원 maximum.at)
+#   build : 같은 기하 두 번째 — 전체 (ray, gate) 순열 생성 + reduce
+#   warm  : 같은 기하 재사용 (gather + reduceat 만)
+#
+# nc_path 를 주면 그 파일의 sweep 들로, 없으면 합성 sweep (360 ray × 960 gate, 250 m) 으로 측정.
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "python"))
+from maked_package.nc_tools import grid_bins  # noqa: E402
+from maked_package.nc_tools.grid_bins import PolarGridBinner, direct_gridify_max  # noqa: E402
+
+GRID_RES_KM = 1.0
+GRID_EXTENT_KM = 240.0
+
+
+def old_gridify_max(az_deg, r_m, Z, xk, yk):
+    th = np.deg2rad(az_deg)
+    R, TH = np.meshgrid(r_m, th)
+    X_m = R * np.sin(TH)
+    Y_m = R * np.cos(TH)
+
+    dx = float(xk[1] - xk[0])
+    dy = float(yk[1] - yk[0])
+    x_edges = np.concatenate(([xk[0] - dx / 2], xk + dx / 2))
+    y_edges = np.concatenate(([yk[0] - dy / 2], yk + dy / 2))
+
+    x = (X_m / 1000.0).ravel()
+    y = (Y_m / 1000.0).ravel()
+    z = Z.ravel()
+    m = np.isfinite(z)
+    x, y, z = x[m], y[m], z[m]
+
+    ix = np.searchsorted(x_edges, x, side="right") - 1
+    iy = np.searchsorted(y_edges, y, side="right") - 1
+    nx, ny = xk.shape[0], yk.shape[0]
+    inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+
+    out = np.full((ny, nx), -np.inf, dtype=np.float32)
+    np.maximum.at(out, (iy[inside], ix[inside]), z[inside])
+    return np.where(out == -np.inf, np.nan, out)
+
+
+def synthetic_sweeps(n_sweeps=9, n_rays=360, n_gates=960, gate_m=250.0, seed=0):
+    rng = np.random.default_rng(seed)
+    az = (np.arange(n_rays) + 0.37).astype(np.float32)
+    r = (np.arange(n_gates) * gate_m + gate_m / 2).astype(np.float32)
+    sweeps = []
+    for _ in range(n_sweeps):
+        Z = rng.normal(20, 15, (n_rays, n_gates)).astype(np.float32)
+        Z[Z < 5] = np.nan
+        sweeps.append((az, r, Z))
+    return sweeps
+
+
+def file_sweeps(path):
+    from maked_package.nc_tools.radar_volume import RadarVolume
+
+    vol = RadarVolume.open(path)
+    field = vol.pick_field(("CFZH", "DBZH"))
+    sweeps = [vol.sweep(field, s) for s in range(vol.sweep_count)]
+    return sweeps
+
+
+def _time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1] else None
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    sweeps = file_sweeps(path) if path else synthetic_sweeps()
+    xk = np.arange(-GRID_EXTENT_KM, GRID_EXTENT_KM + GRID_RES_KM, GRID_RES_KM, dtype=np.float32)
+    yk = xk.copy()
+
+    n_gates = sum(int(Z.size) for _, _, Z in sweeps)
+    print(f"grid {yk.size}x{xk.size} ({GRID_RES_KM} km), sweeps={len(sweeps)}, gates={n_gates}")
+
+    for i, (az, r, Z) in enumerate(sweeps):
+        a = old_gridify_max(az, r, Z, xk, yk)
+        for b in (direct_gridify_max(az, r, Z, xk, yk), PolarGridBinner(az, r, xk, yk).max(Z)):
+            if not np.array_equal(a, b, equal_nan=True):
+                print(f"[오류] sweep {i}: 결과 불일치", file=sys.stderr)
+                return 1
+
+    t_old = _time(lambda: [old_gridify_max(az, r, Z, xk, yk) for az, r, Z in sweeps], repeat)
+    t_direct = _time(lambda: [direct_gridify_max(az, r, Z, xk, yk) for az, r, Z in sweeps], repeat)
+    t_build = _time(lambda: [PolarGridBinner(az, r, xk, yk).max(Z) for az, r, Z in sweeps], repeat)
+    binners = [grid_bins.get_binner(az, r, xk, yk) for az, r, _ in sweeps]
+    t_warm = _time(lambda: [b.max(Z) for b, (_, _, Z) in zip(binners, sweeps)], repeat)
+
+    n = len(sweeps)
+    print(f"old    (maximum.at)      {t_old * 1000 / n:8.2f} ms/sweep")
+    for name, t in (("direct (valid only)", t_direct), ("build  (index + sort)", t_build),
+                    ("warm   (reduceat)", t_warm)):
+        print(f"{name:24s} {t * 1000 / n:8.2f} ms/sweep  x{t_old / t:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,9 +5,9 @@
 # 예)
 #   python scripts/render_nc_frame.py data_202512252030.nc frame_00001.png CFZH 0 150 1.0
 
+import os
 import sys
 import numpy as np
-import xarray as xr
 import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
@@ -19,80 +19,22 @@ try:
 except Exception:
     HAS_SCIPY = False
 
+# 공용 CF/Radial 리더 (python/maked_package/nc_tools/radar_volume.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "python"))
+from maked_package.nc_tools.radar_volume import RadarVolume  # noqa: E402
+from maked_package.nc_tools.grid_bins import gridify_max  # noqa: E402
+
 DBZ_LEVELS = [-10, 0, 5, 10, 15, 20, 25, 30, 35, 40, 45, 50, 55, 60, 65, 70]
 
-def pick_field(ds, preferred):
-    if preferred in ds.data_vars:
+def pick_field(vol, preferred):
+    if preferred in vol.ds.data_vars:
         return preferred
     # fallback
-    for cand in ["CFZH", "DBZH"]:
-        if cand in ds.data_vars:
-            return cand
-    raise KeyError("No CFZH/DBZH in dataset")
-
-def get_sweep_ray_bounds(ds):
-    start = ds["sweep_start_ray_index"].values.astype(int)
-    end = ds["sweep_end_ray_index"].values.astype(int) + 1
-    return start, end
-
-def extract_sweep_polar(ds, field, sweep_idx):
-    start, end = get_sweep_ray_bounds(ds)
-    i0, i1 = start[sweep_idx], end[sweep_idx]
-    ngates = ds.dims["range"]
-
-    az = ds["azimuth"].isel(time=slice(i0, i1)).values.astype(np.float32)
-    r = ds["range"].values.astype(np.float32)
-
-    v = ds[field]
-    if "n_points" in v.dims:
-        ray_start = ds["ray_start_index"].values.astype(int)
-        ray_start_sel = ray_start[i0:i1]
-
-        arr = v.values.astype(np.float32)
-        nrays = i1 - i0
-        Z = np.full((nrays, ngates), np.nan, dtype=np.float32)
-        for k, sidx in enumerate(ray_start_sel):
-            Z[k, :] = arr[sidx:sidx + ngates]
-    else:
-        Z = v.isel(time=slice(i0, i1)).values.astype(np.float32)
-
-    return az, r, Z
-
-def polar_to_xy(az_deg, r_m):
-    theta = np.deg2rad(az_deg)
-    R, TH = np.meshgrid(r_m, theta)
-    X = R * np.sin(TH)  # East
-    Y = R * np.cos(TH)  # North
-    return X, Y
-
-def gridify_max(X_m, Y_m, Z, grid_x_km, grid_y_km):
-    x_cent = grid_x_km
-    y_cent = grid_y_km
-    dx = (x_cent[1] - x_cent[0])
-    dy = (y_cent[1] - y_cent[0])
-
-    x_edges = np.concatenate(([x_cent[0] - dx/2], x_cent + dx/2))
-    y_edges = np.concatenate(([y_cent[0] - dy/2], y_cent + dy/2))
-
-    x = (X_m / 1000.0).ravel()
-    y = (Y_m / 1000.0).ravel()
-    z = Z.ravel()
-
-    m = np.isfinite(z)
-    x = x[m]; y = y[m]; z = z[m]
-
-    ix = np.searchsorted(x_edges, x, side="right") - 1
-    iy = np.searchsorted(y_edges, y, side="right") - 1
-
-    nx = len(x_cent)
-    ny = len(y_cent)
-    inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
-
-    ix = ix[inside]; iy = iy[inside]; z = z[inside]
-
-    G2 = np.full((ny, nx), -np.inf, dtype=np.float32)
-    np.maximum.at(G2, (iy, ix), z)
-    return np.where(G2 == -np.inf, np.nan, G2)
+    return vol.pick_field(("CFZH", "DBZH"))
+
+def extract_sweep_polar(vol, field, sweep_idx):
+    # 변수는 파일당 1회 디코드/언팩, sweep 은 뷰
+    return vol.sweep(field, sweep_idx)
 
 def draw_ring_and_crosshairs(ax, max_r_km=150, ring_step_km=50):
     ax.plot([-max_r_km, max_r_km], [0, 0], linewidth=1)
@@ -113,11 +55,10 @@ def main():
     extent_km = float(sys.argv[5])
     smooth_sigma = float(sys.argv[6])
 
-    ds = xr.open_dataset(in_nc)
+    vol = RadarVolume.open(in_nc)
 
-    field = pick_field(ds, field_pref)
-    start, end = get_sweep_ray_bounds(ds)
-    nsweeps = len(start)
+    field = pick_field(vol, field_pref)
+    nsweeps = vol.sweep_count
 
     # grid (1km)
     GRID_RES_KM = 1.0
@@ -127,13 +68,10 @@ def main():
 
     grids = []
     for s in range(nsweeps):
-        az, r, Z = extract_sweep_polar(ds, field, s)
-        Z = Z.copy()
-        Z[Z < mask_below] = np.nan
-
-        X, Y = polar_to_xy(az, r)
-        G = gridify_max(X, Y, Z, xk, yk)
+        az, r, Z = extract_sweep_polar(vol, field, s)
+        G = gridify_max(az, r, Z, xk, yk, mask_below=mask_below)
         grids.append(G)
+    vol.close()
 
     # MAX composite
     Gc = np.nanmax(np.stack(grids, axis=0), axis=0)
@@ -60,7 +60,8 @@ function runAstToCat08Json(astPath, outJsonPath) {
         const pyMain = path.resolve(process.cwd(), "python", "main.py");
         const {cmd, baseArgs} = pickPythonCmd();
 
-        const args = [...baseArgs, pyMain, "ast_to_json", astPath, outJsonPath,];
+        // --cache: 같은 내용의 AST 재업로드는 해시 확인 후 캐시된 결과를 바로 사용
+        const args = [...baseArgs, pyMain, "ast_to_json", astPath, outJsonPath, "--cache",];
 
         execFile(cmd, args, {cwd: process.cwd()}, (err, stdout, stderr) => {
             if (err) {
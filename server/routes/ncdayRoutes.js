@@ -30,6 +30,117 @@ function pickPythonCmd() {
 }
 
 
+/** --------- 상주 파이썬 워커 풀 (python main.py serve) ---------
+ * 요청마다 프로세스를 띄우면 numpy/xarray import + NC open 으로 수백 ms 가 고정으로 든다.
+ * → 워커를 살려 두고 stdin 으로 JSON 한 줄, stdout 으로 "JSON header 줄 + payload(bytes)" 프레임을 받는다.
+ * - 워커 최대 PY_SERVE_WORKERS 개 (기본 2), 워커마다 한 번에 한 요청. 대기열은 공유
+ * - 보내기 전에 클라이언트가 끊긴 요청은 건너뜀 (스크러빙 중 밀린 요청 정리)
+ * - 요청이 PY_SERVE_TIMEOUT_MS (기본 60초) 안에 끝나지 않으면 그 요청은 실패, 워커는 kill
+ *   → 멈춘 워커 하나가 뒤 요청을 다 막지 않음. 빈 자리는 다음 요청 때 새로 띄움
+ * - 워커가 죽으면 그 워커가 처리 중이던 요청만 실패 (대기열은 다른 / 새 워커가 이어 받음)
+ */
+const PY_SERVE_WORKERS = Math.max(1, Number(process.env.PY_SERVE_WORKERS) || 2);
+const PY_SERVE_TIMEOUT_MS = Math.max(1000, Number(process.env.PY_SERVE_TIMEOUT_MS) || 60000);
+const pyPool = {workers: [], queue: [], seq: 0};
+
+function startPyWorker() {
+    const pyMain = path.resolve(process.cwd(), "python", "main.py");
+    const {cmd, baseArgs} = pickPythonCmd();
+    const proc = spawn(cmd, [...baseArgs, pyMain, "serve"], {cwd: process.cwd(), stdio: ["pipe", "pipe", "pipe"]});
+    const w = {proc, buf: Buffer.alloc(0), inflight: null, timer: null};
+
+    proc.stdout.on("data", (d) => {
+        w.buf = Buffer.concat([w.buf, d]);
+        drainPyWorker(w);
+    });
+    proc.stderr.on("data", (d) => console.error(`[pyserve ${proc.pid}]`, d.toString("utf-8").trimEnd()));
+
+    const onGone = (e) => {
+        if (!pyPool.workers.includes(w)) return;
+        retirePyWorker(w, e instanceof Error ? e : new Error(`python serve exited (code=${e})`));
+    };
+    proc.on("error", onGone);
+    proc.on("close", onGone);
+    proc.stdin.on("error", () => {});
+
+    pyPool.workers.push(w);
+    return w;
+}
+
+function takeInflight(w) {
+    const r = w.inflight;
+    w.inflight = null;
+    clearTimeout(w.timer);
+    w.timer = null;
+    return r;
+}
+
+// 풀에서 빼고 처리 중이던 요청은 err 로 실패, 프로세스 종료 → 대기열은 남은 / 새 워커로
+function retirePyWorker(w, err) {
+    pyPool.workers = pyPool.workers.filter((x) => x !== w);
+    const r = takeInflight(w);
+    if (r) r.reject(err);
+    if (w.proc.exitCode === null && w.proc.signalCode === null) w.proc.kill("SIGKILL");
+    pumpPyWorkers();
+}
+
+function drainPyWorker(w) {
+    const r = w.inflight;
+    if (!r) return;
+    const nl = w.buf.indexOf(0x0a);
+    if (nl < 0) return;
+
+    const headerLine = w.buf.subarray(0, nl);
+    let header;
+    try {
+        header = JSON.parse(headerLine.toString("utf-8"));
+    } catch (e) {
+        retirePyWorker(w, new Error("python serve: broken frame"));     // 프레임이 깨졌으면 워커 재시작
+        return;
+    }
+    const total = nl + 1 + (header.bytes || 0);
+    if (w.buf.length < total) return;
+
+    const payload = w.buf.subarray(nl + 1, total);
+    w.buf = w.buf.subarray(total);
+    takeInflight(w);
+
+    if (header.ok) r.resolve({header, headerLine: Buffer.from(headerLine), payload: Buffer.from(payload)});
+    else r.reject(new Error(header.error || "python serve error"));
+    pumpPyWorkers();
+}
+
+function pumpPyWorkers() {
+    while (pyPool.queue.length) {
+        const r = pyPool.queue[0];
+        if (r.isCancelled?.()) {
+            pyPool.queue.shift();
+            r.reject(new Error("cancelled"));
+            continue;
+        }
+        let w = pyPool.workers.find((x) => !x.inflight);
+        if (!w) {
+            if (pyPool.workers.length >= PY_SERVE_WORKERS) return;
+            w = startPyWorker();
+        }
+        pyPool.queue.shift();
+        w.inflight = r;
+        w.timer = setTimeout(
+            () => retirePyWorker(w, new Error(`python serve timeout (${PY_SERVE_TIMEOUT_MS} ms)`)),
+            PY_SERVE_TIMEOUT_MS,
+        );
+        w.proc.stdin.write(JSON.stringify({id: r.id, cmd: r.cmd, args: r.args}) + "\n");
+    }
+}
+
+function pyWorkerCall(cmd, args, isCancelled) {
+    return new Promise((resolve, reject) => {
+        pyPool.queue.push({id: ++pyPool.seq, cmd, args, isCancelled, resolve, reject});
+        pumpPyWorkers();
+    });
+}
+
+
 function hhmmFromIndex(i, stepMinutes = 5) {
     const total = i * stepMinutes;
     const hh = String(Math.floor(total / 60)).padStart(2, "0");
@@ -135,6 +246,8 @@ function runRender(job) {
             String(gridSize),  // argv[2]
             String(weakCutDbz),// argv[3]  ✅ 여기!
             fmt,               // argv[4]
+            "--workers=0",     // 파일 단위 병렬 렌더 (0 = CPU 수)
+            "--no-frames",     // mp4 + manifest 만 필요 → 프레임을 ffmpeg stdin 으로 바로 흘림
         ];
         console.log("[ncrender] spawn:", cmd, args.join(" "));
 
@@ -439,49 +552,9 @@ router.get("/py/meta", (req, res) => {
         const filePath = safeJoin(job.ncDir, safeName);
         if (!fs.existsSync(filePath)) return res.status(404).json({error: "file not found"});
 
-        const pyMain = path.resolve(process.cwd(), "python", "main.py");
-        const {cmd, baseArgs} = pickPythonCmd();
-
-        const py = spawn(cmd, [...baseArgs, pyMain, "ncmeta", filePath], {
-            cwd: process.cwd(),
-            stdio: ["ignore", "pipe", "pipe"],
-        });
-
-        let out = "";
-        let err = "";
-
-        py.stdout.on("data", (d) => (out += d.toString("utf-8")));
-        py.stderr.on("data", (d) => (err += d.toString("utf-8")));
-
-        py.on("error", (e) => {
-            return res.status(500).json({
-                error: "Python spawn error",
-                message: e.message,
-                code: e.code,
-                pyMain,
-            });
-        });
-
-        py.on("close", (code) => {
-            if (code !== 0) {
-                return res.status(500).json({
-                    error: "Python exit",
-                    exitCode: code,
-                    stderr: err.slice(0, 4000),
-                    stdout: out.slice(0, 4000),
-                    pyMain,
-                });
-            }
-            try {
-                return res.json(JSON.parse(out));
-            } catch (e) {
-                return res.status(500).json({
-                    error: "meta JSON parse failed",
-                    stderr: err.slice(0, 2000),
-                    stdout: out.slice(0, 2000),
-                });
-            }
-        });
+        pyWorkerCall("ncmeta", [filePath])
+            .then(({header}) => res.json(header.meta))
+            .catch((e) => res.status(500).json({error: "python meta failed", message: e.message}));
     } catch (e) {
         return res.status(500).json({error: e.message});
     }
@@ -520,6 +593,8 @@ router.get("/nc", (req, res) => {
 
 // py/grid: 파이썬으로 polar->grid 합성 후 float32 격자 반환
 // - /api/ncday/py/grid?jobId=...&file=...&field=CFZH&composite=max&gridResKm=1.0&gridExtentKm=240&maskBelowDbz=0
+//   [&encoding=u8&compress=zlib]  (nc_grid.encode_grid: u8 양자화 / payload 압축, header 에 scale·offset)
+//   [&bbox=xmin,ymin,xmax,ymax]   ROI 만 (km, 레이더 기준) / [&pyramid=1,2,4,8] 다해상도 (header.levels)
 router.get("/py/grid", (req, res) => {
     try {
         const jobId = String(req.query.jobId || "");
@@ -530,6 +605,18 @@ router.get("/py/grid", (req, res) => {
         const gridResKm = String(req.query.gridResKm || "1.0");
         const gridExtentKm = String(req.query.gridExtentKm || "240.0");
         const maskBelowDbz = String(req.query.maskBelowDbz || "0.0");
+        // 선택: encoding=u8 (양자화), compress=zlib|gzip — 기본은 raw float32
+        const encoding = String(req.query.encoding || "f32");
+        const compress = String(req.query.compress || "none");
+        if (!["f32", "u8"].includes(encoding)) return res.status(400).json({error: "encoding must be f32|u8"});
+        if (!["none", "zlib", "gzip"].includes(compress)) return res.status(400).json({error: "compress must be none|zlib|gzip"});
+        // 선택: bbox=xmin,ymin,xmax,ymax (km, ROI 만 계산), pyramid=1,2,4,8 (블록 max 다해상도)
+        const bbox = req.query.bbox != null ? String(req.query.bbox) : null;
+        const pyramid = req.query.pyramid != null ? String(req.query.pyramid) : null;
+        const num = "-?\\d+(\\.\\d+)?";
+        if (bbox && !new RegExp(`^${num}(,${num}){3}$`).test(bbox)) return res.status(400).json({error: "bbox must be xmin,ymin,xmax,ymax"});
+        if (pyramid && !/^\d+(,\d+)*$/.test(pyramid)) return res.status(400).json({error: "pyramid must be like 1,2,4,8"});
+        const extra = [...(bbox ? [`--bbox=${bbox}`] : []), ...(pyramid ? [`--pyramid=${pyramid}`] : [])];
 
         const job = jobs.get(jobId);
         if (!job) return res.status(404).json({error: "job not found"});
@@ -539,32 +626,22 @@ router.get("/py/grid", (req, res) => {
         const filePath = safeJoin(job.ncDir, safeName);
         if (!fs.existsSync(filePath)) return res.status(404).json({error: "file not found"});
 
-        const pyMain = path.resolve(process.cwd(), "python", "main.py");
-        const {cmd, baseArgs} = pickPythonCmd();
-
-        res.setHeader("Content-Type", "application/octet-stream");
-
-        const py = spawn(
-            cmd,
-            [...baseArgs, pyMain, "ncgrid", filePath, field, composite, gridResKm, gridExtentKm, maskBelowDbz],
-            {cwd: process.cwd(), stdio: ["ignore", "pipe", "pipe"]}
-        );
-
-        py.on("error", (e) => {
-            return res.status(500).json({error: "Python spawn error", message: e.message, code: e.code, pyMain});
-        });
-
-        py.stderr.on("data", (d) => console.error("[ncgrid]", d.toString("utf-8")));
-        py.stdout.pipe(res);
-
-        py.on("close", (code) => {
-            if (code !== 0) {
-                try {
-                    res.end();
-                } catch {
-                }
-            }
-        });
+        // 상주 워커: import / NC open / 같은 조건의 격자는 워커 쪽 LRU 에서 재사용
+        pyWorkerCall(
+            "ncgrid",
+            [filePath, field, composite, gridResKm, gridExtentKm, maskBelowDbz, `--encoding=${encoding}`, `--compress=${compress}`, ...extra],
+            () => req.socket.destroyed || res.writableEnded,
+        )
+            .then(({headerLine, payload}) => {
+                // 응답 형식은 그대로: 첫 줄 JSON header + '\n' + raw float32
+                res.setHeader("Content-Type", "application/octet-stream");
+                res.end(Buffer.concat([headerLine, Buffer.from("\n"), payload]));
+            })
+            .catch((e) => {
+                if (e.message === "cancelled" || res.headersSent) return;
+                console.error("[ncgrid]", e.message);
+                res.status(500).json({error: "python grid failed", message: e.message});
+            });
     } catch (e) {
         return res.status(500).json({error: e.message});
     }
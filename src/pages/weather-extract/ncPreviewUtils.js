@@ -59,6 +59,37 @@ export function parseHeaderAndFloat32(buf) {
   return { header, f32 };
 }
 
+// /py/grid 응답 (encoding=f32|u8, compression=none|zlib|gzip) → { header, f32 }
+// - compression 이 있으면 DecompressionStream 으로 풀고 ("zlib" = "deflate")
+// - u8 이면 dBZ = offset + u8 * scale, nodata → NaN 으로 되돌려서 f32 와 같은 모양으로 반환
+export async function decodeGridResponse(buf) {
+  const { header, f32: rawF32 } = parseHeaderAndFloat32(buf);
+  if (!header.encoding && !header.compression) return { header, f32: rawF32 };
+
+  const u8 = new Uint8Array(buf);
+  let body = u8.subarray(u8.indexOf(10) + 1);
+
+  if (header.compression && header.compression !== "none") {
+    const format = header.compression === "zlib" ? "deflate" : header.compression;
+    const stream = new Blob([body]).stream().pipeThrough(new DecompressionStream(format));
+    body = new Uint8Array(await new Response(stream).arrayBuffer());
+  }
+
+  if (header.encoding === "u8") {
+    const n = header.nx * header.ny;
+    const f32 = new Float32Array(n);
+    const { scale, offset, nodata } = header;
+    for (let i = 0; i < n; i++) {
+      const q = body[i];
+      f32[i] = q === nodata ? NaN : offset + q * scale;
+    }
+    return { header, f32 };
+  }
+
+  const copy = body.slice();  // Float32Array 는 4바이트 정렬 필요
+  return { header, f32: new Float32Array(copy.buffer, 0, Math.floor(copy.byteLength / 4)) };
+}
+
 // grid -> dataURL (지금은 grayscale)
 export function gridToDataUrl({ header, f32 }, { vmin = -10, vmax = 70, alpha = 200 } = {}) {
   const nx = header.nx;
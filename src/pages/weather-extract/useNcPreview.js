@@ -1,7 +1,7 @@
 // src/pages/weather-extract/useNcPreview.js
 import {useEffect, useMemo, useState} from "react";
 import L from "leaflet";
-import {destFromCenter, gridToDataUrl, parseHeaderAndFloat32, safeJson} from "./ncPreviewUtils";
+import {decodeGridResponse, destFromCenter, gridToDataUrl, safeJson} from "./ncPreviewUtils";
 
 // dBZ 구간(테스트 코드랑 동일)
 const DBZ_LEVELS = [-10, 0, 5, 10, 15, 20, 25, 30, 35, 40, 45, 50, 55, 60, 65, 70];
@@ -146,7 +146,9 @@ export function useNcPreview({jobId, previewFile, enabled}) {
           `&composite=${encodeURIComponent(composite)}` +
           `&gridResKm=${encodeURIComponent(gridResKm)}` +
           `&gridExtentKm=${encodeURIComponent(gridExtentKm)}` +
-          `&maskBelowDbz=${encodeURIComponent(maskBelowDbz)}`;
+          `&maskBelowDbz=${encodeURIComponent(maskBelowDbz)}` +
+          // 색칠 / 임계값만 하므로 u8 양자화 + zlib (float32 대비 ~20배 작음)
+          `&encoding=u8&compress=zlib`;
 
         const res = await fetch(reqUrl);
         if (!res.ok) {
@@ -157,7 +159,8 @@ export function useNcPreview({jobId, previewFile, enabled}) {
         const buf = await res.arrayBuffer();
         if (cancelled) return;
 
-        const parsed = parseHeaderAndFloat32(buf);
+        const parsed = await decodeGridResponse(buf);
+        if (cancelled) return;
         const { header, f32 } = parsed;
 
         const nextDataUrl = gridToDataUrlColor({ header, f32 });